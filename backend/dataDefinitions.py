@@ -209,6 +209,34 @@ class viaDefTuple(NamedTuple):
     minSpacing: float
     maxSpacing: float
 
+# optional design rules of a PDK, distances are in microns like the via rules
+class layerRuleTuple(NamedTuple):
+    layer: layLayer
+    minWidth: float
+    minSpacing: float
+
+
+class enclosureRuleTuple(NamedTuple):
+    inner: layLayer
+    outer: layLayer
+    enclosure: float
+
+
+# window and step in microns, densities as fractions of the window area
+class densityRuleTuple(NamedTuple):
+    layer: layLayer
+    window: float
+    step: float
+    minDensity: float
+    maxDensity: float
+
+
+# layers of the same name are one conductor, a via cut joins two of them
+class viaConnectionTuple(NamedTuple):
+    cut: layLayer
+    lower: layLayer
+    upper: layLayer
+
 # Used to define the via prototype
 class singleViaTuple(NamedTuple):
     viaDefTuple: viaDefTuple
@@ -233,3 +261,25 @@ class rectCoords(NamedTuple):
     w: float
     h: float
 
+
+
+# columns and rows of an instance array, pitches in scene units
+class instanceArrayTuple(NamedTuple):
+    columns: int = 1
+    rows: int = 1
+    xPitch: float = 0
+    yPitch: float = 0
+
+
+# parsed NLP label definition [@name:format:default], format is None for [@name]
+class nlpLabelTuple(NamedTuple):
+    labelName: str
+    formatString: Union[str, None]
+    defaultValue: str
+    predefined: bool
+
+
+# parsed PyLabel definition name=callbackFunction
+class pyLabelTuple(NamedTuple):
+    labelName: str
+    labelFunction: str
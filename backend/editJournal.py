@@ -0,0 +1,246 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+"""
+Append-only edit journal of an open cell view. The undo stack reports the
+items each command touches, the scene encodes only those items and a
+background thread appends them to the journal file next to the cell view.
+Saving the cell view empties the journal, so a journal found when a view
+is opened belongs to a crashed session and replaying it over the saved
+file recovers the edits.
+"""
+
+import json
+import os
+import pathlib
+import queue
+import threading
+from typing import Dict, List, Optional
+
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsScene
+
+
+def journalPath(file: pathlib.Path) -> pathlib.Path:
+    return file.with_name(f".{file.name}.journal")
+
+
+class journalWriter(threading.Thread):
+    """
+    Writes journal records on a background thread. The records of each key
+    are folded in memory, and once the journal grows past compactRecords
+    lines and twice the folded size, it is rewritten as one snapshot line
+    per key.
+    """
+
+    compactRecords = 1000
+
+    def __init__(self, path: pathlib.Path):
+        super().__init__(name=f"journal-{path.name}", daemon=True)
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        self._file = None
+        self._lines = 0
+        # first recorded version of the items of the saved file
+        self._base: Dict[int, str] = {}
+        # latest version of every edited item, None if deleted
+        self._state: Dict[int, Optional[str]] = {}
+
+    def put(self, op: str, key: int = -1, record: Optional[str] = None) -> None:
+        self._queue.put((op, key, record))
+
+    def run(self) -> None:
+        while True:
+            ops = [self._queue.get()]
+            while True:
+                try:
+                    ops.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for op, key, record in ops:
+                match op:
+                    case "base":
+                        self._base[key] = record
+                        self._write(op, key, record)
+                    case "put" | "drop":
+                        self._state[key] = record
+                        self._write(op, key, record)
+                    case "reset":
+                        self._reset()
+                    case "close":
+                        self._reset()
+                        return
+            if self._file:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                if self._lines > max(self.compactRecords,
+                                     2 * (len(self._base) + len(self._state))):
+                    self._compact()
+
+    def _write(self, op: str, key: int, record: Optional[str]) -> None:
+        if self._file is None:
+            self._file = self.path.open(mode="a", buffering=65536)
+        self._file.write(_recordLine(op, key, record))
+        self._lines += 1
+
+    def _compact(self) -> None:
+        tempPath = self.path.with_suffix(".tmp")
+        with tempPath.open(mode="w", buffering=65536) as f:
+            for key, record in self._base.items():
+                f.write(_recordLine("base", key, record))
+            for key, record in self._state.items():
+                # deleted items that are not in the saved file need no record
+                if record is not None or key in self._base:
+                    f.write(_recordLine("put" if record else "drop", key, record))
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        tempPath.replace(self.path)
+        self._file = self.path.open(mode="a", buffering=65536)
+        self._lines = len(self._base) + len(self._state)
+
+    def _reset(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+        self.path.unlink(missing_ok=True)
+        self._lines = 0
+        self._base.clear()
+        self._state.clear()
+
+
+def _recordLine(op: str, key: int, record: Optional[str]) -> str:
+    return f'{{"op":"{op}","key":{key},"item":{record or "null"}}}\n'
+
+
+class editJournal:
+    """
+    Journal of the edits of a scene since it was last saved. Items are keyed
+    by the itemStore keys of the scene undo stack, so the keys stay valid
+    after the undo stack compacts its commands.
+    """
+
+    def __init__(self, scene: QGraphicsScene, path: pathlib.Path):
+        self._scene = scene
+        self._store = scene.undoStack.itemStore
+        self._writer = journalWriter(path)
+        # keys of the items recorded since the last save
+        self._seen = set()
+
+    def prepare(self, items: list) -> List[int]:
+        """
+        Key the items of a command before it is done or undone, recording
+        the saved version of the items edited for the first time. Items of
+        compacted commands are already given as keys.
+        """
+        keys = []
+        for item in items:
+            key = self._store.assignKey(item) if isinstance(item, QGraphicsItem) else item
+            if key not in self._seen:
+                self._seen.add(key)
+                record = self._serialize(self._store.liveItem(key))
+                if record is not None:
+                    self._start()
+                    self._writer.put("base", key, record)
+            keys.append(key)
+        return keys
+
+    def record(self, keys: List[int]) -> None:
+        """Record the items of a command after it is done or undone."""
+        if not keys:
+            return
+        self._start()
+        for key in dict.fromkeys(keys):
+            record = self._serialize(self._store.liveItem(key))
+            if record is None:
+                self._writer.put("drop", key)
+            else:
+                self._writer.put("put", key, record)
+
+    def reset(self) -> None:
+        """Empty the journal after the scene is saved."""
+        self._seen.clear()
+        if self._writer.is_alive():
+            self._writer.put("reset")
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            self._writer.put("close")
+            self._writer.join(5)
+        else:
+            self._writer.path.unlink(missing_ok=True)
+
+    def _start(self) -> None:
+        if not self._writer.is_alive():
+            self._writer.start()
+
+    def _serialize(self, item: Optional[QGraphicsItem]) -> Optional[str]:
+        if item is None or item.scene() is not self._scene or item.parentItem() is not None:
+            return None
+        return self._scene.serializeItem(item)
+
+
+def replayJournal(file: pathlib.Path) -> Optional[list]:
+    """
+    Replay the journal of a cell view over its saved file. Returns the
+    recovered contents of the file, or None if there is nothing to recover.
+    """
+    path = journalPath(file)
+    base: Dict[int, dict] = {}
+    state: Dict[int, Optional[dict]] = {}
+    try:
+        with path.open() as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # the last line may be cut short by the crash
+                    break
+                if entry["op"] == "base":
+                    base[entry["key"]] = entry["item"]
+                else:
+                    state[entry["key"]] = entry["item"]
+        with file.open() as f:
+            items = json.load(f)
+    except (OSError, json.JSONDecodeError, KeyError):
+        return None
+    if not state:
+        return None
+
+    # remove the saved versions of the edited items from the file
+    canonical: Dict[str, List[int]] = {}
+    for index, item in enumerate(items[2:], 2):
+        canonical.setdefault(_canonical(item), []).append(index)
+    removed = set()
+    for key, item in base.items():
+        indices = canonical.get(_canonical(item))
+        if indices and key in state:
+            removed.add(indices.pop())
+    recovered = [item for index, item in enumerate(items) if index not in removed]
+    recovered.extend(item for item in state.values() if item is not None)
+    return recovered
+
+
+def _canonical(item: dict) -> str:
+    # the encoders write some coordinates as floats, compare numbers by value
+    return json.dumps(json.loads(json.dumps(item), parse_int=float), sort_keys=True)
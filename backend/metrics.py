@@ -0,0 +1,264 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+"""
+Named spans, counters and histograms of the editor operations. The registry
+is disabled by default and then a span is a shared no-op context manager,
+so instrumented code costs one attribute lookup. Set REVEDA_METRICS=1 or
+call enable() from the python console to start recording:
+
+    import revedaEditor.backend.metrics as metrics
+    metrics.enable()
+    print(metrics.report())
+    metrics.exportChromeTrace("trace.json")  # chrome://tracing or Perfetto
+    metrics.exportCsv("metrics.csv")
+
+The duration of every span is also added to the histogram of its name.
+"""
+
+import csv
+import functools
+import json
+import math
+import os
+import pathlib
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Union
+
+
+class histogram:
+    """
+    Count, sum, extremes and power of two buckets of the observed values.
+    Quantiles are estimated as the upper bound of their bucket.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.buckets: Dict[int, int] = {}  # exponent -> count of values below 2**exponent
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        exponent = math.frexp(value)[1] if value > 0 else -1075
+        self.buckets[exponent] = self.buckets.get(exponent, 0) + 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, fraction: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for exponent in sorted(self.buckets):
+            seen += self.buckets[exponent]
+            if seen >= rank:
+                return min(math.ldexp(1, exponent), self.maximum)
+        return self.maximum
+
+
+class _span:
+    __slots__ = ("_registry", "_name", "_args", "_start")
+
+    def __init__(self, registry: "metricsRegistry", name: str, args: dict):
+        self._registry = registry
+        self._name = name
+        self._args = args
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self._registry._endSpan(self._name, self._start, time.perf_counter_ns(),
+                                self._args)
+        return False
+
+
+class _nullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_noSpan = _nullSpan()
+
+
+class metricsRegistry:
+    """
+    Spans, counters and histograms by name. The latest maxEvents spans and
+    counter changes are kept for the trace export, the aggregates are kept
+    for the whole session.
+    """
+
+    maxEvents = 100000
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+        self._events = deque(maxlen=self.maxEvents)
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, histogram] = {}
+
+    def span(self, name: str, **args) -> Union[_span, _nullSpan]:
+        """Context manager timing the block it wraps."""
+        if not self.enabled:
+            return _noSpan
+        return _span(self, name, args)
+
+    def traced(self, name: str) -> Callable:
+        """Decorator timing every call of a function as a span."""
+
+        def decorator(function: Callable) -> Callable:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with _span(self, name, {}):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def count(self, name: str, value: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            total = self.counters[name] = self.counters.get(name, 0) + value
+            self._events.append(("C", name, time.perf_counter_ns(), total,
+                                 threading.get_ident()))
+
+    def observe(self, name: str, value: float) -> None:
+        """Add a value to the histogram of the name."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._histogram(name).add(value)
+
+    def _histogram(self, name: str) -> histogram:
+        result = self.histograms.get(name)
+        if result is None:
+            result = self.histograms[name] = histogram()
+        return result
+
+    def _endSpan(self, name: str, start: int, end: int, args: dict) -> None:
+        with self._lock:
+            self._histogram(name).add((end - start) / 1e6)
+            self._events.append(("X", name, start, (end - start, args),
+                                 threading.get_ident()))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._events.clear()
+            self.counters.clear()
+            self.histograms.clear()
+
+    def spans(self, name: Optional[str] = None) -> List[tuple]:
+        """(name, start ms, duration ms) of the kept spans, optionally of one name."""
+        with self._lock:
+            events = list(self._events)
+        return [(eventName, (start - self._origin) / 1e6, value[0] / 1e6)
+                for kind, eventName, start, value, _ in events
+                if kind == "X" and (name is None or eventName == name)]
+
+    def rows(self) -> List[dict]:
+        """Aggregate of every histogram and counter, durations in ms."""
+        with self._lock:
+            rows = [dict(kind="histogram", name=name, count=hist.count,
+                         total=hist.total, mean=hist.mean, min=hist.minimum,
+                         p50=hist.quantile(0.5), p90=hist.quantile(0.9),
+                         p99=hist.quantile(0.99), max=hist.maximum)
+                    for name, hist in sorted(self.histograms.items())]
+            rows.extend(dict(kind="counter", name=name, count=value, total=value)
+                        for name, value in sorted(self.counters.items()))
+        return rows
+
+    def report(self) -> str:
+        lines = [f"{'name':<32}{'count':>8}{'total':>12}{'mean':>10}"
+                 f"{'p90':>10}{'max':>10}"]
+        for row in self.rows():
+            if row["kind"] == "counter":
+                lines.append(f"{row['name']:<32}{row['count']:>8g}")
+            else:
+                lines.append(f"{row['name']:<32}{row['count']:>8}{row['total']:>12.3f}"
+                             f"{row['mean']:>10.3f}{row['p90']:>10.3f}{row['max']:>10.3f}")
+        return "\n".join(lines)
+
+    def chromeTrace(self) -> dict:
+        """Kept events in the Chrome trace event format, times in microseconds."""
+        with self._lock:
+            events = list(self._events)
+        pid = os.getpid()
+        traceEvents = []
+        for kind, name, start, value, tid in events:
+            event = {"name": name, "ph": kind, "ts": (start - self._origin) / 1e3,
+                     "pid": pid, "tid": tid}
+            if kind == "X":
+                event["dur"] = value[0] / 1e3
+                event["args"] = {key: str(arg) for key, arg in value[1].items()}
+            else:
+                event["args"] = {name: value}
+            traceEvents.append(event)
+        return {"traceEvents": traceEvents, "displayTimeUnit": "ms"}
+
+    def exportChromeTrace(self, path: Union[str, pathlib.Path]) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chromeTrace(), f)
+
+    def exportCsv(self, path: Union[str, pathlib.Path]) -> None:
+        fields = ["kind", "name", "count", "total", "mean", "min", "p50", "p90",
+                  "p99", "max"]
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(self.rows())
+
+
+registry = metricsRegistry(os.environ.get("REVEDA_METRICS", "") not in ("", "0"))
+
+span = registry.span
+traced = registry.traced
+count = registry.count
+observe = registry.observe
+report = registry.report
+exportChromeTrace = registry.exportChromeTrace
+exportCsv = registry.exportCsv
+
+
+def enable(value: bool = True) -> None:
+    registry.enabled = value
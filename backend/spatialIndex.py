@@ -0,0 +1,241 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+"""
+Qt-free spatial index over flattened layout geometry in database units.
+
+Shapes are kept per layer as integer bounding boxes and polygon points and are
+indexed with a sort-tile-recursive (STR) packed R-tree. The tree is bulk
+loaded with numpy and queried level by level, so a region query costs a few
+vectorised comparisons per tree level instead of a Python loop over items.
+"""
+
+import math
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+bboxType = Tuple[int, int, int, int]
+
+
+class strTree:
+    """
+    Static R-tree packed with the sort-tile-recursive algorithm. Each node
+    covers a contiguous run of nodeSize entries of the level below it.
+    """
+    nodeSize = 16
+
+    def __init__(self, bboxes: np.ndarray):
+        bboxes = np.asarray(bboxes, dtype=np.int64).reshape(-1, 4)
+        self._order = self._strOrder(bboxes)  # leaf position -> entry index
+        self._leafBoxes = bboxes[self._order]
+        # levels from the root down to the parents of the leaves, each a tuple
+        # of node boxes and the start and end of their children one level below
+        self._levels = []
+        level = self._leafBoxes
+        while len(level) > self.nodeSize:
+            starts = np.arange(0, len(level), self.nodeSize)
+            ends = np.minimum(starts + self.nodeSize, len(level))
+            parents = np.column_stack((
+                np.minimum.reduceat(level[:, 0], starts),
+                np.minimum.reduceat(level[:, 1], starts),
+                np.maximum.reduceat(level[:, 2], starts),
+                np.maximum.reduceat(level[:, 3], starts),
+            ))
+            order = self._strOrder(parents)
+            level = parents[order]
+            self._levels.append((level, starts[order], ends[order]))
+        self._levels.reverse()
+
+    def __len__(self):
+        return len(self._leafBoxes)
+
+    @classmethod
+    def _strOrder(cls, bboxes: np.ndarray) -> np.ndarray:
+        """Sort boxes into vertical slices by x centre and by y centre in each."""
+        count = len(bboxes)
+        if count == 0:
+            return np.zeros(0, dtype=np.int64)
+        centreX = bboxes[:, 0] + bboxes[:, 2]
+        centreY = bboxes[:, 1] + bboxes[:, 3]
+        sliceCount = math.ceil(math.sqrt(math.ceil(count / cls.nodeSize)))
+        xOrder = np.argsort(centreX, kind="stable")
+        slices = np.arange(count) // (sliceCount * cls.nodeSize)
+        return xOrder[np.lexsort((centreY[xOrder], slices))]
+
+    @staticmethod
+    def _children(nodes: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        starts = starts[nodes]
+        counts = ends[nodes] - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return offsets + np.arange(counts.sum())
+
+    def query(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """Indices of the entries whose boxes intersect or touch the region."""
+        if self._levels:
+            boxes = self._levels[0][0]
+            nodes = np.arange(len(boxes))
+            for boxes, starts, ends in self._levels:
+                nodeBoxes = boxes[nodes]
+                nodes = nodes[(nodeBoxes[:, 0] <= x1) & (nodeBoxes[:, 2] >= x0)
+                              & (nodeBoxes[:, 1] <= y1) & (nodeBoxes[:, 3] >= y0)]
+                nodes = self._children(nodes, starts, ends)
+        else:
+            nodes = np.arange(len(self._leafBoxes))
+        leafBoxes = self._leafBoxes[nodes]
+        hits = nodes[(leafBoxes[:, 0] <= x1) & (leafBoxes[:, 2] >= x0)
+                     & (leafBoxes[:, 1] <= y1) & (leafBoxes[:, 3] >= y0)]
+        return self._order[hits]
+
+
+class layerShapes:
+    """Shapes of one layer: boxes, polygon points and the caller's payloads."""
+
+    def __init__(self):
+        self.polygons: List[np.ndarray] = []
+        self.payloads: List[Any] = []
+        self._bboxes = np.zeros((0, 4), dtype=np.int64)
+        self._tree: Optional[strTree] = None
+
+    def __len__(self):
+        return len(self.payloads)
+
+    def add(self, points: np.ndarray, payload: Any) -> int:
+        self.polygons.append(np.asarray(points, dtype=np.int64).reshape(-1, 2))
+        self.payloads.append(payload)
+        self._tree = None
+        return len(self.payloads) - 1
+
+    @property
+    def bboxes(self) -> np.ndarray:
+        """Bounding boxes of the polygons, computed in bulk for new polygons."""
+        done = len(self._bboxes)
+        if done != len(self.polygons):
+            newPolygons = self.polygons[done:]
+            points = np.concatenate(newPolygons)
+            starts = np.cumsum([0] + [len(polygon) for polygon in newPolygons[:-1]])
+            newBoxes = np.column_stack((
+                np.minimum.reduceat(points[:, 0], starts),
+                np.minimum.reduceat(points[:, 1], starts),
+                np.maximum.reduceat(points[:, 0], starts),
+                np.maximum.reduceat(points[:, 1], starts),
+            ))
+            self._bboxes = np.concatenate((self._bboxes, newBoxes))
+        return self._bboxes
+
+    @property
+    def tree(self) -> strTree:
+        # rebuilt on the first query after shapes were added
+        if self._tree is None:
+            self._tree = strTree(self.bboxes)
+        return self._tree
+
+
+class layoutIndex:
+    """
+    Spatial index of layout shapes grouped by layer. Layers are any hashable
+    key, typically the index of the layer in the PDK layer list, and
+    coordinates are integers in database units.
+    """
+
+    def __init__(self):
+        self._layers: Dict[Hashable, layerShapes] = {}
+
+    def __len__(self):
+        return sum(len(shapes) for shapes in self._layers.values())
+
+    @property
+    def layers(self) -> List[Hashable]:
+        return list(self._layers)
+
+    def layer(self, layer: Hashable) -> layerShapes:
+        return self._layers.setdefault(layer, layerShapes())
+
+    def insert(self, layer: Hashable, points: np.ndarray, payload: Any = None) -> int:
+        """Add one polygon and return its index on the layer."""
+        return self.layer(layer).add(points, payload)
+
+    def bulkLoad(self, shapes: Iterable[Tuple[Hashable, np.ndarray, Any]]) -> None:
+        """Add (layer, points, payload) tuples and build the trees once."""
+        for layer, points, payload in shapes:
+            self.layer(layer).add(points, payload)
+        for shapes in self._layers.values():
+            shapes.tree
+
+    def _selectedLayers(self, layers: Optional[Iterable[Hashable]]) -> List[layerShapes]:
+        if layers is None:
+            return list(self._layers.items())
+        return [(layer, self._layers[layer]) for layer in layers if layer in self._layers]
+
+    def queryIndices(self, layer: Hashable, region: bboxType) -> np.ndarray:
+        """Indices of the shapes on a layer whose boxes touch the region."""
+        shapes = self._layers.get(layer)
+        if shapes is None or len(shapes) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return shapes.tree.query(*region)
+
+    def query(self, region: bboxType,
+              layers: Optional[Iterable[Hashable]] = None) -> List[Tuple[Hashable, Any]]:
+        """(layer, payload) of the shapes whose boxes touch the region."""
+        result = []
+        for layer, shapes in self._selectedLayers(layers):
+            if len(shapes):
+                result.extend((layer, shapes.payloads[index])
+                              for index in shapes.tree.query(*region))
+        return result
+
+    def nearestEdge(self, x: float, y: float, maxDistance: float,
+                    layers: Optional[Iterable[Hashable]] = None
+                    ) -> Optional[Tuple[float, Tuple[float, float], Hashable, Any]]:
+        """
+        Closest point on any shape edge within maxDistance of (x, y), returned
+        as (distance, point, layer, payload) or None if there is none.
+        """
+        region = (math.floor(x - maxDistance), math.floor(y - maxDistance),
+                  math.ceil(x + maxDistance), math.ceil(y + maxDistance))
+        best = None
+        for layer, shapes in self._selectedLayers(layers):
+            if not len(shapes):
+                continue
+            indices = shapes.tree.query(*region)
+            if len(indices) == 0:
+                continue
+            polygons = [shapes.polygons[index] for index in indices]
+            starts = np.concatenate(polygons).astype(np.float64)
+            ends = np.concatenate([np.roll(polygon, -1, axis=0) for polygon in polygons]
+                                  ).astype(np.float64)
+            owners = np.repeat(indices, [len(polygon) for polygon in polygons])
+            edges = ends - starts
+            lengths = (edges ** 2).sum(axis=1)
+            offsets = np.array([x, y]) - starts
+            ratios = np.clip((offsets * edges).sum(axis=1) / np.where(lengths > 0, lengths, 1),
+                             0, 1)
+            points = starts + edges * ratios[:, None]
+            distances = np.hypot(points[:, 0] - x, points[:, 1] - y)
+            closest = int(np.argmin(distances))
+            distance = float(distances[closest])
+            if distance <= maxDistance and (best is None or distance < best[0]):
+                best = (distance, (float(points[closest, 0]), float(points[closest, 1])), layer,
+                        shapes.payloads[owners[closest]])
+        return best
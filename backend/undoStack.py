@@ -23,70 +23,302 @@
 #
 
 
-from PySide6.QtCore import QPoint
+import sys
+import weakref
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from PySide6.QtCore import QPoint, Signal
 from PySide6.QtGui import QUndoCommand, QUndoStack
 from PySide6.QtWidgets import QGraphicsScene, QGraphicsItem
+import revedaEditor.backend.metrics as metrics
 import revedaEditor.common.shapes as shp
 import revedaEditor.common.layoutShapes as lshp
-from typing import List, Tuple, Sequence, Union
+
+# QUndoCommand ids, commands with the same id are merged by the undo stack
+moveByCommandId = 1
+moveShapesCommandId = 2
+moveShapeCommandId = 3
+stretchShapeCommandId = 4
+
+
+class itemStore:
+    """
+    Items referenced by compacted undo commands. Items in the scene are only
+    held weakly, items out of the scene are kept as their encoder output and
+    recreated when a command puts them back.
+    """
+
+    def __init__(self):
+        self._nextKey = 0
+        self._keys = weakref.WeakKeyDictionary()  # item -> key
+        self._items = weakref.WeakValueDictionary()  # key -> live item
+        self._records: Dict[int, str] = {}
+        # items that could not be encoded stay alive
+        self._pinned: Dict[int, QGraphicsItem] = {}
+
+    def assignKey(self, item: QGraphicsItem) -> int:
+        key = self._keys.get(item)
+        if key is None:
+            key = self._nextKey
+            self._nextKey += 1
+            self._keys[item] = key
+            self._items[key] = item
+        return key
+
+    def key(self, scene: QGraphicsScene, item: QGraphicsItem) -> int:
+        key = self.assignKey(item)
+        if item.scene() is None and key not in self._records:
+            self.release(scene, key, item)
+        return key
+
+    def item(self, scene: QGraphicsScene, key: int) -> Optional[QGraphicsItem]:
+        item = self._items.get(key, self._pinned.get(key))
+        if item is None:
+            # items removed from the scene outside the undo history are gone
+            if key not in self._records:
+                return None
+            item = scene.deserializeItem(self._records[key])
+            if item is None:
+                return None
+            self._keys[item] = key
+            self._items[key] = item
+        return item
+
+    def liveItem(self, key: int) -> Optional[QGraphicsItem]:
+        """The item of a key if it is still alive, without recreating it."""
+        return self._items.get(key, self._pinned.get(key))
+
+    def release(self, scene: QGraphicsScene, key: int, item: QGraphicsItem) -> None:
+        """Record an item before it leaves the scene."""
+        record = scene.serializeItem(item) if item.parentItem() is None else None
+        if record is None:
+            self._pinned[key] = item
+        else:
+            self._records[key] = record
+            self._pinned.pop(key, None)
+
+    def prune(self, keys: set) -> None:
+        """Forget the recorded items whose keys are not in keys."""
+        for key in set(self._records).union(self._pinned) - keys:
+            self._records.pop(key, None)
+            self._pinned.pop(key, None)
+
+    def memoryUse(self) -> int:
+        return (sum(sys.getsizeof(record) for record in self._records.values())
+                + len(self._pinned) * undoStack.liveItemBytes)
+
 
 class undoStack(QUndoStack):
+    # items touched by a pushed, undone or redone command
+    itemsChanged = Signal(list)
+    # commands this close to the top keep their live items
+    liveSteps = 10
+    # rough size of a live graphics item with its pens, brushes and wrapper
+    liveItemBytes = 2048
+
     def __init__(self):
         super().__init__()
+        self.memoryCap = 64 * 2 ** 20
+        self.itemStore = itemStore()
+        # editJournal of the scene, if any
+        self.journal = None
 
     def removeLastCommand(self):
-        # Remove the last command without undoing it
+        # Undo the last command, the callers drop a degenerate draft shape
+        # this way. The command stays redoable until the next push drops it
         if self.canUndo():
-            self.setIndex(self.index() - 1)
+            self.undo()
 
+    def push(self, command: QUndoCommand) -> None:
+        self._run("undo.push", command, lambda: super(undoStack, self).push(command))
+        self.compactHistory()
 
-class addShapeUndo(QUndoCommand):
-    def __init__(self, scene: QGraphicsScene, shape: QGraphicsItem):
+    def undo(self) -> None:
+        if self.canUndo():
+            self._run("undo.undo", self.command(self.index() - 1), super().undo)
+
+    def redo(self) -> None:
+        if self.canRedo():
+            self._run("undo.redo", self.command(self.index()), super().redo)
+
+    def _run(self, spanName: str, command: QUndoCommand, action) -> None:
+        """Run an action on a command, reporting the items it touched."""
+        items = self.commandItems(command)
+        # loaded items are the saved file, the loader resets the journal instead
+        journal = None if isinstance(command, loadShapesUndo) else self.journal
+        keys = journal.prepare(items) if journal else None
+        with metrics.span(spanName):
+            action()
+        if keys is not None:
+            journal.record(keys)
+        liveItems = (item if isinstance(item, QGraphicsItem) else self.itemStore.liveItem(item)
+                     for item in items)
+        self.itemsChanged.emit([item for item in liveItems if item is not None])
+
+    @staticmethod
+    def commandItems(command: QUndoCommand) -> list:
+        """Items, or itemStore keys of compacted commands, touched by a command."""
+        items = []
+        for subCommand in undoStack._commandTree(command):
+            if isinstance(subCommand, compactCommand):
+                if subCommand.compacted:
+                    items.extend(subCommand.keys())
+                else:
+                    for name in subCommand._itemLists():
+                        items.extend(getattr(subCommand, name))
+            elif isinstance(getattr(subCommand, "_item", None), QGraphicsItem):
+                items.append(subCommand._item)
+        return items
+
+    def setMemoryCap(self, capBytes: int) -> None:
+        self.memoryCap = capBytes
+        self.compactHistory()
+
+    @staticmethod
+    def _commandTree(command: QUndoCommand) -> List[QUndoCommand]:
+        commands = [command]
+        for index in range(command.childCount()):
+            commands.extend(undoStack._commandTree(command.child(index)))
+        return commands
+
+    def _commands(self, end: int) -> List[QUndoCommand]:
+        commands = []
+        for index in range(min(end, self.count())):
+            commands.extend(self._commandTree(self.command(index)))
+        return commands
+
+    def compactHistory(self) -> None:
+        """
+        Compact the commands past the live steps and, while the history is
+        over the memory cap, evict the oldest commands.
+        """
+        for command in self._commands(self.index() - self.liveSteps):
+            if isinstance(command, compactCommand) and not command.compacted:
+                command.compact(self.itemStore)
+        if self.memoryUse() <= self.memoryCap:
+            return
+        # undoing an evicted command does nothing, so always evict from the
+        # bottom of the stack
+        for command in self._commands(self.index()):
+            if isinstance(command, compactCommand) and not command.evicted:
+                command.evict(self.itemStore)
+                self._pruneStore()
+                if self.memoryUse() <= self.memoryCap:
+                    return
+
+    def _pruneStore(self) -> None:
+        keys = set()
+        for command in self._commands(self.count()):
+            if isinstance(command, compactCommand) and command.compacted:
+                keys.update(command.keys())
+        self.itemStore.prune(keys)
+
+    def memoryUse(self) -> int:
+        commands = self._commands(self.count())
+        return (sum(command.memoryUse() for command in commands
+                    if isinstance(command, compactCommand))
+                + self.itemStore.memoryUse())
+
+    def memoryReport(self) -> List[str]:
+        commands = [command for command in self._commands(self.count())
+                    if isinstance(command, compactCommand)]
+        compacted = sum(command.compacted and not command.evicted for command in commands)
+        evicted = sum(command.evicted for command in commands)
+        return [
+            f"Undo history: {self.count()} commands, {len(commands) - compacted - evicted} "
+            f"live, {compacted} compacted, {evicted} evicted",
+            f"Undo memory: {self.memoryUse() / 2 ** 20:.2f} MiB of "
+            f"{self.memoryCap / 2 ** 20:.2f} MiB",
+        ]
+
+
+class compactCommand(QUndoCommand):
+    """
+    Base of the undo commands that refer to items. Once compacted, the command
+    refers to its items by itemStore keys instead of keeping them alive. An
+    evicted command drops its items and does nothing.
+    """
+
+    def __init__(self):
         super().__init__()
-        self._scene = scene
-        self._shape = shape
-        self.setText("Draw Shape")
+        self.compacted = False
+        self.evicted = False
+        self._store: Optional[itemStore] = None
+
+    def _itemLists(self) -> List[str]:
+        """Names of the attributes that hold item lists."""
+        return []
+
+    def compact(self, store: itemStore) -> None:
+        for name in self._itemLists():
+            setattr(self, name, [store.key(self._scene, item) for item in getattr(self, name)])
+        self._store = store
+        self.compacted = True
+
+    def evict(self, store: itemStore) -> None:
+        if not self.compacted:
+            self.compact(store)
+        for name in self._itemLists():
+            setattr(self, name, [])
+        self.evicted = True
+
+    def keys(self) -> List[int]:
+        return [key for name in self._itemLists() for key in getattr(self, name)]
+
+    def memoryUse(self) -> int:
+        if self.compacted:
+            return sum(8 * len(getattr(self, name)) for name in self._itemLists())
+        return sum(undoStack.liveItemBytes * len(getattr(self, name))
+                   for name in self._itemLists())
+
+    def _items(self, name: str) -> List[QGraphicsItem]:
+        items = getattr(self, name)
+        if not self.compacted:
+            return items
+        items = (self._store.item(self._scene, key) for key in items)
+        return [item for item in items if item is not None]
+
+    def _addItems(self, name: str) -> None:
+        for item in self._items(name):
+            self._scene.addItem(item)
 
-    def undo(self):
-        self._scene.removeItem(self._shape)
+    def _removeItems(self, name: str) -> None:
+        for item in self._items(name):
+            if self.compacted:
+                self._store.release(self._scene, self._store.key(self._scene, item), item)
+            self._scene.removeItem(item)
 
-    def redo(self):
-        self._scene.addItem(self._shape)
 
-class addDeleteShapesUndo(QUndoCommand):
+class addDeleteShapesUndo(compactCommand):
     def __init__(self, scene: QGraphicsScene, newShapes: List[QGraphicsItem], oldShapes: List[QGraphicsItem]):
         super().__init__()
         self._scene = scene
-        self._newShapes = newShapes
-        self._oldShapes = oldShapes
+        self._newShapes = list(newShapes)
+        self._oldShapes = list(oldShapes)
         self.setText("Add/Delete Shapes")
 
+    def _itemLists(self) -> List[str]:
+        return ["_newShapes", "_oldShapes"]
+
     def undo(self):
-        for item in self._newShapes:
-            self._scene.removeItem(item)
-        for item in self._oldShapes:
-            self._scene.addItem(item)
+        self._removeItems("_newShapes")
+        self._addItems("_oldShapes")
 
     def redo(self):
-        for item in self._newShapes:
-            self._scene.addItem(item)
-        for item in self._oldShapes:
-            self._scene.removeItem(item)
+        self._addItems("_newShapes")
+        self._removeItems("_oldShapes")
 
-class addShapesUndo(QUndoCommand):
-    def __init__(self, scene: QGraphicsScene, shapes: List[QGraphicsItem]):
-        super().__init__()
-        self._scene = scene
-        self._shapes = shapes
-        self.setText("Add Shapes")
 
-    def undo(self):
-        for item in self._shapes:
-            self._scene.removeItem(item)
+class addShapeUndo(addDeleteShapesUndo):
+    def __init__(self, scene: QGraphicsScene, shape: QGraphicsItem):
+        super().__init__(scene, [shape], [])
+        self.setText("Draw Shape")
 
-    def redo(self):
-        for item in self._shapes:
-            self._scene.addItem(item)
+
+class addShapesUndo(addDeleteShapesUndo):
+    def __init__(self, scene: QGraphicsScene, shapes: List[QGraphicsItem]):
+        super().__init__(scene, shapes, [])
+        self.setText("Add Shapes")
 
 
 class loadShapesUndo(addShapesUndo):
@@ -100,67 +332,38 @@ class loadShapesUndo(addShapesUndo):
     def undo(self):
         pass
 
+    def redo(self):
+        # the loaded items belong to the scene, keeping them here would only
+        # pin every item of the design a second time
+        super().redo()
+        self._newShapes = []
+
 
-class deleteShapeUndo(QUndoCommand):
+class deleteShapeUndo(addDeleteShapesUndo):
     def __init__(self, scene: QGraphicsScene, shape: QGraphicsItem):
-        super().__init__()
-        self._scene = scene
-        self._shape = shape
+        super().__init__(scene, [], [shape])
         self.setText("Delete Shape")
 
-    def undo(self):
-        self._scene.addItem(self._shape)
-
-    def redo(self):
-        self._scene.removeItem(self._shape)
 
-class deleteShapesUndo(QUndoCommand):
+class deleteShapesUndo(addDeleteShapesUndo):
     def __init__(self, scene: QGraphicsScene, shapes: list[QGraphicsItem]):
-        super().__init__()
-        self._scene = scene
-        self._shapes = shapes
+        super().__init__(scene, [], shapes)
         self.setText("Delete Shapes")
 
-    def undo(self):
-        [self._scene.addItem(item) for item in self._shapes]
-
-    def redo(self):
-        [self._scene.removeItem(item) for item in self._shapes]
 
-class addDeleteShapeUndo(QUndoCommand):
+class addDeleteShapeUndo(addDeleteShapesUndo):
     def __init__(
         self, scene: QGraphicsScene, addShape: QGraphicsItem, deleteShape: QGraphicsItem
     ):
-        super().__init__()
-        self._scene = scene
-        self._addshape = addShape
-        self._deleteShape = deleteShape
+        super().__init__(scene, [addShape], [deleteShape])
         self.setText("Add/Delete Shape")
 
-    def undo(self):
-        self._scene.removeItem(self._addshape)
-        self._scene.addItem(self._deleteShape)
-
-    def redo(self):
-        self._scene.addItem(self._addshape)
-        self._scene.removeItem(self._deleteShape)
 
-class addDeleteNetUndo(QUndoCommand):
+class addDeleteNetUndo(addDeleteShapesUndo):
     def __init__(self, scene: QGraphicsScene, addNet: QGraphicsItem, deleteNet: QGraphicsItem):
-        super().__init__()
-        self._scene = scene
-        self._addNet = addNet
-        self._deleteNet = deleteNet
+        super().__init__(scene, [addNet], [deleteNet])
         self.setText("Add/Delete Net")
 
-    def undo(self):
-        self._scene.removeItem(self._addNet)
-        self._scene.addItem(self._deleteNet)
-
-    def redo(self):
-        self._scene.addItem(self._addNet)
-        self._scene.removeItem(self._deleteNet)
-
 class updateSymUndo(QUndoCommand):
     def __init__(self, item: QGraphicsItem, oldItemList: list, newItemList: list):
         super().__init__()
@@ -185,6 +388,7 @@ class moveShapeUndo(QUndoCommand):
         oldPosition: QPoint,
         newPosition: QPoint,
     ):
+        super().__init__()
         self._scene = scene
         self._item = item
         self._attribute = attribute
@@ -192,6 +396,15 @@ class moveShapeUndo(QUndoCommand):
         self._newPosition = newPosition
         self.setText('move shape undo')
 
+    def id(self) -> int:
+        return moveShapeCommandId
+
+    def mergeWith(self, other: QUndoCommand) -> bool:
+        if other._item is not self._item or other._attribute != self._attribute:
+            return False
+        self._newPosition = other._newPosition
+        return True
+
     def undo(self):
         setattr(self._item, self._attribute, self._oldPosition)
 
@@ -199,64 +412,139 @@ class moveShapeUndo(QUndoCommand):
         setattr(self._item, self._attribute, self._newPosition)
 
 
-class undoRotateShape(QUndoCommand):
+class undoRotateShape(compactCommand):
     def __init__(self, scene: QGraphicsScene, shape: Union[shp.symbolShape, lshp.layoutShape],
                  point:QPoint,
                  angle:int):
         super().__init__()
         self._scene = scene
-        self._shape = shape
+        self._shapes = [shape]
         self._point = point
         self._angle = angle
         self.setText("Undo Shape rotation")
 
+    def _itemLists(self) -> List[str]:
+        return ["_shapes"]
+
     def undo(self) -> None:
         # self._shape.setRotation(self._angle - 90)
-        rotationOriginPoint = self._shape.mapFromScene(self._point)
-        self._shape.setTransformOriginPoint(rotationOriginPoint)
-        self._shape.angle -= self._angle
+        for shape in self._items("_shapes"):
+            rotationOriginPoint = shape.mapFromScene(self._point)
+            shape.setTransformOriginPoint(rotationOriginPoint)
+            shape.angle -= self._angle
 
     def redo(self) -> None:
-        rotationOriginPoint = self._shape.mapFromScene(self._point)
-        self._shape.setTransformOriginPoint(rotationOriginPoint)
-        self._shape.angle += self._angle
+        for shape in self._items("_shapes"):
+            rotationOriginPoint = shape.mapFromScene(self._point)
+            shape.setTransformOriginPoint(rotationOriginPoint)
+            shape.angle += self._angle
 
-class undoMoveShapesCommand(QUndoCommand):
+class undoMoveShapesCommand(compactCommand):
     def __init__(self, shapes: Sequence[QGraphicsItem],
                  startPos: QPoint, endPos: QPoint):
         super().__init__()
-        self._shapes = shapes
+        self._scene = shapes[0].scene() if shapes else None
+        self._shapes = list(shapes)
         self._startPos = startPos
         self._endPos = endPos
         self.setText('undo move shapes')
 
+    def _itemLists(self) -> List[str]:
+        return ["_shapes"]
+
+    def id(self) -> int:
+        return moveShapesCommandId
+
+    def mergeWith(self, other: QUndoCommand) -> bool:
+        # consecutive moves of the same shapes keep the first start position
+        if (self.compacted or other.compacted or
+                not _sameItems(self._shapes, other._shapes)):
+            return False
+        self._endPos = other._endPos
+        return True
+
     def undo(self) -> None:
+        if self.compacted:
+            # recreated items do not keep their positions, move them instead
+            delta = self._startPos - self._endPos
+            for shape in self._items("_shapes"):
+                shape.moveBy(delta.x(), delta.y())
+            return
         for shape in self._shapes:
             shape.setPos(self._startPos + shape.offset)
 
 
     def redo(self) -> None:
+        if self.compacted:
+            delta = self._endPos - self._startPos
+            for shape in self._items("_shapes"):
+                shape.moveBy(delta.x(), delta.y())
+            return
         for shape in self._shapes:
             shape.setPos(self._endPos + shape.offset)
 
 
-class undoMoveByCommand(QUndoCommand):
+class undoMoveByCommand(compactCommand):
+    """
+    Moves items by a fixed offset. Consecutive moves of the same items merge
+    into one command.
+    """
+
     def __init__(self, scene, items: List, dx: float, dy: float, description: str = "Move Items"):
-        super().__init__(description)
-        self.scene = scene
-        self.items = items
+        super().__init__()
+        self._scene = scene
+        self.items = list(items)
         self.dx = dx
         self.dy = dy
-        self.oldPositions: List[Tuple[QPoint, QPoint]] = []
-        self.setText('undo move by command')
+        self.setText(description)
+
+    def _itemLists(self) -> List[str]:
+        return ["items"]
+
+    def id(self) -> int:
+        return moveByCommandId
+
+    def mergeWith(self, other: QUndoCommand) -> bool:
+        if (self.compacted or other.compacted or
+                not _sameItems(self.items, other.items)):
+            return False
+        self.dx += other.dx
+        self.dy += other.dy
+        # a sequence of moves returning to the start is dropped from the stack
+        self.setObsolete(self.dx == 0 and self.dy == 0)
+        return True
 
     def redo(self):
-        for item in self.items:
-            oldPos = item.pos()
-            newPos = oldPos + QPoint(self.dx, self.dy)
-            self.oldPositions.append((item, oldPos))
-            item.setPos(newPos)
+        for item in self._items("items"):
+            item.moveBy(self.dx, self.dy)
 
     def undo(self):
-        for item, oldPos in self.oldPositions:
-            item.setPos(oldPos)
\ No newline at end of file
+        for item in self._items("items"):
+            item.moveBy(-self.dx, -self.dy)
+
+
+class stretchShapeUndo(addDeleteShapesUndo):
+    """
+    Replaces a shape with its stretched copy. A stretch that continues from
+    the shape the previous stretch created merges into that command, so a
+    sequence of stretches is undone in one step.
+    """
+
+    def __init__(self, scene: QGraphicsScene, newShape: QGraphicsItem, oldShape: QGraphicsItem):
+        super().__init__(scene, [newShape], [oldShape])
+        self.setText("Stretch Shape")
+
+    def id(self) -> int:
+        return stretchShapeCommandId
+
+    def mergeWith(self, other: QUndoCommand) -> bool:
+        if (self.compacted or other.compacted or
+                not _sameItems(self._newShapes, other._oldShapes)):
+            return False
+        self._newShapes = other._newShapes
+        return True
+
+
+def _sameItems(items: Sequence[QGraphicsItem], others: Sequence[QGraphicsItem]) -> bool:
+    return (len(items) == len(others) and
+            {id(item) for item in items} == {id(item) for item in others})
@@ -0,0 +1,232 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+"""
+Connectivity extraction on flattened layout geometry.
+
+Shapes of layers with the same name that touch or overlap are one conductor
+and via cuts join the conductors given by the via connections of the PDK.
+Connected shapes are grouped into nets with a vectorised union-find, pin and
+label names are attached to the nets, and the nets can be compared with the
+pin to net maps of a schematic.
+"""
+
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+import revedaEditor.backend.spatialIndex as sidx
+import revedaEditor.checks.layout as lchk
+
+terminalType = Tuple[str, str]  # (instance name, pin name), "" for top level pins
+
+
+class unionFind:
+    """Disjoint sets of integers, unioned and searched in bulk."""
+
+    def __init__(self, size: int):
+        self.parents = np.arange(size)
+
+    def _compress(self) -> None:
+        while True:
+            grandParents = self.parents[self.parents]
+            if np.array_equal(grandParents, self.parents):
+                return
+            self.parents = grandParents
+
+    def find(self, nodes: np.ndarray) -> np.ndarray:
+        roots = self.parents[nodes]
+        while True:
+            nextRoots = self.parents[roots]
+            if np.array_equal(nextRoots, roots):
+                return roots
+            roots = nextRoots
+
+    def union(self, nodesA: np.ndarray, nodesB: np.ndarray) -> None:
+        nodesA, nodesB = np.asarray(nodesA), np.asarray(nodesB)
+        while len(nodesA):
+            rootsA, rootsB = self.find(nodesA), self.find(nodesB)
+            differ = rootsA != rootsB
+            nodesA, nodesB = nodesA[differ], nodesB[differ]
+            rootsA, rootsB = rootsA[differ], rootsB[differ]
+            # hook the larger root under the smallest root it meets, the
+            # remaining pairs are joined in the next round
+            np.minimum.at(self.parents, np.maximum(rootsA, rootsB),
+                          np.minimum(rootsA, rootsB))
+            self._compress()
+
+    def components(self) -> np.ndarray:
+        """Component number of each node, numbered from zero."""
+        self._compress()
+        return np.unique(self.parents, return_inverse=True)[1]
+
+
+class layoutNets:
+    """Net number of every shape in a layoutIndex and the names of the nets."""
+
+    def __init__(self, index: sidx.layoutIndex, offsets: Dict[Hashable, int],
+                 shapeNets: np.ndarray):
+        self.index = index
+        self.offsets = offsets
+        self.shapeNets = shapeNets
+        self.names: Dict[int, Set[str]] = {}
+        self.terminals: Dict[terminalType, int] = {}
+        self._rectMasks: Dict[Hashable, np.ndarray] = {}
+
+    def __len__(self):
+        return int(self.shapeNets.max()) + 1 if len(self.shapeNets) else 0
+
+    def shapeNet(self, layer: Hashable, shapeIndex: int) -> int:
+        return int(self.shapeNets[self.offsets[layer] + shapeIndex])
+
+    def netAt(self, layers: Iterable[Hashable], x: int, y: int) -> Optional[int]:
+        """Net of a shape on one of the layers under the point."""
+        for layer in layers:
+            shapes = self.index.layer(layer)
+            if layer not in self._rectMasks:
+                self._rectMasks[layer] = lchk.rectMask(shapes)
+            for shapeIndex in self.index.queryIndices(layer, (x, y, x, y)):
+                # the box of a rectangle is the rectangle
+                if (self._rectMasks[layer][shapeIndex]
+                        or lchk.insidePolygon(np.array((x, y)), shapes.polygons[shapeIndex])):
+                    return self.shapeNet(layer, int(shapeIndex))
+        return None
+
+    def netShapes(self, net: int) -> List[Tuple[Hashable, int]]:
+        """(layer, shape index) of the shapes of a net."""
+        shapes = []
+        for layer, offset in self.offsets.items():
+            count = len(self.index.layer(layer))
+            shapeIndices = np.nonzero(self.shapeNets[offset:offset + count] == net)[0]
+            shapes.extend((layer, int(shapeIndex)) for shapeIndex in shapeIndices)
+        return shapes
+
+    def attachName(self, net: int, name: str) -> None:
+        self.names.setdefault(net, set()).add(name)
+
+    def netName(self, net: int) -> str:
+        names = self.names.get(net)
+        return ",".join(sorted(names)) if names else f"net{net}"
+
+
+def touchingPairs(shapesA: sidx.layerShapes, shapesB: sidx.layerShapes
+                  ) -> Tuple[np.ndarray, np.ndarray]:
+    """Index pairs of shapes of A and B that touch or overlap."""
+    pairsA, pairsB = lchk.candidatePairs(shapesA.bboxes, shapesB.bboxes, 0)
+    if not len(pairsA):
+        return pairsA, pairsB
+    pairs = np.unique(np.column_stack((pairsA, pairsB)), axis=0)
+    pairsA, pairsB = pairs[:, 0], pairs[:, 1]
+    # touching boxes are touching shapes only for rectangles
+    exact = lchk.rectMask(shapesA)[pairsA] & lchk.rectMask(shapesB)[pairsB]
+    for position in np.nonzero(~exact)[0]:
+        exact[position] = lchk.polygonDistance(shapesA.polygons[pairsA[position]],
+                                               shapesB.polygons[pairsB[position]]) == 0
+    return pairsA[exact], pairsB[exact]
+
+
+def extractNets(index: sidx.layoutIndex, groupOf: Dict[Hashable, Hashable],
+                viaConnections: Iterable[Tuple[Hashable, Hashable]]) -> layoutNets:
+    """
+    Group the shapes of the index into nets. Layers with the same entry in
+    groupOf are one conductor, and each (cut layer, layer) of viaConnections
+    joins the cuts to the shapes they touch on the other layer.
+    """
+    layers = index.layers
+    offsets, total = {}, 0
+    for layer in layers:
+        offsets[layer] = total
+        total += len(index.layer(layer))
+    sets = unionFind(total)
+
+    def join(layerA, layerB):
+        pairsA, pairsB = touchingPairs(index.layer(layerA), index.layer(layerB))
+        sets.union(pairsA + offsets[layerA], pairsB + offsets[layerB])
+
+    for position, layerA in enumerate(layers):
+        for layerB in layers[position:]:
+            if groupOf.get(layerA, layerA) == groupOf.get(layerB, layerB):
+                join(layerA, layerB)
+    for cutLayer, layer in viaConnections:
+        if cutLayer in offsets and layer in offsets and cutLayer != layer:
+            join(cutLayer, layer)
+    return layoutNets(index, offsets, sets.components())
+
+
+def groupLayers(groupOf: Dict[Hashable, Hashable], layer: Hashable) -> List[Hashable]:
+    """Layers of the conductor the layer belongs to."""
+    group = groupOf.get(layer, layer)
+    return [other for other, otherGroup in groupOf.items() if otherGroup == group]
+
+
+def pdkConnectivity(fabproc, layers: list, layerIndex: Dict[int, int]
+                    ) -> Tuple[Dict[int, str], List[Tuple[int, int]]]:
+    """
+    Conductor groups of the PDK layers by name and the (cut, layer) pairs of
+    the optional viaConnections list of the PDK process module.
+    """
+    groupOf = {index: layer.name for index, layer in enumerate(layers)}
+    viaConnections = []
+    for connection in getattr(fabproc, "viaConnections", []):
+        cut = layerIndex.get(id(connection.cut))
+        if cut is None:
+            continue
+        for index, layer in enumerate(layers):
+            if layer.name in (connection.lower.name, connection.upper.name):
+                viaConnections.append((cut, index))
+    return groupOf, viaConnections
+
+
+def lvsReport(schematicNets: Dict[terminalType, str], nets: layoutNets) -> List[str]:
+    """
+    Compare the terminals of the schematic nets with the extracted nets.
+    Reports terminals missing on either side, schematic nets split over
+    several layout nets (opens) and layout nets joining several schematic
+    nets (shorts).
+    """
+    report = []
+    for terminal in sorted(set(schematicNets) - set(nets.terminals)):
+        report.append(f"missing in layout: {_terminalName(terminal)}")
+    for terminal in sorted(set(nets.terminals) - set(schematicNets)):
+        report.append(f"missing in schematic: {_terminalName(terminal)}")
+    common = set(schematicNets) & set(nets.terminals)
+    layoutOf: Dict[str, Set[int]] = {}
+    schematicOf: Dict[int, Set[str]] = {}
+    for terminal in common:
+        layoutOf.setdefault(schematicNets[terminal], set()).add(nets.terminals[terminal])
+        schematicOf.setdefault(nets.terminals[terminal], set()).add(schematicNets[terminal])
+    for netName, layoutNetSet in sorted(layoutOf.items()):
+        if len(layoutNetSet) > 1:
+            splitNames = ", ".join(sorted(nets.netName(net) for net in layoutNetSet))
+            report.append(f"open: {netName} is split into {splitNames}")
+    for net, schematicNetSet in sorted(schematicOf.items()):
+        if len(schematicNetSet) > 1:
+            report.append(f"short: {nets.netName(net)} joins "
+                          f"{', '.join(sorted(schematicNetSet))}")
+    return report
+
+
+def _terminalName(terminal: terminalType) -> str:
+    instanceName, pinName = terminal
+    return f"{instanceName}.{pinName}" if instanceName else pinName
@@ -0,0 +1,218 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+"""
+Layer density over windows of flattened layout geometry.
+
+The layout is rasterised one row of step sized tiles at a time, so memory is
+bounded by the width of the layout rather than its shape count. Rectangles
+add their exact covered fraction to each pixel and other polygons are
+sampled at pixel centres. A pixel counts at most once however many shapes
+cover it, and the tile areas are summed into windows that slide by one
+step.
+"""
+
+from collections import deque
+from typing import Dict, Hashable, List, NamedTuple, Tuple
+
+import numpy as np
+
+import revedaEditor.backend.spatialIndex as sidx
+import revedaEditor.checks.layout as lchk
+
+bboxType = Tuple[int, int, int, int]
+
+
+class densityRule(NamedTuple):
+    layer: Hashable
+    window: int
+    step: int
+    minDensity: float
+    maxDensity: float
+
+
+class densityMap(NamedTuple):
+    layer: Hashable
+    origin: Tuple[int, int]  # corner of the first window
+    window: int
+    step: int
+    densities: np.ndarray  # rows x columns of windows, row i starts at i * step
+
+    def windowBBox(self, row: int, column: int) -> bboxType:
+        left = int(self.origin[0] + column * self.step)
+        top = int(self.origin[1] + row * self.step)
+        return left, top, left + self.window, top + self.window
+
+
+def _pixelSpans(low: np.ndarray, high: np.ndarray, size: int) -> np.ndarray:
+    """
+    Split the intervals low to high, in pixel units, into the partly covered
+    first pixel, the fully covered middle pixels and the partly covered last
+    pixel: (start, end, coverage) of each, shape (intervals, 3, 3).
+    """
+    low, high = np.clip(low, 0, size), np.clip(high, 0, size)
+    first = np.floor(low)
+    last = np.maximum(first, np.ceil(high) - 1)
+    single = first == last
+    spans = np.zeros((len(low), 3, 3))
+    spans[:, 0] = np.column_stack((first, first + 1,
+                                   np.where(single, high - low, first + 1 - low)))
+    spans[:, 1] = np.column_stack((first + 1, np.maximum(first + 1, last), np.ones(len(low))))
+    spans[:, 2] = np.column_stack((last, last + 1, np.where(single, 0, high - last)))
+    return spans
+
+
+def _rasterStrip(shapes: sidx.layerShapes, shapeIndices: np.ndarray,
+                 left: int, top: int, pixel: float, size: Tuple[int, int]) -> np.ndarray:
+    """
+    Covered fraction of each pixel of a strip. Rectangles are rasterised
+    exactly, other polygons are sampled at pixel centres.
+    """
+    rows, columns = size
+    coverage = np.zeros((rows + 1, columns + 1))
+    if not len(shapeIndices):
+        return coverage[:rows, :columns]
+    bboxes = shapes.bboxes[shapeIndices]
+    isRect = lchk.rectMask(shapes, shapeIndices)
+    # each rectangle is nine blocks of constant coverage, added to a
+    # difference array at their corners
+    xSpans = _pixelSpans((bboxes[isRect, 0] - left) / pixel, (bboxes[isRect, 2] - left) / pixel,
+                         columns)
+    ySpans = _pixelSpans((bboxes[isRect, 1] - top) / pixel, (bboxes[isRect, 3] - top) / pixel,
+                         rows)
+    x0, x1 = np.minimum(xSpans[:, None, :, :2], columns).transpose(3, 0, 1, 2)
+    y0, y1 = np.minimum(ySpans[:, :, None, :2], rows).transpose(3, 0, 1, 2)
+    weights = ySpans[:, :, None, 2] * xSpans[:, None, :, 2]
+    weights = np.where((x1 > x0) & (y1 > y0), weights, 0)
+    for rowIndex, columnIndex, sign in ((y0, x0, 1), (y0, x1, -1), (y1, x0, -1), (y1, x1, 1)):
+        np.add.at(coverage, (np.broadcast_to(rowIndex, weights.shape).astype(np.int64).ravel(),
+                             np.broadcast_to(columnIndex, weights.shape).astype(np.int64).ravel()),
+                  (sign * weights).ravel())
+    coverage = coverage.cumsum(axis=0).cumsum(axis=1)[:rows, :columns]
+    polygonIndices = shapeIndices[~isRect]
+    for shapeIndex, bbox in zip(polygonIndices, bboxes[~isRect]):
+        column0, column1 = (np.clip(np.ceil((bbox[[0, 2]] - left) / pixel - 0.5), 0, columns)
+                            .astype(np.int64))
+        row0, row1 = (np.clip(np.ceil((bbox[[1, 3]] - top) / pixel - 0.5), 0, rows)
+                      .astype(np.int64))
+        if row0 >= row1 or column0 >= column1:
+            continue
+        xs = left + (np.arange(column0, column1) + 0.5) * pixel
+        ys = top + (np.arange(row0, row1) + 0.5) * pixel
+        coverage[row0:row1, column0:column1] += _insideMask(xs, ys, shapes.polygons[shapeIndex])
+    # overlapping shapes count once
+    return np.minimum(coverage, 1)
+
+
+def _insideMask(xs: np.ndarray, ys: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Even-odd inside test of the grid points xs x ys, shape (len(ys), len(xs))."""
+    inside = np.zeros((len(ys), len(xs)), dtype=bool)
+    starts = polygon.astype(np.float64)
+    ends = np.roll(starts, -1, axis=0)
+    for (x0, y0), (x1, y1) in zip(starts, ends):
+        if y0 == y1:
+            continue
+        crossing = (y0 > ys) != (y1 > ys)
+        xCross = x0 + (ys - y0) * (x1 - x0) / (y1 - y0)
+        inside ^= crossing[:, None] & (xs[None, :] < xCross[:, None])
+    return inside
+
+
+def layerDensity(shapes: sidx.layerShapes, layer: Hashable, region: bboxType, window: int,
+                 step: int = 0, pixelsPerStep: int = 32) -> densityMap:
+    """
+    Density of the shapes of a layer in the windows covering region. The
+    window must be a multiple of the step, which defaults to the window.
+    """
+    step = step or window
+    stepsPerWindow = max(1, round(window / step))
+    window = stepsPerWindow * step
+    pixel = step / pixelsPerStep
+    left, top, right, bottom = region
+    tileColumns = max(stepsPerWindow, -(-(right - left) // step))
+    tileRows = max(stepsPerWindow, -(-(bottom - top) // step))
+    windowColumns = tileColumns - stepsPerWindow + 1
+    recentRows = deque(maxlen=stepsPerWindow)
+    windowRows = []
+    for tileRow in range(tileRows):
+        stripTop = top + tileRow * step
+        if len(shapes):
+            shapeIndices = shapes.tree.query(left, stripTop, left + tileColumns * step,
+                                             stripTop + step)
+        else:
+            shapeIndices = np.zeros(0, dtype=np.int64)
+        coverage = _rasterStrip(shapes, shapeIndices, left, stripTop, pixel,
+                                (pixelsPerStep, tileColumns * pixelsPerStep))
+        tileAreas = coverage.reshape(pixelsPerStep, tileColumns, pixelsPerStep).sum(
+            axis=(0, 2)) * pixel * pixel
+        recentRows.append(tileAreas)
+        if len(recentRows) == stepsPerWindow:
+            rowAreas = np.concatenate(([0.0], np.sum(recentRows, axis=0).cumsum()))
+            windowRows.append(rowAreas[stepsPerWindow:] - rowAreas[:windowColumns])
+    densities = np.array(windowRows) / float(window * window)
+    return densityMap(layer, (left, top), window, step, densities)
+
+
+def checkDensity(layerMap: densityMap, rule: densityRule) -> List[lchk.drcMarker]:
+    low = layerMap.densities < rule.minDensity
+    high = layerMap.densities > rule.maxDensity
+    return [lchk.drcMarker("density", rule.layer, layerMap.windowBBox(row, column),
+                           float(layerMap.densities[row, column]))
+            for row, column in zip(*np.nonzero(low | high))]
+
+
+def indexExtent(index: sidx.layoutIndex) -> bboxType:
+    """Bounding box of all the shapes of the index."""
+    boxes = [index.layer(layer).bboxes for layer in index.layers
+             if len(index.layer(layer))]
+    if not boxes:
+        return 0, 0, 0, 0
+    boxes = np.concatenate(boxes)
+    return (int(boxes[:, 0].min()), int(boxes[:, 1].min()), int(boxes[:, 2].max()),
+            int(boxes[:, 3].max()))
+
+
+def runDensityChecks(index: sidx.layoutIndex, rules: List[densityRule]
+                     ) -> Tuple[Dict[Hashable, densityMap], List[lchk.drcMarker]]:
+    """Density maps of the rule layers over the extent of the layout and their violations."""
+    region = indexExtent(index)
+    maps, markers = {}, []
+    for rule in rules:
+        layerMap = layerDensity(index.layer(rule.layer), rule.layer, region, rule.window,
+                                rule.step)
+        maps[rule.layer] = layerMap
+        markers.extend(checkDensity(layerMap, rule))
+    return maps, markers
+
+
+def pdkDensityRules(fabproc, layerIndex: Dict[int, int]) -> List[densityRule]:
+    """Density rules in database units from the optional densityRules of the PDK."""
+    dbu = fabproc.dbu
+    rules = []
+    for rule in getattr(fabproc, "densityRules", []):
+        layer = layerIndex.get(id(rule.layer))
+        if layer is not None:
+            rules.append(densityRule(layer, round(rule.window * dbu), round(rule.step * dbu),
+                                     rule.minDensity, rule.maxDensity))
+    return rules
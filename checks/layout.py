@@ -0,0 +1,374 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+"""
+Design rule checks on flattened layout geometry.
+
+The checks work on the per layer polygons of a layoutIndex in database units
+and only need numpy, so they run headless. Axis aligned rectangles, which make
+up most of a layout, are checked with vectorised box arithmetic. Other
+polygons are checked edge by edge.
+
+Shapes are not merged before checking: width is checked per shape, shapes
+that touch or overlap are taken to be connected and are not spacing checked,
+and an enclosure must be provided by a single outer shape.
+"""
+
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import revedaEditor.backend.spatialIndex as sidx
+
+
+class drcMarker(NamedTuple):
+    rule: str
+    layer: Hashable
+    bbox: Tuple[int, int, int, int]
+    value: float  # measured width, spacing or size, required enclosure
+
+
+class widthRule(NamedTuple):
+    layer: Hashable
+    minWidth: int
+
+
+class spacingRule(NamedTuple):
+    layer: Hashable
+    minSpacing: int
+
+
+class enclosureRule(NamedTuple):
+    inner: Hashable
+    outer: Hashable
+    enclosure: int
+
+
+class viaSizeRule(NamedTuple):
+    layer: Hashable
+    name: str
+    minWidth: int
+    maxWidth: int
+    minHeight: int
+    maxHeight: int
+
+
+def rectMask(shapes: sidx.layerShapes, shapeIndices: Optional[np.ndarray] = None
+             ) -> np.ndarray:
+    """True for the polygons, or the given ones, that are axis aligned rectangles."""
+    polygons = (shapes.polygons if shapeIndices is None else
+                [shapes.polygons[shapeIndex] for shapeIndex in shapeIndices])
+    mask = np.zeros(len(polygons), dtype=bool)
+    quads = np.array([len(polygon) == 4 for polygon in polygons], dtype=bool)
+    if not quads.any():
+        return mask
+    points = np.stack([polygon for polygon, quad in zip(polygons, quads) if quad])
+    xs, ys = points[:, :, 0], points[:, :, 1]
+    mask[quads] = (((xs[:, 0] == xs[:, 1]) & (ys[:, 1] == ys[:, 2]) & (xs[:, 2] == xs[:, 3])
+                    & (ys[:, 3] == ys[:, 0]))
+                   | ((ys[:, 0] == ys[:, 1]) & (xs[:, 1] == xs[:, 2]) & (ys[:, 2] == ys[:, 3])
+                      & (xs[:, 3] == xs[:, 0])))
+    return mask
+
+
+def _edges(polygon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    starts = polygon.astype(np.float64)
+    return starts, np.roll(starts, -1, axis=0)
+
+
+def _polygonWidth(polygon: np.ndarray) -> Tuple[float, np.ndarray]:
+    """
+    Smallest distance between facing edges of the polygon measured through its
+    inside, and the bounding box of the two edges.
+    """
+    starts, ends = _edges(polygon)
+    area = np.sum(starts[:, 0] * ends[:, 1] - ends[:, 0] * starts[:, 1])
+    directions = ends - starts
+    lengths = np.hypot(directions[:, 0], directions[:, 1])
+    valid = lengths > 0
+    starts, ends, directions, lengths = (starts[valid], ends[valid], directions[valid],
+                                         lengths[valid])
+    units = directions / lengths[:, None]
+    # inward normals: left of the edges for counter clockwise polygons
+    normals = np.column_stack((-units[:, 1], units[:, 0])) * (1 if area > 0 else -1)
+    # distance of edge j from edge i along the inward normal of i
+    distances = ((starts[None, :, :] - starts[:, None, :]) * normals[:, None, :]).sum(axis=2)
+    facing = (units[:, None, :] * units[None, :, :]).sum(axis=2) < -0.999
+    # overlap of the projections of edge j onto edge i
+    along0 = ((starts[None, :, :] - starts[:, None, :]) * units[:, None, :]).sum(axis=2)
+    along1 = ((ends[None, :, :] - starts[:, None, :]) * units[:, None, :]).sum(axis=2)
+    overlap = (np.minimum(np.maximum(along0, along1), lengths[:, None])
+               - np.maximum(np.minimum(along0, along1), 0))
+    candidates = facing & (distances > 0) & (overlap > 0)
+    if not candidates.any():
+        return np.inf, None
+    masked = np.where(candidates, distances, np.inf)
+    i, j = np.unravel_index(np.argmin(masked), masked.shape)
+    points = np.vstack((starts[i], ends[i], starts[j], ends[j]))
+    return float(masked[i, j]), points
+
+
+def checkWidth(shapes: sidx.layerShapes, rule: widthRule) -> List[drcMarker]:
+    markers = []
+    if not len(shapes):
+        return markers
+    bboxes = shapes.bboxes
+    rects = rectMask(shapes)
+    widths = np.minimum(bboxes[:, 2] - bboxes[:, 0], bboxes[:, 3] - bboxes[:, 1])
+    for index in np.nonzero(rects & (widths < rule.minWidth))[0]:
+        markers.append(drcMarker("width", rule.layer, tuple(bboxes[index].tolist()),
+                                 float(widths[index])))
+    for index in np.nonzero(~rects)[0]:
+        width, points = _polygonWidth(shapes.polygons[index])
+        if width < rule.minWidth:
+            markers.append(drcMarker("width", rule.layer, _pointsBBox(points), width))
+    return markers
+
+
+def _pointsBBox(points: np.ndarray) -> Tuple[int, int, int, int]:
+    return (int(points[:, 0].min()), int(points[:, 1].min()), int(points[:, 0].max()),
+            int(points[:, 1].max()))
+
+
+def candidatePairs(boxesA: np.ndarray, boxesB: np.ndarray, distance: int,
+                   cellSize: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Index pairs (a, b) of boxes closer than distance, found by bucketing the
+    grown boxes of A and the boxes of B into a uniform grid. Pairs can repeat.
+    """
+    if len(boxesA) == 0 or len(boxesB) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    if not cellSize:
+        sizes = np.concatenate((boxesA[:, 2:] - boxesA[:, :2], boxesB[:, 2:] - boxesB[:, :2]))
+        cellSize = int(max(np.median(sizes) * 4, distance * 4, 1))
+    grown = boxesA + np.array([-distance, -distance, distance, distance])
+    cellsA, idsA = _gridCells(grown, cellSize)
+    cellsB, idsB = _gridCells(boxesB, cellSize)
+    # join the cell lists of A and B on the cell key
+    orderB = np.argsort(cellsB, kind="stable")
+    cellsB, idsB = cellsB[orderB], idsB[orderB]
+    lows = np.searchsorted(cellsB, cellsA, side="left")
+    highs = np.searchsorted(cellsB, cellsA, side="right")
+    counts = highs - lows
+    pairsA = np.repeat(idsA, counts)
+    offsets = np.repeat(lows - np.cumsum(counts) + counts, counts)
+    pairsB = idsB[offsets + np.arange(counts.sum())]
+    close = ((boxesB[pairsB, 0] <= grown[pairsA, 2]) & (boxesB[pairsB, 2] >= grown[pairsA, 0])
+             & (boxesB[pairsB, 1] <= grown[pairsA, 3]) & (boxesB[pairsB, 3] >= grown[pairsA, 1]))
+    return pairsA[close], pairsB[close]
+
+
+def _gridCells(boxes: np.ndarray, cellSize: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Grid cell keys covered by each box and the index of the box."""
+    low = np.floor_divide(boxes[:, :2], cellSize)
+    high = np.floor_divide(boxes[:, 2:], cellSize)
+    spans = high - low + 1
+    counts = spans[:, 0] * spans[:, 1]
+    ids = np.repeat(np.arange(len(boxes)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cellX = low[ids, 0] + local % spans[ids, 0]
+    cellY = low[ids, 1] + local // spans[ids, 0]
+    # interleave into one sortable key
+    return cellX * (1 << 32) + (cellY & 0xFFFFFFFF), ids
+
+
+def _boxDistances(boxesA: np.ndarray, boxesB: np.ndarray) -> np.ndarray:
+    dx = np.maximum(0, np.maximum(boxesB[:, 0] - boxesA[:, 2], boxesA[:, 0] - boxesB[:, 2]))
+    dy = np.maximum(0, np.maximum(boxesB[:, 1] - boxesA[:, 3], boxesA[:, 1] - boxesB[:, 3]))
+    return np.hypot(dx, dy)
+
+
+def _segmentDistances(points: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Distances of each point to each segment, shape (points, segments)."""
+    edges = ends - starts
+    lengths = (edges ** 2).sum(axis=1)
+    offsets = points[:, None, :] - starts[None, :, :]
+    ratios = np.clip((offsets * edges[None, :, :]).sum(axis=2) / np.where(lengths > 0,
+                                                                          lengths, 1), 0, 1)
+    nearest = starts[None, :, :] + ratios[:, :, None] * edges[None, :, :]
+    return np.hypot(*(points[:, None, :] - nearest).transpose(2, 0, 1))
+
+
+def insidePolygon(point: np.ndarray, polygon: np.ndarray) -> bool:
+    starts, ends = _edges(polygon)
+    crossing = (starts[:, 1] > point[1]) != (ends[:, 1] > point[1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = starts[:, 0] + (point[1] - starts[:, 1]) * (ends[:, 0] - starts[:, 0]) / (
+            ends[:, 1] - starts[:, 1])
+    return bool(np.count_nonzero(crossing & (point[0] < x)) % 2)
+
+
+def polygonDistance(polygonA: np.ndarray, polygonB: np.ndarray) -> float:
+    """Distance between two polygons, 0 if they touch or overlap."""
+    startsA, endsA = _edges(polygonA)
+    startsB, endsB = _edges(polygonB)
+    distance = min(_segmentDistances(startsA, startsB, endsB).min(),
+                   _segmentDistances(startsB, startsA, endsA).min())
+    if distance > 0 and (insidePolygon(startsA[0], polygonB)
+                         or insidePolygon(startsB[0], polygonA)):
+        return 0.0
+    # crossing edges without a vertex near the other polygon
+    if distance > 0 and _edgesCross(startsA, endsA, startsB, endsB):
+        return 0.0
+    return float(distance)
+
+
+def _edgesCross(startsA, endsA, startsB, endsB) -> bool:
+    def side(starts, ends, points):
+        edges = ends - starts
+        offsets = points[None, :, :] - starts[:, None, :]
+        return edges[:, None, 0] * offsets[:, :, 1] - edges[:, None, 1] * offsets[:, :, 0]
+    sideB0, sideB1 = side(startsA, endsA, startsB), side(startsA, endsA, endsB)
+    sideA0, sideA1 = side(startsB, endsB, startsA).T, side(startsB, endsB, endsA).T
+    return bool(((sideB0 * sideB1 < 0) & (sideA0 * sideA1 < 0)).any())
+
+
+def checkSpacing(shapes: sidx.layerShapes, rule: spacingRule) -> List[drcMarker]:
+    """Spacing between separate shapes of a layer."""
+    if len(shapes) < 2:
+        return []
+    bboxes = shapes.bboxes
+    pairsA, pairsB = candidatePairs(bboxes, bboxes, rule.minSpacing)
+    keep = pairsA < pairsB
+    pairs = np.unique(np.column_stack((pairsA[keep], pairsB[keep])), axis=0)
+    if not len(pairs):
+        return []
+    distances = _boxDistances(bboxes[pairs[:, 0]], bboxes[pairs[:, 1]])
+    rects = rectMask(shapes)
+    bothRects = rects[pairs[:, 0]] & rects[pairs[:, 1]]
+    # box distance is exact for rectangles and a lower bound otherwise
+    close = distances < rule.minSpacing
+    violations = close & bothRects & (distances > 0)
+    gapBoxes = _gapBBoxes(bboxes[pairs[violations, 0]], bboxes[pairs[violations, 1]])
+    markers = [drcMarker("spacing", rule.layer, tuple(box), float(distance))
+               for box, distance in zip(gapBoxes.tolist(), distances[violations])]
+    for a, b in pairs[close & ~bothRects]:
+        distance = polygonDistance(shapes.polygons[a], shapes.polygons[b])
+        if 0 < distance < rule.minSpacing:
+            box = _gapBBoxes(bboxes[[a]], bboxes[[b]])[0]
+            markers.append(drcMarker("spacing", rule.layer, tuple(box.tolist()), distance))
+    return markers
+
+
+def _gapBBoxes(boxesA: np.ndarray, boxesB: np.ndarray) -> np.ndarray:
+    """Boxes spanning the gaps between pairs of boxes."""
+    xs = np.sort(np.column_stack((boxesA[:, 0], boxesA[:, 2], boxesB[:, 0], boxesB[:, 2])),
+                 axis=1)
+    ys = np.sort(np.column_stack((boxesA[:, 1], boxesA[:, 3], boxesB[:, 1], boxesB[:, 3])),
+                 axis=1)
+    return np.column_stack((xs[:, 1], ys[:, 1], xs[:, 2], ys[:, 2]))
+
+
+def checkEnclosure(inner: sidx.layerShapes, outer: sidx.layerShapes,
+                   rule: enclosureRule) -> List[drcMarker]:
+    """Every inner shape must lie inside one outer shape by the enclosure."""
+    if not len(inner):
+        return []
+    innerBoxes = inner.bboxes
+    required = innerBoxes + np.array([-rule.enclosure, -rule.enclosure, rule.enclosure,
+                                      rule.enclosure])
+    enclosed = np.zeros(len(inner), dtype=bool)
+    if len(outer):
+        outerBoxes = outer.bboxes
+        outerRects = rectMask(outer)
+        pairsA, pairsB = candidatePairs(innerBoxes, outerBoxes, 0)
+        inside = ((outerBoxes[pairsB, 0] <= required[pairsA, 0])
+                  & (outerBoxes[pairsB, 1] <= required[pairsA, 1])
+                  & (outerBoxes[pairsB, 2] >= required[pairsA, 2])
+                  & (outerBoxes[pairsB, 3] >= required[pairsA, 3]))
+        # outer polygons are only accepted if they contain the required box
+        for position in np.nonzero(inside & ~outerRects[pairsB])[0]:
+            box = required[pairsA[position]]
+            corners = box[[0, 1, 2, 1, 2, 3, 0, 3]].reshape(4, 2).astype(np.float64)
+            # corners on the outline count as inside, so test them nudged inwards
+            centre = np.array([box[0] + box[2], box[1] + box[3]]) / 2
+            corners += 0.5 * np.sign(centre - corners)
+            polygon = outer.polygons[pairsB[position]]
+            inside[position] = all(insidePolygon(corner, polygon) for corner in corners)
+        enclosed[pairsA[inside]] = True
+    return [drcMarker("enclosure", rule.inner, tuple(innerBoxes[index].tolist()),
+                      float(rule.enclosure))
+            for index in np.nonzero(~enclosed)[0]]
+
+
+def checkViaSize(cuts: sidx.layerShapes, rule: viaSizeRule) -> List[drcMarker]:
+    if not len(cuts):
+        return []
+    bboxes = cuts.bboxes
+    widths = bboxes[:, 2] - bboxes[:, 0]
+    heights = bboxes[:, 3] - bboxes[:, 1]
+    wrong = ((widths < rule.minWidth) | (widths > rule.maxWidth)
+             | (heights < rule.minHeight) | (heights > rule.maxHeight))
+    return [drcMarker(f"{rule.name} size", rule.layer, tuple(bboxes[index].tolist()),
+                      float(min(widths[index], heights[index])))
+            for index in np.nonzero(wrong)[0]]
+
+
+def runChecks(index: sidx.layoutIndex, rules: Iterable[NamedTuple]) -> List[drcMarker]:
+    """Run the rules on the shapes of the index and return all violations."""
+    markers = []
+    for rule in rules:
+        match rule:
+            case widthRule():
+                markers.extend(checkWidth(index.layer(rule.layer), rule))
+            case spacingRule():
+                markers.extend(checkSpacing(index.layer(rule.layer), rule))
+            case enclosureRule():
+                markers.extend(checkEnclosure(index.layer(rule.inner),
+                                              index.layer(rule.outer), rule))
+            case viaSizeRule():
+                markers.extend(checkViaSize(index.layer(rule.layer), rule))
+    return markers
+
+
+def pdkRules(fabproc, layerIndex: Dict[int, int]) -> List[NamedTuple]:
+    """
+    Rules in database units from the via definitions and the optional
+    layerRules and enclosureRules of the PDK process module. layerIndex maps
+    id(layer) to the layer keys of the index.
+    """
+    dbu = fabproc.dbu
+    rules = []
+    for viaDef in fabproc.processVias:
+        layer = layerIndex.get(id(viaDef.layer))
+        if layer is None:
+            continue
+        rules.append(viaSizeRule(layer, viaDef.name, round(viaDef.minWidth * dbu),
+                                 round(viaDef.maxWidth * dbu), round(viaDef.minHeight * dbu),
+                                 round(viaDef.maxHeight * dbu)))
+        rules.append(spacingRule(layer, round(viaDef.minSpacing * dbu)))
+    for layerRule in getattr(fabproc, "layerRules", []):
+        layer = layerIndex.get(id(layerRule.layer))
+        if layer is None:
+            continue
+        if layerRule.minWidth:
+            rules.append(widthRule(layer, round(layerRule.minWidth * dbu)))
+        if layerRule.minSpacing:
+            rules.append(spacingRule(layer, round(layerRule.minSpacing * dbu)))
+    for enclosure in getattr(fabproc, "enclosureRules", []):
+        inner = layerIndex.get(id(enclosure.inner))
+        outer = layerIndex.get(id(enclosure.outer))
+        if inner is not None and outer is not None:
+            rules.append(enclosureRule(inner, outer, round(enclosure.enclosure * dbu)))
+    return rules
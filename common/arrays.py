@@ -0,0 +1,143 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+# Instances and symbols placed as arrays of columns x rows elements. Only the
+# first element has child items, the others are painted, exported and
+# netlisted from them at an offset.
+
+from typing import List, Tuple
+
+from PySide6.QtCore import QPointF, QRectF, Qt
+from PySide6.QtGui import QPainter, QTransform
+from PySide6.QtWidgets import QStyle, QStyleOptionGraphicsItem
+
+import revedaEditor.backend.dataDefinitions as ddef
+
+
+def isArray(array: ddef.instanceArrayTuple) -> bool:
+    return array.columns * array.rows > 1
+
+
+def arrayOffsets(array: ddef.instanceArrayTuple) -> List[Tuple[int, int, QPointF]]:
+    """Row, column and offset from the first element of each element."""
+    return [(row, column, QPointF(column * array.xPitch, row * array.yPitch))
+            for row in range(array.rows) for column in range(array.columns)]
+
+
+def arrayRect(rect: QRectF, array: ddef.instanceArrayTuple) -> QRectF:
+    """Rectangle covering rect of the first element repeated over the array."""
+    if not isArray(array) or rect.isNull():
+        return rect
+    return rect.united(rect.translated((array.columns - 1) * array.xPitch,
+                                       (array.rows - 1) * array.yPitch))
+
+
+def elementName(instanceName: str, row: int, column: int) -> str:
+    return f"{instanceName}_{row}_{column}"
+
+
+def paintCopies(painter: QPainter, copies: list, option: QStyleOptionGraphicsItem,
+                widget) -> None:
+    """
+    Paint items with their paint method at other places. copies is a list of
+    (item, transform) pairs, the transform maps the item to the painter
+    coordinates.
+    """
+    if not copies:
+        return
+    itemOption = QStyleOptionGraphicsItem(option)
+    itemOption.state &= ~QStyle.State_Selected
+    base = painter.worldTransform()
+    for item, transform in copies:
+        if not item.isVisible():
+            continue
+        # items expect the painter state the scene gives them
+        painter.save()
+        painter.setTransform(transform * base)
+        item.paint(painter, itemOption, widget)
+        painter.restore()
+
+
+def shiftTransform(offset: QPointF) -> QTransform:
+    return QTransform.fromTranslate(offset.x(), offset.y())
+
+
+class arrayElementPin:
+    """
+    Pin of a symbol array element. It reads as the pin of the first element
+    and finds the items colliding with it at the element offset.
+    """
+
+    def __init__(self, pin, sceneOffset: QPointF):
+        self._pin = pin
+        self._sceneOffset = sceneOffset
+        self.connected = False
+
+    def __getattr__(self, name):
+        return getattr(self._pin, name)
+
+    def collidingItems(self, mode=Qt.IntersectsItemShape) -> list:
+        rect = self._pin.sceneBoundingRect().translated(self._sceneOffset)
+        return [item for item in self._pin.scene().items(rect, mode)
+                if item is not self._pin]
+
+
+class arrayElementLabel:
+    """Label of a symbol array element with its own value."""
+
+    def __init__(self, label, labelValue: str):
+        self._label = label
+        self.labelValue = labelValue
+
+    def __getattr__(self, name):
+        return getattr(self._label, name)
+
+
+class symbolArrayElement:
+    """
+    One element of a symbol array as it is netlisted. It reads as the array
+    symbol except for its instance name, pins, labels and pin net map.
+    """
+
+    def __init__(self, symbol, row: int, column: int, offset: QPointF):
+        self._symbol = symbol
+        self.instanceName = elementName(symbol.instanceName, row, column)
+        self.pinNetMap = {}
+        sceneOffset = symbol.mapToScene(offset) - symbol.mapToScene(QPointF(0, 0))
+        self.pins = {pinName: arrayElementPin(pin, sceneOffset)
+                     for pinName, pin in symbol.pins.items()}
+        self.labels = {labelName: arrayElementLabel(label, self.instanceName)
+                       if labelName == "@instName" else label
+                       for labelName, label in symbol.labels.items()}
+
+    def __getattr__(self, name):
+        return getattr(self._symbol, name)
+
+    def __repr__(self):
+        return f"symbolArrayElement({self.instanceName})"
+
+
+def symbolArrayElements(symbol) -> List[symbolArrayElement]:
+    return [symbolArrayElement(symbol, row, column, offset)
+            for row, column, offset in arrayOffsets(symbol.arrayTuple)]
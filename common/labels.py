@@ -22,7 +22,8 @@
 #    Licensor: Revolution Semiconductor (Registered in the Netherlands)
 #
 
-from typing import Tuple
+from functools import lru_cache
+from typing import Tuple, Union
 
 from PySide6.QtCore import (
     QPoint,
@@ -33,6 +34,7 @@ from dotenv import load_dotenv
 from quantiphy import Quantity
 
 load_dotenv()
+import revedaEditor.backend.dataDefinitions as ddef
 from revedaEditor.backend.pdkPaths import importPDKModule
 
 schlyr = importPDKModule("schLayers")
@@ -40,6 +42,148 @@ symlyr = importPDKModule("symLayers")
 cb = importPDKModule("callbacks")
 
 
+@lru_cache(maxsize=None)
+def nlpDefinition(labelDefinition: str) -> Union[ddef.nlpLabelTuple, None]:
+    """
+    Parsed NLP label definition, None if it is not one. Definitions are
+    parsed once and shared by all labels made from the same symbol.
+    """
+    if not labelDefinition.strip().startswith("[@"):
+        return None
+    endIndex = labelDefinition.find("]")
+    if endIndex == -1:
+        return None
+    parts = labelDefinition[1:endIndex].split(":")
+    formatString = parts[1].strip() if len(parts) > 1 else None
+    defaultValue = parts[2].strip() if len(parts) > 2 else ""
+    if "=" in defaultValue:
+        # default strings can be written as key=value
+        defaultValue = defaultValue.split("=")[1].strip()
+    return ddef.nlpLabelTuple(parts[0].strip(), formatString, defaultValue,
+                              labelDefinition in symbolLabel.predefinedLabels)
+
+
+@lru_cache(maxsize=None)
+def pyDefinition(labelDefinition: str) -> ddef.pyLabelTuple:
+    """Parsed PyLabel definition name=callbackFunction."""
+    labelName, labelFunction = map(str.strip, labelDefinition.split("="))
+    return ddef.pyLabelTuple(labelName, labelFunction)
+
+
+@lru_cache(maxsize=4096)
+def _renderQuantity(value, valueType, units) -> str:
+    return Quantity(value).render(prec=3)
+
+
+def renderQuantity(value) -> str:
+    """Callback result as it is shown on labels, memoized by value and units."""
+    try:
+        return _renderQuantity(value, type(value), getattr(value, "units", None))
+    except TypeError:  # unhashable values are rendered every time
+        return Quantity(value).render(prec=3)
+
+
+class labelReads(dict):
+    """
+    Labels of a symbol instance as passed to its PDK callback class. The names
+    of the labels looked up are added to reads, which becomes None once the
+    labels are iterated as then every label is read.
+    """
+
+    def __init__(self, labels: dict):
+        super().__init__(labels)
+        self.reads = set()
+
+    def __getitem__(self, labelName):
+        if self.reads is not None:
+            self.reads.add(labelName)
+        return super().__getitem__(labelName)
+
+    def get(self, labelName, default=None):
+        if self.reads is not None:
+            self.reads.add(labelName)
+        return super().get(labelName, default)
+
+    def __iter__(self):
+        self.reads = None
+        return super().__iter__()
+
+    def keys(self):
+        self.reads = None
+        return super().keys()
+
+    def values(self):
+        self.reads = None
+        return super().values()
+
+    def items(self):
+        self.reads = None
+        return super().items()
+
+
+class labelCallbacks:
+    """
+    PDK callback object of a symbol instance shared by its PyLabels, with the
+    rendered results of the callback functions. The labels read while the
+    object is created and while each function runs are recorded, changing one
+    of them drops only the object or the results that read it.
+    """
+
+    def __init__(self, callbackClass, labels: dict):
+        self.callbackClass = callbackClass
+        self.labels = labels
+        self._reads = labelReads(labels)
+        self._callbackObj = None
+        self._objReads = set()  # labels read by the callback class constructor
+        self._results = {}  # function name -> (rendered value, labels read)
+
+    def current(self, callbackClass, labels: dict) -> bool:
+        # labels are only ever added to an instance after it is created
+        return (callbackClass is self.callbackClass and labels is self.labels
+                and len(labels) == len(self._reads))
+
+    def value(self, labelFunction: str) -> Union[str, None]:
+        """Rendered result of a callback function, None if there is none."""
+        result = self._results.get(labelFunction)
+        if result is None:
+            if self._callbackObj is None:
+                self._reads.reads = set()
+                self._callbackObj = self.callbackClass(self._reads)
+                self._objReads = self._reads.reads
+            labelMethod = getattr(self._callbackObj, labelFunction, None)
+            if labelMethod is None:
+                return None
+            self._reads.reads = set()
+            rendered = renderQuantity(labelMethod())
+            result = self._results[labelFunction] = (rendered, self._reads.reads)
+        return result[0]
+
+    def cached(self, labelFunction: str) -> bool:
+        """True if the result of labelFunction is still valid."""
+        return labelFunction in self._results
+
+    def copy(self, labels: dict) -> "labelCallbacks":
+        """
+        Cache for a copy of the instance with the given labels. The results and
+        their dependencies are kept, the callback object is created again when
+        a result has to be computed.
+        """
+        callbacks = labelCallbacks(self.callbackClass, labels)
+        callbacks._objReads = self._objReads
+        callbacks._results = dict(self._results)
+        return callbacks
+
+    def labelChanged(self, labelName: str) -> None:
+        """Drop the callback object or the results that read the label."""
+        if self._objReads is None or labelName in self._objReads:
+            self._callbackObj = None
+            self._results.clear()
+        else:
+            self._results = {labelFunction: result for labelFunction, result in
+                             self._results.items()
+                             if result[1] is not None and labelName not in result[1]}
+
+
 class symbolLabel(QGraphicsSimpleTextItem):
     """
     label: text class definition for symbol drawing.
@@ -58,6 +202,8 @@ class symbolLabel(QGraphicsSimpleTextItem):
         "[@modelName]",
         "[@elementNum]",
     ]
+    # labels with a smaller text height in device pixels are not painted
+    lodTextPixels = 4.0
 
     def __init__(
         self,
@@ -108,6 +254,14 @@ class symbolLabel(QGraphicsSimpleTextItem):
             case _:
                 self.setRotation(0)
 
+    def paint(self, painter, option, widget=None):
+        # skip text layout for labels too small to read at this zoom level
+        if not self.isSelected():
+            lod = option.levelOfDetailFromTransform(painter.worldTransform())
+            if self.boundingRect().height() * lod < self.lodTextPixels:
+                return
+        super().paint(painter, option, widget)
+
     def __repr__(self):
         return (
             f"symbolLabel({self._start},{self._labelDefinition},"
@@ -115,6 +269,24 @@ class symbolLabel(QGraphicsSimpleTextItem):
             f" {self._labelUse})"
         )
 
+    def clone(self) -> "symbolLabel":
+        """Copy of the label with its evaluated name, value and text."""
+        item = symbolLabel(self._start, self._labelDefinition, self._labelType,
+                           self._labelHeight, self._labelAlign, self._labelOrient,
+                           self._labelUse)
+        item._labelName = self._labelName
+        item._labelValue = self._labelValue
+        item._labelText = self._labelText
+        item.setText(self._labelText)
+        item.labelVisible = self._labelVisible
+        item._angle = self._angle
+        item._flipTuple = self._flipTuple
+        item.setTransformOriginPoint(self.transformOriginPoint())
+        item.setRotation(self.rotation())
+        item.setTransform(self.transform())
+        item.setPos(self.pos())
+        return item
+
     def mousePressEvent(self, event):
         super().mousePressEvent(event)
         if self.scene() and self.scene().editModes.moveItem:
@@ -167,10 +339,41 @@ class symbolLabel(QGraphicsSimpleTextItem):
 
     @labelValue.setter
     def labelValue(self, labelValue):
+        changed = labelValue != self._labelValue
         self._labelValue = labelValue
+        if changed:
+            self._valueChanged()
         # if label value is set.
         self.labelDefs()
 
+    def setValue(self, labelValue: str, labelVisible: bool) -> None:
+        """
+        Set value and visibility without evaluating the label definition, see
+        schematicSymbol.evaluateLabels.
+        """
+        if labelValue != self._labelValue:
+            self._labelValue = labelValue
+            self._valueChanged()
+        self.labelVisible = labelVisible
+
+    def callbackCached(self) -> bool:
+        """True if the PyLabel value is a still valid callback result."""
+        parentItem = self.parentItem()
+        callbacks = getattr(parentItem, "labelCallbacks", None)
+        if callbacks is None or not callbacks.current(
+                getattr(cb, parentItem.cellName, None), parentItem.labels):
+            return False
+        try:
+            return callbacks.cached(pyDefinition(self._labelDefinition).labelFunction)
+        except ValueError:
+            return False
+
+    def _valueChanged(self):
+        # drop the cached callback results that read this label
+        callbacks = getattr(self.parentItem(), "labelCallbacks", None)
+        if callbacks is not None:
+            callbacks.labelChanged(self._labelName)
+
     @property
     def labelText(self):
         return self._labelText
@@ -291,6 +494,7 @@ class symbolLabel(QGraphicsSimpleTextItem):
         It should be called when a label is defined or redefined.
         """
         self.prepareGeometryChange()
+        labelValue = self._labelValue
 
         if self._labelType == symbolLabel.labelTypes[0]:  # normal label
             # Set label name, value, and text to label definition
@@ -302,6 +506,8 @@ class symbolLabel(QGraphicsSimpleTextItem):
         elif self._labelType == symbolLabel.labelTypes[2]:  # pyLabel
             self.createPyLabel()
         self.setText(self._labelText)
+        if self._labelValue != labelValue:
+            self._valueChanged()
 
 
     def createNLPLabel(self, labelDefinition: str, labelValue: str = "") -> Tuple[str, str, str]:
@@ -316,39 +522,28 @@ class symbolLabel(QGraphicsSimpleTextItem):
             Tuple of (labelName, labelText, labelValue)
         """
         try:
-            # Validate input format
-            if not labelDefinition.strip().startswith("[@"):
+            definition = nlpDefinition(labelDefinition)
+            if definition is None:
                 return ("", "", "")
-
-            # Extract expression from brackets
-            end_index = labelDefinition.find("]")
-            if end_index == -1:
-                return ("", "", "")
-
-            expression = labelDefinition[1:end_index]
-            parts = expression.split(":")
-            labelName = parts[0].strip()
+            labelName = definition.labelName
 
             # Symbol editor case
             if self.parentItem() is None:
                 return (labelName, labelDefinition, labelValue)
 
             # Predefined labels case
-            if labelDefinition in symbolLabel.predefinedLabels:
+            if definition.predefined:
                 return self._createPredefinedLabels(labelDefinition)
 
             # Handle different part counts
-            if len(parts) == 1:
+            if definition.formatString is None:
                 return (labelName, labelName, labelValue)
 
-            # Extract format string and default value
-            formatString = parts[1].strip() if len(parts) > 1 else labelName
-            defaultValue = self._extractDefaultValue(parts[2].strip()) if len(parts) > 2 else ""
-
             # Use default value if no current value
-            finalValue = labelValue or defaultValue
+            finalValue = labelValue or definition.defaultValue
 
             # Generate label text
+            formatString = definition.formatString
             labelText = formatString.replace("%", finalValue) if "%" in formatString else formatString
 
             return (labelName, labelText, finalValue)
@@ -358,12 +553,6 @@ class symbolLabel(QGraphicsSimpleTextItem):
                 self.scene().logger.error(f"Error parsing label definition: {labelDefinition}, {e}")
             return ("", "", "")
 
-    def _extractDefaultValue(self, defaultString: str) -> str:
-        """Extract default value from default string, handling 'key=value' format."""
-        if "=" in defaultString:
-            return defaultString.split("=")[1].strip()
-        return defaultString
-
     def _createPredefinedLabels(self, labelDefinition: str) -> Tuple[str, str, str]:
         labelName = labelDefinition[1:-1]
         labelValue = ""
@@ -401,24 +590,16 @@ class symbolLabel(QGraphicsSimpleTextItem):
         """
         try:
             # Split the label definition into name and function
-            labelName, labelFunction = map(str.strip, self._labelDefinition.split("="))
+            labelName, labelFunction = pyDefinition(self._labelDefinition)
 
             # Check if parent item exists and has 'cellName' attribute
-            if self.parentItem() and hasattr(self.parentItem(), "cellName"):
-                # Construct the expression to evaluate
-                parentItem = self.parentItem()
-                parentCellName = parentItem.cellName
-                parentLabelsDict = parentItem.labels
-                if hasattr(cb, parentCellName):
-                    callbackClass = getattr(cb, parentCellName)
-                    callbackClassObj = callbackClass(parentLabelsDict)
-                    if hasattr(callbackClassObj, labelFunction):
-                        labelMethod = getattr(callbackClassObj, labelFunction)
-                        if labelMethod:
-                            self._labelValue = Quantity(labelMethod()).render(prec=3)
-                        else:
-                            self._labelValue = "?"
-
+            parentItem = self.parentItem()
+            if parentItem and hasattr(parentItem, "cellName"):
+                callbacks = self._labelCallbacks(parentItem)
+                if callbacks is not None:
+                    labelValue = callbacks.value(labelFunction)
+                    if labelValue is not None:
+                        self._labelValue = labelValue
                         # Set the label text with the name and value
                         self._labelText = f"{labelName}={self._labelValue}"
             else:
@@ -429,3 +610,18 @@ class symbolLabel(QGraphicsSimpleTextItem):
             # Log the error if scene exists
             if self.scene():
                 self.scene().logger.error(f"PyLabel Error: {e}")
+
+    @staticmethod
+    def _labelCallbacks(parentItem) -> Union[labelCallbacks, None]:
+        """
+        Callback object of the parent instance, kept on the instance until its
+        cell or labels change. None if the PDK has no callbacks for the cell.
+        """
+        callbackClass = getattr(cb, parentItem.cellName, None)
+        if callbackClass is None:
+            return None
+        callbacks = getattr(parentItem, "labelCallbacks", None)
+        if callbacks is None or not callbacks.current(callbackClass, parentItem.labels):
+            callbacks = labelCallbacks(callbackClass, parentItem.labels)
+            parentItem.labelCallbacks = callbacks
+        return callbacks
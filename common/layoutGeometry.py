@@ -0,0 +1,163 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+"""
+Flattening of layout items to per layer polygons in database units for the
+Qt-free spatial index, design rule checks and connectivity extraction.
+"""
+
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+from PySide6.QtCore import QPointF, QRectF
+from PySide6.QtGui import QPolygonF, QTransform
+from PySide6.QtWidgets import QGraphicsItem
+
+import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.backend.spatialIndex as sidx
+import revedaEditor.common.arrays as arr
+import revedaEditor.common.layoutShapes as lshp
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule('layoutLayers')
+
+
+def layerIndices() -> dict:
+    """id(layer) -> index of the layer in the PDK layer list."""
+    return {id(layer): index for index, layer in enumerate(laylyr.pdkAllLayers)}
+
+
+def polygonPoints(polygon: QPolygonF) -> np.ndarray:
+    points = np.array([(point.x(), point.y()) for point in polygon], dtype=np.float64)
+    # closed polygons repeat their first point
+    if len(points) > 1 and (points[0] == points[-1]).all():
+        points = points[:-1]
+    return np.rint(points).astype(np.int64)
+
+
+def rectPoints(rect: QRectF, transform: QTransform) -> np.ndarray:
+    if transform.type() in (QTransform.TxNone, QTransform.TxTranslate):
+        # most shapes are only moved, skip mapping through a QPolygonF
+        left, top = round(rect.left() + transform.dx()), round(rect.top() + transform.dy())
+        right = round(rect.right() + transform.dx())
+        bottom = round(rect.bottom() + transform.dy())
+        return np.array(((left, top), (right, top), (right, bottom), (left, bottom)),
+                        dtype=np.int64)
+    return polygonPoints(transform.map(QPolygonF(rect)))
+
+
+def _itemPolygons(item: QGraphicsItem, transform: QTransform
+                  ) -> Iterator[Tuple[ddef.layLayer, np.ndarray]]:
+    if isinstance(item, (lshp.layoutRect, lshp.layoutPin, lshp.layoutVia)):
+        yield item.layer, rectPoints(QRectF(item.rect), transform)
+    elif isinstance(item, lshp.layoutViaArray):
+        for row in item.via_array:
+            for cut in row:
+                yield item.layer, rectPoints(QRectF(cut), transform)
+    elif isinstance(item, lshp.layoutPath):
+        yield item.layer, polygonPoints(transform.map(QPolygonF(item.rect)))
+    elif isinstance(item, lshp.layoutPolygon):
+        yield item.layer, polygonPoints(transform.map(item.polygon))
+
+
+def flattenShapes(items: Iterable[QGraphicsItem], expand: bool = True
+                  ) -> Iterator[Tuple[int, np.ndarray, QGraphicsItem]]:
+    """
+    Yield (layer index, polygon points, item) for the rectangles, pins, paths,
+    polygons and via cuts among the top level items and inside their instances, in scene
+    coordinates. With expand, instances beyond the display levels are expanded
+    so that the whole hierarchy is flattened. The shapes of array instances
+    are yielded once per element.
+    """
+    layerIndex = layerIndices()
+    # (item, transform of its parent to the scene, None for the top level items)
+    stack = [(item, None) for item in items]
+    while stack:
+        item, parentTransform = stack.pop()
+        if parentTransform is None:
+            transform = item.sceneTransform()
+        else:
+            transform = item.itemTransform(item.parentItem())[0] * parentTransform
+        if isinstance(item, lshp.layoutInstance):
+            children = item.shapes if expand else item.childItems()
+            if not arr.isArray(item.arrayTuple):
+                stack.extend((child, transform) for child in children)
+                continue
+            for _, _, offset in arr.arrayOffsets(item.arrayTuple):
+                elementTransform = arr.shiftTransform(offset) * transform
+                stack.extend((child, elementTransform) for child in children)
+            continue
+        for layer, points in _itemPolygons(item, transform):
+            index = layerIndex.get(id(layer))
+            if index is not None:
+                yield index, points, item
+
+
+def buildLayoutIndex(items: Iterable[QGraphicsItem], expand: bool = True) -> sidx.layoutIndex:
+    """Spatial index of the flattened shapes keyed by PDK layer index."""
+    index = sidx.layoutIndex()
+    index.bulkLoad(flattenShapes(items, expand))
+    return index
+
+
+def flattenLabels(items: Iterable[QGraphicsItem]
+                  ) -> Iterator[Tuple[int, Tuple[int, int], str, Optional[Tuple[str, str]]]]:
+    """
+    Yield (layer index, scene point, name, terminal) for the labels and pins
+    among the top level items and the pins of the top level instances.
+    Labels and top level pins name the net under them. Pins are terminals,
+    (instance name, pin name) inside instances and ("", pin name) at the top.
+    The elements of array instances are named by arr.elementName.
+    """
+    layerIndex = layerIndices()
+
+    def point(item, localPoint):
+        scenePoint = item.mapToScene(localPoint)
+        return round(scenePoint.x()), round(scenePoint.y())
+
+    for item in items:
+        if isinstance(item, lshp.layoutLabel):
+            index = layerIndex.get(id(item.layer))
+            if index is not None:
+                yield index, point(item, QPointF(item.start)), item.labelText, None
+        elif isinstance(item, lshp.layoutPin):
+            index = layerIndex.get(id(item.layer))
+            if index is not None:
+                yield (index, point(item, QRectF(item.rect).center()), item.pinName,
+                       ("", item.pinName))
+        elif isinstance(item, lshp.layoutInstance):
+            array = item.arrayTuple
+            for shape in item.shapes:
+                index = layerIndex.get(id(getattr(shape, "layer", None)))
+                if not isinstance(shape, lshp.layoutPin) or index is None:
+                    continue
+                if not arr.isArray(array):
+                    yield (index, point(shape, QRectF(shape.rect).center()), None,
+                           (item.instanceName, shape.pinName))
+                    continue
+                centre = shape.mapToParent(QRectF(shape.rect).center())
+                for row, column, offset in arr.arrayOffsets(array):
+                    yield (index, point(item, centre + offset), None,
+                           (arr.elementName(item.instanceName, row, column),
+                            shape.pinName))
@@ -25,10 +25,11 @@
 
 # shape class definition for symbol editor.
 # base class for all shapes: rectangle, circle, line
+import inspect
 import itertools
 import math
+from functools import lru_cache
 from pathlib import Path
-import numpy as np
 from typing import Tuple, Union
 from PySide6.QtCore import (
     QPoint,
@@ -42,16 +43,15 @@ from PySide6.QtGui import (
     QPen,
     QBrush,
     QColor,
-    QPixmap,
     QFontMetrics,
     QFont,
     QTextOption,
     QFontDatabase,
     QPainterPath,
     QPolygonF,
-    QImage,
     QPainter,
     QTransform,
+    QPixmap,
 )
 from PySide6.QtWidgets import (
     QStyle,
@@ -61,74 +61,38 @@ from PySide6.QtWidgets import (
 )
 
 import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.common.arrays as arr
+from revedaEditor.common.textures import textureCache
 
 from revedaEditor.backend.pdkPaths import importPDKModule
 laylyr = importPDKModule('layoutLayers')
 fabproc = importPDKModule('process')
 
 
-class textureCache:
-    _file_content_cache = {}
-    _pixmap_cache = {}
-
-    @classmethod
-    def readFileContent(cls, filePath):
-        if filePath not in cls._file_content_cache:
-            with open(filePath, "r") as file:
-                cls._file_content_cache[filePath] = file.read()
-        return cls._file_content_cache[filePath]
-
-    @classmethod
-    def createImage(cls, filePath: Path, color: QColor, scale: int = 1)  -> QImage:
-        content = cls.readFileContent(str(filePath))
-
-        # Use numpy's loadtxt for faster parsing of text data
-        data = np.loadtxt(content.splitlines(), dtype=np.uint8)
-
-        # Scale up the pattern by repeating each pixel
-        data_scaled = np.repeat(np.repeat(data, scale, axis=0), scale, axis=1)
-
-        height, width = data_scaled.shape
+@lru_cache(maxsize=None)
+def texturePath(btexture: str) -> Path:
+    """Stipple file of a layer texture, resolved once per texture."""
+    return Path(laylyr.__file__).parent.joinpath(btexture)
 
-        # Create QImage with Format_ARGB32 (not premultiplied)
-        image = QImage(width, height, QImage.Format.Format_ARGB32)
-        # Fill with transparent pixels first
-        image.fill(Qt.transparent)
 
-        # Create painter to draw on the image
-        painter = QPainter(image)
-        painter.setPen(Qt.NoPen)
-        # painter.setBrush(QBrush(color))
-        # Create semi-transparent color (50% opacity)
-        transparent_color = QColor(color)
-        transparent_color.setAlpha(64)  # 128 is 50% opacity (range is 0-255)
-        painter.setBrush(QBrush(transparent_color))
-
-        # Draw solid rectangles for each pixel that should be colored
-        for i in range(height):
-            for j in range(width):
-                if data_scaled[i, j] == 1:  # Draw colored pixel
-                    painter.drawRect(j, i, 1, 1)
-
-        painter.end()
-        return image
-
-    @classmethod
-    def getCachedPixmap(cls, texturePath, color):
-        cache_key = (str(texturePath), color.name())
-        if cache_key not in cls._pixmap_cache:
-            image = cls.createImage(texturePath, color, 4)
-            pixmap = QPixmap.fromImage(image)
-            cls._pixmap_cache[cache_key] = pixmap
-        return cls._pixmap_cache[cache_key]
-
-    @classmethod
-    def clearCaches(cls):
-        cls._file_content_cache.clear()
-        cls._pixmap_cache.clear()
+def layerTexture(layer: ddef.layLayer) -> QPixmap:
+    """Stipple pixmap of a layer in its brush colour."""
+    return textureCache.getCachedPixmap(texturePath(layer.btexture), layer.bcolor)
 
 
 class layoutShape(QGraphicsItem):
+    # Level of detail limits in device pixels. Shapes smaller than
+    # lodCullPixels are not painted, shapes smaller than lodTexturePixels are
+    # painted with a flat fill instead of the stipple texture, labels with a
+    # smaller text height than lodLabelPixels are not painted and instances
+    # smaller than lodInstancePixels are drawn as outline boxes.
+    lodEnabled = True
+    lodCullPixels = 2.0
+    lodTexturePixels = 16.0
+    lodLabelPixels = 4.0
+    lodInstancePixels = 24.0
+    _flatBrushes = {}  # rgba of brush colour -> flat QBrush
+
     def __init__(self) -> None:
         super().__init__()
         self.setFlag(QGraphicsItem.ItemIsMovable, False)
@@ -151,8 +115,32 @@ class layoutShape(QGraphicsItem):
     def __repr__(self):
         return "layoutShape()"
 
+    def _placedCopy(self, item: "layoutShape") -> "layoutShape":
+        # gives a clone() built from the state in memory the placement of
+        # this shape. Every geometry change goes through itemChange, so only
+        # the placement that differs from the new item is set
+        item._angle = self._angle
+        item._flipTuple = self._flipTuple
+        if item.transformOriginPoint() != self.transformOriginPoint():
+            item.setTransformOriginPoint(self.transformOriginPoint())
+        if item.rotation() != self.rotation():
+            item.setRotation(self.rotation())
+        if item.transform() != self.transform():
+            item.setTransform(self.transform())
+        if item.pos() != self.pos():
+            item.setPos(self.pos())
+        return item
+
     def itemChange(self, change, value):
-        if self.scene():
+        if change == QGraphicsItem.ItemSceneChange:
+            # keep the per layer item index of the layout scene up to date
+            layer = getattr(self, "_layer", None)
+            if layer is not None:
+                if hasattr(self.scene(), "unindexLayerItem"):
+                    self.scene().unindexLayerItem(self, layer)
+                if hasattr(value, "indexLayerItem"):
+                    value.indexLayerItem(self, layer)
+        elif self.scene():
             match change:
                 case QGraphicsItem.ItemSelectedHasChanged:
                     if value:
@@ -164,8 +152,7 @@ class layoutShape(QGraphicsItem):
     def _definePensBrushes(self, layer):
         # Assuming 'layer' is your layer object:
         self._pen = QPen(layer.pcolor, layer.pwidth, layer.pstyle)
-        texturePath = Path(laylyr.__file__).parent.joinpath(layer.btexture)
-        _pixmap = textureCache.getCachedPixmap(texturePath, layer.bcolor)
+        _pixmap = layerTexture(layer)
         self._brush = QBrush(layer.bcolor, _pixmap)
         self._selectedPen = QPen(QColor("yellow"), layer.pwidth, Qt.DashLine)
         self._selectedBrush = QBrush(QColor("yellow"), _pixmap)
@@ -182,6 +169,62 @@ class layoutShape(QGraphicsItem):
             self._lastScale = scale
             self._transformedBrush.setTransform(QTransform().scale(1 / scale, 1 / scale))
 
+    @staticmethod
+    def _levelOfDetail(option, painter) -> float:
+        return option.levelOfDetailFromTransform(painter.worldTransform())
+
+    def _lodPixels(self, lod: float) -> float:
+        """Size of the item on the screen in device pixels."""
+        rect = self.boundingRect()
+        return max(rect.width(), rect.height()) * lod
+
+    def _lodHidden(self, lod: float) -> bool:
+        """True if the item is inside an instance drawn as an outline box."""
+        parent = self.parentItem()
+        return isinstance(parent, layoutInstance) and parent.lodBoxed(lod)
+
+    def _tileSkip(self) -> bool:
+        """
+        True if the item is painted by the other pass when the scene caches
+        static shapes in tiles.
+        """
+        scene = self.scene()
+        if scene is None or not getattr(scene, 'tileCaching', False):
+            return False
+        return scene.tileLive(self) == scene.tilePass
+
+    def _lodSkip(self, option, painter) -> Union[float, None]:
+        """
+        Return None if the item should not be painted at this zoom level,
+        otherwise its size in device pixels. Selected items are always
+        painted.
+        """
+        if self._tileSkip():
+            return None
+        if not self.lodEnabled:
+            return math.inf
+        lod = self._levelOfDetail(option, painter)
+        if self._lodHidden(lod):
+            return None
+        pixels = self._lodPixels(lod)
+        if pixels < self.lodCullPixels and not self.isSelected():
+            return None
+        return pixels
+
+    def _lodBrush(self, brush: QBrush, pixels: float, scale: float) -> QBrush:
+        """Flat fill for small shapes, scale corrected stipple otherwise."""
+        if pixels < self.lodTexturePixels:
+            color = brush.color()
+            flatBrush = self._flatBrushes.get(color.rgba())
+            if flatBrush is None:
+                flatColor = QColor(color)
+                flatColor.setAlpha(64)
+                flatBrush = QBrush(flatColor)
+                self._flatBrushes[color.rgba()] = flatBrush
+            return flatBrush
+        self._updateTransformedBrush(brush, scale)
+        return self._transformedBrush
+
     @property
     def pen(self):
         return self._pen
@@ -304,6 +347,9 @@ class layoutShape(QGraphicsItem):
     @layer.setter
     def layer(self, value: ddef.layLayer):
         self.prepareGeometryChange()
+        if hasattr(self.scene(), "indexLayerItem"):
+            self.scene().unindexLayerItem(self, self._layer)
+            self.scene().indexLayerItem(self, value)
         self._layer = value
         self._definePensBrushes(self._layer)
 
@@ -345,17 +391,24 @@ class layoutRect(layoutShape):
     def __repr__(self):
         return f"layoutRect({self._start}, {self._end}, {self._layer})"
 
+    def clone(self) -> "layoutRect":
+        return self._placedCopy(
+            layoutRect(self._rect.topLeft(), self._rect.bottomRight(), self._layer))
+
 
     def paint(self, painter, option, widget):
+        pixels = self._lodSkip(option, painter)
+        if pixels is None:
+            return
         # Cache the rect to avoid multiple attribute lookups
         rect = self._rect
 
         # Get scale once and cache it
-        scale = self.scene().views()[0].transform().m11()
+        scale = self._levelOfDetail(option, painter)
 
         if self.isSelected():
             painter.setPen(self._selectedPen)
-            self._updateTransformedBrush(self._selectedBrush, scale)
+            brush = self._lodBrush(self._selectedBrush, pixels, scale)
 
             if self.stretch:
                 painter.setPen(self._stretchPen)
@@ -365,8 +418,8 @@ class layoutRect(layoutShape):
                     painter.drawLine(start_func(rect), end_func(rect))
         else:
             painter.setPen(self._pen)
-            self._updateTransformedBrush(self._brush, scale)
-        painter.setBrush(self._transformedBrush)
+            brush = self._lodBrush(self._brush, pixels, scale)
+        painter.setBrush(brush)
         painter.drawRect(rect)
 
     def boundingRect(self):
@@ -532,6 +585,131 @@ class layoutRect(layoutShape):
             self.setCursor(Qt.ArrowCursor)
 
 
+class layerBatch:
+    """
+    Static geometry of an instance grouped by layer and tile. Each visible
+    layer is painted with a single pen and brush change per frame and only
+    the tiles intersecting the exposed rectangle are drawn.
+    """
+
+    tileSize = 20000  # in scene units
+    # layer id -> (layer, pen, brush), shared by all batches
+    _layerStyles = {}
+
+    def __init__(self):
+        # layer id -> tile -> [rect list, QPainterPath, line list]
+        self._layerTiles = {}
+        self._tileRects = {}  # tile -> bounding rect of its geometry
+        self._layerOrder = []  # layer ids sorted by z value
+        self._lastScale = None
+        # shapes painted by the batch instead of their own paint method
+        self.shapes = []
+        # (item, transform to root) of the other shapes in array elements
+        # after the first, see arr.paintCopies
+        self.copies = []
+
+    def _tileData(self, layer: ddef.layLayer, bounds: QRectF) -> list:
+        centre = bounds.center()
+        tile = (math.floor(centre.x() / self.tileSize),
+                math.floor(centre.y() / self.tileSize))
+        self._tileRects[tile] = self._tileRects.get(tile, QRectF()).united(bounds)
+        layerId = id(layer)
+        if layerId not in self._layerStyles:
+            pen = QPen(layer.pcolor, layer.pwidth, layer.pstyle)
+            brush = QBrush(layer.bcolor, layerTexture(layer))
+            self._layerStyles[layerId] = (layer, pen, brush)
+        return self._layerTiles.setdefault(layerId, {}).setdefault(
+            tile, [[], QPainterPath(), []])
+
+    def _addRect(self, layer, rect: QRectF, transform: QTransform, diagonals=False):
+        # rotations by multiples of 90 degrees keep rectangles rectangles
+        if transform.m12() == 0 and transform.m21() == 0 or (
+                transform.m11() == 0 and transform.m22() == 0):
+            mapped = transform.mapRect(QRectF(rect))
+            data = self._tileData(layer, mapped)
+            data[0].append(mapped)
+        else:
+            polygon = transform.map(QPolygonF(QRectF(rect)))
+            mapped = polygon.boundingRect()
+            data = self._tileData(layer, mapped)
+            data[1].addPolygon(polygon)
+        if diagonals:
+            data[2].append(transform.map(QLineF(QRectF(rect).bottomLeft(),
+                                                QRectF(rect).topRight())))
+            data[2].append(transform.map(QLineF(QRectF(rect).topLeft(),
+                                                QRectF(rect).bottomRight())))
+
+    def addShapes(self, root: QGraphicsItem, items, parentTransform: QTransform = None,
+                  copy: bool = False) -> None:
+        """
+        Collect the geometry of the rectangles, pins, paths, polygons and vias
+        among the items and their descendants in the coordinates of root.
+        Labels, lines and rulers keep painting themselves. The shapes of
+        array instances are added once per element. parentTransform maps the
+        parent of the items to root when it is placed at an array offset,
+        copy is True for all but the first element of the arrays above.
+        """
+        for item in items:
+            if parentTransform is None:
+                transform = item.itemTransform(root)[0]
+            else:
+                transform = item.itemTransform(item.parentItem())[0] * parentTransform
+            if isinstance(item, layoutInstance):
+                for row, column, offset in arr.arrayOffsets(item.arrayTuple):
+                    self.addShapes(root, item.childItems(),
+                                   arr.shiftTransform(offset) * transform,
+                                   copy or bool(row or column))
+                continue
+            if isinstance(item, (layoutRect, layoutPin)):
+                self._addRect(item.layer, item.rect, transform)
+            elif isinstance(item, layoutVia):
+                self._addRect(item.layer, item.rect, transform, True)
+            elif isinstance(item, layoutViaArray):
+                for rect in item.via_array:
+                    for cut in rect:
+                        self._addRect(item.layer, cut, transform, True)
+            elif isinstance(item, layoutPath):
+                polygon = transform.map(QPolygonF(item.rect))
+                data = self._tileData(item.layer, polygon.boundingRect())
+                data[1].addPolygon(polygon)
+                data[2].append(transform.map(item.draftLine))
+            elif isinstance(item, layoutPolygon):
+                polygon = transform.map(item.polygon)
+                data = self._tileData(item.layer, polygon.boundingRect())
+                data[1].addPolygon(polygon)
+            else:
+                if copy:
+                    self.copies.append((item, transform))
+                continue
+            if not copy:
+                self.shapes.append(item)
+        self._layerOrder = sorted(self._layerTiles,
+                                  key=lambda layerId: self._layerStyles[layerId][0].z)
+
+    def paint(self, painter: QPainter, exposedRect: QRectF, scale: float) -> None:
+        rescale = self._lastScale != scale
+        self._lastScale = scale
+        for layerId in self._layerOrder:
+            layer, pen, brush = self._layerStyles[layerId]
+            if not layer.visible:
+                continue
+            tiles = [data for tile, data in self._layerTiles[layerId].items()
+                     if self._tileRects[tile].intersects(exposedRect)]
+            if not tiles:
+                continue
+            if rescale:
+                brush.setTransform(QTransform().scale(1 / scale, 1 / scale))
+            painter.setPen(pen)
+            painter.setBrush(brush)
+            for rects, path, lines in tiles:
+                if rects:
+                    painter.drawRects(rects)
+                if not path.isEmpty():
+                    painter.drawPath(path)
+                if lines:
+                    painter.drawLines(lines)
+
+
 class layoutInstance(layoutShape):
     def __init__(self, shapes: list[layoutShape]):
         super().__init__()
@@ -550,6 +728,19 @@ class layoutInstance(layoutShape):
         # Pen used for selection
         self._selectedPen = QPen(QColor("yellow"), 4, Qt.DashLine)
         self._selectedPen.setCosmetic(True)
+        # Pen for the outline box drawn instead of small instances
+        self._boxPen = QPen(QColor("gray"), 1, Qt.SolidLine)
+        self._boxPen.setCosmetic(True)
+        # size of the instance, see lodBoxed
+        self._lodSize = None
+        # layerBatch painting the instance shapes, see setBatchPainting
+        self._batch = None
+        # bounding rect and loader of shapes not created yet, see setDeferred
+        self._deferredRect = None
+        self._deferredLoader = None
+        self._depth = None
+        # columns, rows and pitches when placed as an array, see arrayTuple
+        self._arrayTuple = ddef.instanceArrayTuple()
         # Set the shapes for the symbol
         self.setShapes()
         # Enable child event filtering for filters and handles
@@ -561,12 +752,17 @@ class layoutInstance(layoutShape):
         self._start = self.childrenBoundingRect().bottomLeft()
 
     def setShapes(self):
+        self._lodSize = None
         for item in self._shapes:
             item.setFlag(QGraphicsItem.ItemIsSelectable, False)
             item.setFlag(QGraphicsItem.ItemStacksBehindParent, True)
             item.setParentItem(self)
+        self._rebuildBatch()
 
     def removeShapes(self):
+        self._lodSize = None
+        # an existing batch is rebuilt by setShapes
+        self._releaseBatch()
         self.prepareGeometryChange()
         for item in self._shapes:
             item.setParentItem(None)
@@ -576,14 +772,150 @@ class layoutInstance(layoutShape):
     def __repr__(self):
         return f"layoutInstance({self._shapes})"
 
+    def clone(self) -> "layoutInstance":
+        """
+        Copy of the instance sharing its master. Shapes already created are
+        cloned instead of read again from the cell view, a deferred instance
+        keeps its loader and pcells are built again from their parameters.
+        """
+        if type(self) is not layoutInstance:
+            item = type(self)()
+            item(**pcellParams(self))
+        elif self._deferredLoader is not None:
+            item = layoutInstance([])
+            item.setDeferred(self._deferredRect, self._deferredLoader)
+        else:
+            item = layoutInstance([shape.clone() for shape in self._shapes])
+        item.libraryName = self._libraryName
+        item.cellName = self._cellName
+        item.viewName = self._viewName
+        item.instanceName = self._instanceName
+        item.counter = getattr(self, "counter", 0)
+        if arr.isArray(self._arrayTuple):
+            item.arrayTuple = self._arrayTuple
+        return self._placedCopy(item)
+
     def boundingRect(self):
-        return self.childrenBoundingRect().normalized().adjusted(-2, -2, 2, 2)
+        return self._contentRect().normalized().adjusted(-2, -2, 2, 2)
+
+    def _contentRect(self) -> QRectF:
+        if self._deferredRect is not None:
+            return arr.arrayRect(self._deferredRect, self._arrayTuple)
+        return arr.arrayRect(self.childrenBoundingRect(), self._arrayTuple)
 
     def paint(self, painter, option, widget):
+        if self._tileSkip():
+            return
         painter.setRenderHint(QPainter.NonCosmeticBrushPatterns)
+        lod = self._levelOfDetail(option, painter)
+        if self.lodBoxed(lod):
+            if self._lodHidden(lod):
+                return
+            painter.setPen(self._boxPen)
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRect(self._contentRect())
+            if self.displayBoxed():
+                self._paintBoxLabel(painter)
+        elif self._batch is not None:
+            self._batch.paint(painter, option.exposedRect, lod)
+            arr.paintCopies(painter, self._batch.copies, option, widget)
         if option.state & QStyle.State_Selected:
             painter.setPen(self._selectedPen)
-            painter.drawRect(self.childrenBoundingRect())
+            painter.drawRect(self._contentRect())
+
+    def _paintBoxLabel(self, painter):
+        """Write the cell name into the outline box in device coordinates."""
+        deviceRect = painter.worldTransform().mapRect(self._contentRect())
+        if deviceRect.width() < 4 * self.lodInstancePixels or deviceRect.height() < 12:
+            return
+        painter.save()
+        painter.resetTransform()
+        painter.setPen(self._boxPen)
+        painter.drawText(deviceRect, Qt.AlignCenter | Qt.TextSingleLine,
+                         f"{self._cellName} ({self._instanceName})")
+        painter.restore()
+
+    def lodBoxed(self, lod: float) -> bool:
+        """
+        True if the instance is drawn as an outline box at this level of
+        detail, either because it is small, because it is beyond the display
+        levels of the scene or because its parent instance is boxed.
+        """
+        if self.displayBoxed():
+            return True
+        if not self.lodEnabled:
+            return False
+        if self._lodSize is None:
+            rect = self._contentRect()
+            self._lodSize = max(rect.width(), rect.height())
+        return self._lodSize * lod < self.lodInstancePixels or self._lodHidden(lod)
+
+    @property
+    def depth(self) -> int:
+        """Number of instances above this instance."""
+        if self._depth is None:
+            parent = self.parentItem()
+            self._depth = parent.depth + 1 if isinstance(parent, layoutInstance) else 0
+        return self._depth
+
+    def displayBoxed(self) -> bool:
+        """True if the instance is at or beyond the display levels of the scene."""
+        if self._deferredLoader is not None:
+            return True
+        levels = getattr(self.scene(), "displayLevels", None)
+        return levels is not None and self.depth >= levels
+
+    def setDeferred(self, rect: QRectF, loader) -> None:
+        """
+        Leave the instance without shapes until expand is called. rect is the
+        bounding rectangle of the shapes and loader returns their list.
+        """
+        self.prepareGeometryChange()
+        self._lodSize = None
+        self._deferredRect = QRectF(rect)
+        self._deferredLoader = loader
+        self._start = self._deferredRect.bottomLeft()
+
+    @property
+    def deferred(self) -> bool:
+        return self._deferredLoader is not None
+
+    def expand(self) -> bool:
+        """Create the shapes of a deferred instance. Returns True if it was deferred."""
+        if self._deferredLoader is None:
+            return False
+        loader = self._deferredLoader
+        self._deferredLoader = None
+        self.prepareGeometryChange()
+        self._deferredRect = None
+        self.shapes = loader()
+        self._start = self.childrenBoundingRect().bottomLeft()
+        self._reflip()
+        return True
+
+    def _reflip(self):
+        # flips are done around the centre, which moves when shapes are created
+        if self._flipTuple != (1, 1):
+            flipTuple = self._flipTuple
+            self.setTransform(QTransform())
+            self.flipTuple = flipTuple
+
+    def expandToLevel(self, levels: int) -> bool:
+        """
+        Create the shapes of the deferred instances above the display levels
+        in the hierarchy below this instance. Returns True if any were created.
+        """
+        if self.depth >= levels:
+            return False
+        expanded = self.expand()
+        for shape in self._shapes:
+            if isinstance(shape, layoutInstance):
+                expanded = shape.expandToLevel(levels) or expanded
+        if expanded:
+            self._reflip()
+            if self.parentItem() is None:
+                self._rebuildBatch()
+        return expanded
 
 
     def sceneEvent(self, event):
@@ -634,10 +966,14 @@ class layoutInstance(layoutShape):
 
     @property
     def shapes(self):
+        # code walking the hierarchy, e.g. export, sees all levels
+        self.expand()
         return self._shapes
 
     @shapes.setter
     def shapes(self, value: list[layoutShape]):
+        self._deferredLoader = None
+        self._deferredRect = None
         self.removeShapes()
         self._shapes = value
         self.setShapes()
@@ -646,9 +982,80 @@ class layoutInstance(layoutShape):
     def start(self):
         return self._start.toPoint()
 
+    @property
+    def arrayTuple(self) -> ddef.instanceArrayTuple:
+        return self._arrayTuple
+
+    @arrayTuple.setter
+    def arrayTuple(self, value: ddef.instanceArrayTuple):
+        """
+        Place the instance as an array of columns x rows elements. The shapes
+        are those of the first element, the other elements are painted from
+        them at multiples of the pitches in instance coordinates.
+        """
+        self.prepareGeometryChange()
+        self._arrayTuple = ddef.instanceArrayTuple(*value)
+        self._lodSize = None
+        self._reflip()
+        top = self.topLevelItem()
+        if isinstance(top, layoutInstance):
+            top._rebuildBatch()
+
+    def _containsArray(self) -> bool:
+        return arr.isArray(self._arrayTuple) or any(
+            isinstance(shape, layoutInstance) and shape._containsArray()
+            for shape in self._shapes)
+
     def addShape(self, shape: layoutShape):
+        self.expand()
+        self._lodSize = None
         self._shapes.append(shape)
         shape.setParentItem(self)
+        self._rebuildBatch()
+
+    def setBatchPainting(self, value: bool) -> None:
+        """
+        Paint the static shapes of the instance and of its sub-instances per
+        layer from a layerBatch and hide their own items, or go back to
+        painting every shape item on its own. Top level instances with arrays
+        in them are always painted from a batch.
+        """
+        self._releaseBatch()
+        self._batch = None
+        if value or self._arrayBatched():
+            self._batch = layerBatch()
+            for row, column, offset in arr.arrayOffsets(self._arrayTuple):
+                self._batch.addShapes(self, self.childItems(),
+                                      arr.shiftTransform(offset), bool(row or column))
+            for shape in self._batch.shapes:
+                shape.setVisible(False)
+        self.update()
+
+    def _releaseBatch(self):
+        # show the shapes painted by the batch again and leave it empty
+        if self._batch is not None:
+            for shape in self._batch.shapes:
+                shape.setVisible(True)
+            self._batch = layerBatch()
+
+    def _arrayBatched(self) -> bool:
+        return (self.parentItem() is None and self.scene() is not None
+                and self._containsArray())
+
+    def _rebuildBatch(self):
+        if getattr(self, "_batch", None) is not None or self._arrayBatched():
+            self.setBatchPainting(bool(getattr(self.scene(), "batchPainting", False)))
+
+    def itemChange(self, change, value):
+        if change == QGraphicsItem.ItemParentHasChanged:
+            self._depth = None
+            if self.parentItem() is not None and self._batch is not None:
+                # the shapes are batched by the new top level instance
+                self._releaseBatch()
+                self._batch = None
+        if change == QGraphicsItem.ItemSceneHasChanged and self.parentItem() is None:
+            self.setBatchPainting(bool(getattr(value, "batchPainting", False)))
+        return super().itemChange(change, value)
 
 
 class layoutPcell(layoutInstance):
@@ -659,6 +1066,16 @@ class layoutPcell(layoutInstance):
         return f"layoutPcell({self._shapes}"
 
 
+def pcellParams(item: layoutInstance) -> dict:
+    """
+    Parameters of a pcell. Pcells are subclasses of the PDK base cells,
+    their init arguments are the parameters.
+    """
+    initArgs = inspect.signature(item.__class__.__init__).parameters
+    return {arg: getattr(item, arg) for arg in initArgs
+            if arg != "self" and hasattr(item, arg)}
+
+
 class layoutLine(layoutShape):
     def __init__(
         self,
@@ -682,7 +1099,13 @@ class layoutLine(layoutShape):
     def __repr__(self):
         return f"layoutLine({self._draftLine}, {self._layer}, {self._width})"
 
+    def clone(self) -> "layoutLine":
+        return self._placedCopy(
+            layoutLine(QLineF(self._draftLine), self._layer, self._width))
+
     def paint(self, painter, option, widget):
+        if self._lodSkip(option, painter) is None:
+            return
         if self.isSelected():
             painter.setPen(self._selectedPen)
         else:
@@ -741,6 +1164,12 @@ class layoutPath(layoutShape):
             f"{self._width}, {self._startExtend}, {self._endExtend}, {self._mode})"
         )
 
+    def clone(self) -> "layoutPath":
+        item = layoutPath(QLineF(self._draftLine), self._layer, self._width,
+                          self._startExtend, self._endExtend, self._mode)
+        item.name = self._name
+        return self._placedCopy(item)
+
     def _rectCorners(self, angle: float):
         match self._mode:
             case 0:  # manhattan
@@ -817,25 +1246,32 @@ class layoutPath(layoutShape):
         return rect
 
     def paint(self, painter, option, widget):
+        pixels = self._lodSkip(option, painter)
+        if pixels is None:
+            return
         # Get scale once and cache it
-        scale = self.scene().views()[0].transform().m11()
+        scale = self._levelOfDetail(option, painter)
         if self.isSelected():
             if self._stretch:
                 painter.setPen(self._stretchPen)
-                self._updateTransformedBrush(self._stretchBrush, scale)
+                brush = self._lodBrush(self._stretchBrush, pixels, scale)
             else:
                 painter.setPen(self._selectedPen)
-                self._updateTransformedBrush(self._selectedBrush, scale)
+                brush = self._lodBrush(self._selectedBrush, pixels, scale)
         else:
             painter.setPen(self._pen)
-            self._updateTransformedBrush(self._brush, scale)
-        painter.setBrush(self._transformedBrush)
+            brush = self._lodBrush(self._brush, pixels, scale)
+        painter.setBrush(brush)
         painter.drawLine(self._draftLine)
         painter.drawRect(self._rect)
 
     def boundingRect(self) -> QRectF:
         return self._rect.adjusted(-2, -2, 2, 2)
 
+    @property
+    def rect(self) -> QRectF:
+        return self._rect
+
     @property
     def draftLine(self):
         return self._draftLine
@@ -1000,6 +1436,11 @@ class layoutRuler(layoutShape):
             f"{self._tickLength}, {self._tickFont}, {self._mode})"
         )
 
+    def clone(self) -> "layoutRuler":
+        return self._placedCopy(
+            layoutRuler(QLineF(self._draftLine), self._width, self._tickGap,
+                        self._tickLength, self._tickFont, self._mode))
+
     def _determineAngle(self, angle: float):
         match self._mode:
             case 0:  # manhattan
@@ -1090,6 +1531,8 @@ class layoutRuler(layoutShape):
         )
 
     def paint(self, painter, option, widget):
+        if self._tileSkip():
+            return
         if self.isSelected():
             painter.setPen(self._selectedPen)
             painter.drawRect(self.childrenBoundingRect())
@@ -1193,6 +1636,12 @@ class layoutLabel(layoutShape):
             f"{self._labelOrient}, {self._layer})"
         )
 
+    def clone(self) -> "layoutLabel":
+        return self._placedCopy(
+            layoutLabel(self._start, self._labelText, self._fontFamily, self._fontStyle,
+                        self._fontHeight, self._labelAlign, self._labelOrient,
+                        self._layer))
+
     def setOrient(self):
         self.setTransformOriginPoint(self.mapFromScene(self._start))
         if self._labelOrient == layoutLabel.LABEL_ORIENTS[0]:
@@ -1230,6 +1679,14 @@ class layoutLabel(layoutShape):
         return path
 
     def paint(self, painter, option, widget):
+        if self._tileSkip():
+            return
+        if self.lodEnabled and not self.isSelected():
+            lod = self._levelOfDetail(option, painter)
+            # text layout is expensive, skip labels too small to read
+            if (self._rect.height() * lod < self.lodLabelPixels
+                    or self._lodHidden(lod)):
+                return
         painter.setFont(self._labelFont)
         if self.isSelected():
             painter.setPen(self._selectedPen)
@@ -1366,16 +1823,24 @@ class layoutPin(layoutShape):
             f"{self._pinType}, {self._layer})"
         )
 
+    def clone(self) -> "layoutPin":
+        return self._placedCopy(
+            layoutPin(self._rect.topLeft(), self._rect.bottomRight(), self._pinName,
+                      self._pinDir, self._pinType, self._layer))
+
     def paint(self, painter, option, widget):
+        pixels = self._lodSkip(option, painter)
+        if pixels is None:
+            return
         # Get scale once and cache it
-        scale = self.scene().views()[0].transform().m11()
+        scale = self._levelOfDetail(option, painter)
         if self.isSelected():
             painter.setPen(self._selectedPen)
-            self._updateTransformedBrush(self._selectedBrush, scale)
+            brush = self._lodBrush(self._selectedBrush, pixels, scale)
         else:
             painter.setPen(self._pen)
-            self._updateTransformedBrush(self._brush, scale)
-        painter.setBrush(self._brush)
+            brush = self._lodBrush(self._brush, pixels, scale)
+        painter.setBrush(brush)
         painter.drawRect(self._rect)
 
     def boundingRect(self):
@@ -1536,14 +2001,20 @@ class layoutVia(layoutShape):
     def __repr__(self):
         return f"layoutVia({self._start}, {self._end}, {self._layer})"
 
+    def clone(self) -> "layoutVia":
+        return self._placedCopy(
+            layoutVia(self._start, self._viaDefTuple, self.width, self.height))
+
     def paint(self, painter, option, widget):
-        scale = self.scene().views()[0].transform().m11()
+        pixels = self._lodSkip(option, painter)
+        if pixels is None:
+            return
+        scale = self._levelOfDetail(option, painter)
         if self.isSelected():
             painter.setPen(self._selectedPen)
         else:
             painter.setPen(self._pen)
-        self._updateTransformedBrush(self._brush, scale)
-        painter.setBrush(self._transformedBrush)
+        painter.setBrush(self._lodBrush(self._brush, pixels, scale))
         painter.drawRect(self._rect)
         painter.drawLine(self._rect.bottomLeft(), self._rect.topRight())
         painter.drawLine(self._rect.topLeft(), self._rect.bottomRight())
@@ -1610,6 +2081,11 @@ class layoutVia(layoutShape):
 
 
 class layoutViaArray(layoutShape):
+    """
+    Array of via cuts painted by the array item itself. Cuts are only stored
+    as rectangles, there are no child items.
+    """
+
     def __init__(self, start: QPoint, prototype_via, xs: float,
                  ys: float, xnum: int, ynum: int,
                  ):
@@ -1626,7 +2102,12 @@ class layoutViaArray(layoutShape):
                     self._prototype_via.width,
                     self._prototype_via.height
                 )
-        self._via_array = []
+        self._layer = self._prototype_via.viaDefTuple.layer
+        self._definePensBrushes(self._layer)
+        self.setZValue(self._layer.z)
+        self._cutRects = []  # list of QRectF, row major
+        self._cutDiagonals = []  # two QLineF per cut
+        self._arrayRect = QRectF()
         self._create_array()
         self.setFiltersChildEvents(True)
         self.setHandlesChildEvents(True)
@@ -1634,71 +2115,70 @@ class layoutViaArray(layoutShape):
         self._selectedPen = QPen(QColor("yellow"), 4, Qt.DashLine)
         self._selectedPen.setCosmetic(True)
 
+    def __repr__(self):
+        return (f"layoutViaArray({self._start}, {self._via}, {self._xs}, {self._ys}, "
+                f"{self._xnum}, {self._ynum})")
+
+    def clone(self) -> "layoutViaArray":
+        return self._placedCopy(
+            layoutViaArray(self._start, self._via, self._xs, self._ys, self._xnum,
+                           self._ynum))
+
     def _create_array(self):
         # Pre-calculate constants
         x_step = self._xs + self._prototype_via.width
         y_step = self._ys + self._prototype_via.height
         start_x, start_y = self._start.x(), self._start.y()
-        via_def = self._prototype_via.viaDefTuple
         via_width = self._prototype_via.width
         via_height = self._prototype_via.height
 
-        # Create flat list using itertools.product
-        vias = [self._create_via(start_x + col * x_step, start_y + row * y_step,
-                                 via_def, via_width, via_height)
-                for row, col in
-                itertools.product(range(self._ynum), range(self._xnum))]
-
-        # Reshape into 2D array
-        self._via_array = [vias[i:i + self._xnum] for i in
-                           range(0, len(vias), self._xnum)]
-
-    def _create_via(self, x, y, via_def, width, height):
-        via = layoutVia(QPoint(x, y), via_def, width, height)
-        via.setFlag(QGraphicsItem.ItemIsSelectable, False)
-        via.setFlag(QGraphicsItem.ItemStacksBehindParent, True)
-        via.setParentItem(self)
-        return via
-
-    # def _create_array(self):
-    #     self._via_array = []
-    #     for row in range(self._ynum):
-    #         via_row = []
-    #         for col in range(self._xnum):
-    #             x = self._start.x() + col * (self._xs +
-    #                                          self._prototype_via.width)
-    #             y = self._start.y() + row * (self._ys +
-    #                                          self._prototype_via.height)
-    #             via = layoutVia(
-    #                 QPoint(x, y),
-    #                 self._prototype_via.viaDefTuple,
-    #                 self._prototype_via.width,
-    #                 self._prototype_via.height
-    #             )
-    #             via.setFlag(QGraphicsItem.ItemIsSelectable, False)
-    #             via.setFlag(QGraphicsItem.ItemStacksBehindParent, True)
-    #             via.setParentItem(self)
-    #             via_row.append(via)
-    #         self._via_array.append(via_row)
+        self._cutRects = [
+            QRectF(start_x + col * x_step, start_y + row * y_step, via_width, via_height)
+            for row, col in itertools.product(range(self._ynum), range(self._xnum))
+        ]
+        self._cutDiagonals = []
+        for rect in self._cutRects:
+            self._cutDiagonals.append(QLineF(rect.bottomLeft(), rect.topRight()))
+            self._cutDiagonals.append(QLineF(rect.topLeft(), rect.bottomRight()))
+        self.prepareGeometryChange()
+        self._arrayRect = QRectF(
+            start_x,
+            start_y,
+            (self._xnum - 1) * x_step + via_width,
+            (self._ynum - 1) * y_step + via_height,
+        ).normalized().adjusted(-2, -2, 2, 2)
 
     def boundingRect(self) -> QRectF:
-        return self.childrenBoundingRect()
+        return self._arrayRect
 
     def shape(self) -> QPainterPath:
         path = QPainterPath()
-        path.addRect(self.childrenBoundingRect())
+        path.addRect(self.boundingRect())
         return path
 
     def paint(self, painter, option, widget):
+        pixels = self._lodSkip(option, painter)
+        if pixels is None:
+            return
         painter.setRenderHint(QPainter.NonCosmeticBrushPatterns)
+        scale = self._levelOfDetail(option, painter)
+        # the texture follows the size of a single cut
+        cutPixels = pixels * self.width / max(self._arrayRect.width(),
+                                              self._arrayRect.height(), 1)
+        painter.setPen(self._pen)
+        painter.setBrush(self._lodBrush(self._brush, cutPixels, scale))
+        painter.drawRects(self._cutRects)
+        painter.drawLines(self._cutDiagonals)
         if option.state & QStyle.State_Selected:
             painter.setPen(self._selectedPen)
-            painter.drawRect(self.childrenBoundingRect())
-
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRect(self.boundingRect())
 
     @property
     def via_array(self):
-        return self._via_array
+        """Cut rectangles as a list of rows."""
+        return [self._cutRects[i:i + self._xnum] for i in
+                range(0, len(self._cutRects), self._xnum)]
 
     @property
     def ynum(self):
@@ -1915,18 +2395,24 @@ class layoutPolygon(layoutShape):
     def __repr__(self):
         return f"layoutPolygon({self._points}, {self._layer})"
 
+    def clone(self) -> "layoutPolygon":
+        return self._placedCopy(layoutPolygon(list(self._points), self._layer))
+
     def paint(self, painter, option, widget):
-        scale = self.scene().views()[0].transform().m11()
+        pixels = self._lodSkip(option, painter)
+        if pixels is None:
+            return
+        scale = self._levelOfDetail(option, painter)
         if self.isSelected():
             painter.setPen(self._selectedPen)
-            self._updateTransformedBrush(self._selectedBrush, scale)
+            brush = self._lodBrush(self._selectedBrush, pixels, scale)
 
             if self._stretch and self._selectedCorner != QPoint(99999, 99999):
                 painter.drawEllipse(self._selectedCorner, 5, 5)
         else:
             painter.setPen(self._pen)
-            self._updateTransformedBrush(self._brush, scale)
-        painter.setBrush(self._transformedBrush)
+            brush = self._lodBrush(self._brush, pixels, scale)
+        painter.setBrush(brush)
         painter.drawPolygon(self._polygon)
 
 
@@ -207,6 +207,17 @@ class schematicNet(QGraphicsItem):
     def __repr__(self):
         return f"schematicNet({self.sceneEndPoints}, {self._width})"
 
+    def clone(self) -> "schematicNet":
+        """Copy of the net with its name, not in any scene."""
+        item = schematicNet(self._draftLine.p1(), self._draftLine.p2(), self._width,
+                            self._mode)
+        item._angle = self._angle
+        item.setRotation(self.rotation())
+        item.setPos(self.pos())
+        item.name = self.name
+        item.nameStrength = self.nameStrength
+        return item
+
     def itemChange(self, change, value):
         if self.scene():
             match change:
@@ -34,6 +34,8 @@ from PySide6.QtWidgets import (QGraphicsItem, QGraphicsSceneMouseEvent,
                                QGraphicsSceneHoverEvent, QStyle, QGraphicsScene,
                                QGraphicsRectItem, QGraphicsSimpleTextItem,
                                QGraphicsPolygonItem)
+import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.common.arrays as arr
 import revedaEditor.common.net as net
 from revedaEditor.common.labels import symbolLabel
 from revedaEditor.backend.pdkPaths import importPDKModule
@@ -60,6 +62,22 @@ class symbolShape(QGraphicsItem):
     def __repr__(self):
         return "symbolShape()"
 
+    def _placedCopy(self, item: "symbolShape") -> "symbolShape":
+        # gives a clone() built from the state in memory the placement of
+        # this shape. Every geometry change goes through itemChange, so only
+        # the placement that differs from the new item is set
+        item._angle = self._angle
+        item._flipTuple = self._flipTuple
+        if item.transformOriginPoint() != self.transformOriginPoint():
+            item.setTransformOriginPoint(self.transformOriginPoint())
+        if item.rotation() != self.rotation():
+            item.setRotation(self.rotation())
+        if item.transform() != self.transform():
+            item.setTransform(self.transform())
+        if item.pos() != self.pos():
+            item.setPos(self.pos())
+        return item
+
     @property
     def pen(self):
         return self._pen
@@ -215,6 +233,9 @@ class symbolRectangle(symbolShape):
     def __repr__(self):
         return f"symbolRectangle({self._start},{self._end})"
 
+    def clone(self) -> "symbolRectangle":
+        return self._placedCopy(symbolRectangle(self._start, self._end))
+
     @property
     def rect(self):
         return self._rect
@@ -395,6 +416,9 @@ class symbolCircle(symbolShape):
     def __repr__(self):
         return f"symbolCircle({self._centre},{self._end})"
 
+    def clone(self) -> "symbolCircle":
+        return self._placedCopy(symbolCircle(self._centre, self._end))
+
     @property
     def radius(self):
         return self._radius
@@ -627,6 +651,11 @@ class symbolArc(symbolShape):
     def __repr__(self) -> str:
         return f"symbolArc({self._start},{self._end})"
 
+    def clone(self) -> "symbolArc":
+        item = symbolArc(self._start, self._end)
+        item.arcType = self._arcType
+        return self._placedCopy(item)
+
     @property
     def start(self) -> QPoint:
         return self._start
@@ -754,6 +783,9 @@ class symbolLine(symbolShape):
     def __repr__(self):
         return f"symbolLine({self._start}, {self._end})"
 
+    def clone(self) -> "symbolLine":
+        return self._placedCopy(symbolLine(self._start, self._end))
+
     def _updateGeometry(self):
         self._line = QLine(self._start, self._end)
         self._rect = QRect(self._start, self._end).normalized()
@@ -863,6 +895,9 @@ class symbolPolygon(symbolShape):
     def __repr__(self):
         return f"symbolPolygon({self._points})"
 
+    def clone(self) -> "symbolPolygon":
+        return self._placedCopy(symbolPolygon(list(self._points)))
+
     def paint(self, painter, option, widget):
         # Cache the selection state to avoid multiple calls
         is_selected = self.isSelected()
@@ -1010,6 +1045,10 @@ class symbolPin(symbolShape):
     def __repr__(self):
         return f"pin({self._start},{self._pinName}, {self._pinDir}, {self._pinType})"
 
+    def clone(self) -> "symbolPin":
+        return self._placedCopy(
+            symbolPin(self._start, self._pinName, self._pinDir, self._pinType))
+
     def mouseReleaseEvent(self, event: QGraphicsSceneMouseEvent) -> None:
         super().mouseReleaseEvent(event)
         self.setSelected(True)
@@ -1132,6 +1171,12 @@ class text(symbolShape):
                 f" {self._textFont.style()}, {self._textHeight}, {self._textAlign},"
                 f"{self._textOrient})")
 
+    def clone(self) -> "text":
+        return self._placedCopy(
+            text(self._start, self._textContent, self._textFont.family(),
+                 self._textFont.styleName(), self._textHeight, self._textAlign,
+                 self._textOrient))
+
     def setOrient(self):
         if self._textOrient == text.textOrients[0]:
             self.setRotation(0)
@@ -1173,6 +1218,10 @@ class text(symbolShape):
             self._rect.width(), self._rect.height(), ).normalized().adjusted(-2, -2, 2, 2))
 
     def paint(self, painter, option, widget):
+        if not option.state & QStyle.State_Selected:
+            lod = option.levelOfDetailFromTransform(painter.worldTransform())
+            if self._rect.height() * lod < symbolLabel.lodTextPixels:
+                return
         painter.setFont(self._textFont)
         if option.state & QStyle.State_Selected:
             painter.setPen(schlyr.selectedTextPen)
@@ -1295,6 +1344,10 @@ class schematicSymbol(symbolShape):
         self._snapLines: dict[symbolPin, set[net.schematicNet]] = dict()
         self._shapeRectF = QRectF(0, 0, 0, 0)
         self._borderRect = QRect(0, 0, 0, 0)
+        # columns, rows and pitches when placed as an array, see arrayTuple
+        self._arrayTuple = ddef.instanceArrayTuple()
+        # PDK callback object shared by the PyLabels, see labels.labelCallbacks
+        self.labelCallbacks = None
 
         self._setup_graphics()
         self.addShapes()
@@ -1316,9 +1369,53 @@ class schematicSymbol(symbolShape):
             elif type(item) is symbolLabel:
                 self._labels[item.labelName] = item
 
+    def evaluateLabels(self):
+        """
+        Evaluate all label definitions, PyLabels last as their callbacks read
+        the values of the other labels.
+        """
+        for label in sorted(self._labels.values(),
+                            key=lambda label: label.labelType == "PyLabel"):
+            label.labelDefs()
+
+    def updateLabels(self, labelNames: Set[str]) -> None:
+        """
+        Evaluate the named labels and the PyLabels whose callback results were
+        dropped because a label they read has changed.
+        """
+        for label in sorted(self._labels.values(),
+                            key=lambda label: label.labelType == "PyLabel"):
+            if label.labelType == "PyLabel":
+                if not label.callbackCached():
+                    label.labelDefs()
+            elif label.labelName in labelNames:
+                label.labelDefs()
+
     def __repr__(self):
         return f"schematicSymbol({self._instanceName})"
 
+    def clone(self) -> "schematicSymbol":
+        """
+        Copy of the instance made from the shapes and labels in memory,
+        without reading the symbol view again.
+        """
+        # invisible placeholders of unknown symbol items are not copied
+        shapes = [shape.clone() for shape in self._shapes if hasattr(shape, "clone")]
+        item = schematicSymbol(shapes, dict(self._symattrs))
+        item._libraryName = self._libraryName
+        item._cellName = self._cellName
+        item._viewName = self._viewName
+        item._instanceName = self._instanceName
+        item._counter = self._counter
+        item._netlistIgnore = self._netlistIgnore
+        item._draft = self._draft
+        item._arrayTuple = self._arrayTuple
+        if self.labelCallbacks is not None:
+            item.labelCallbacks = self.labelCallbacks.copy(item._labels)
+        if hasattr(self, "labelDict"):
+            item.labelDict = dict(self.labelDict)
+        return self._placedCopy(item)
+
     def shape(self):
         path = QPainterPath()
         validTypes = (symbolRectangle, symbolLine, symbolArc, symbolCircle, symbolPolygon,)
@@ -1333,7 +1430,7 @@ class schematicSymbol(symbolShape):
             bounding_rect = bounding_rect.united(shape.sceneBoundingRect())
 
         # Add the rectangle to the path
-        path.addRect(self.mapRectFromScene(bounding_rect))
+        path.addRect(arr.arrayRect(self.mapRectFromScene(bounding_rect), self._arrayTuple))
 
         return path
 
@@ -1425,9 +1522,23 @@ class schematicSymbol(symbolShape):
                 self.boundingRect().topRight())
             painter.drawLine(self.boundingRect().topLeft(),
                 self.boundingRect().bottomRight())
+        if arr.isArray(self._arrayTuple):
+            arr.paintCopies(painter, self._elementCopies(), option, widget)
+
+    def _elementCopies(self) -> list:
+        # the child items of the first element at the offsets of the others
+        items = []
+        stack = self.childItems()
+        while stack:
+            item = stack.pop()
+            items.append((item, item.itemTransform(self)[0]))
+            stack.extend(item.childItems())
+        return [(item, transform * arr.shiftTransform(offset))
+                for row, column, offset in arr.arrayOffsets(self._arrayTuple)
+                if row or column for item, transform in items]
 
     def boundingRect(self):
-        return self.childrenBoundingRect()
+        return arr.arrayRect(self.childrenBoundingRect(), self._arrayTuple)
 
     def findPinNetIndexTuples(self):
         """
@@ -1614,6 +1725,21 @@ class schematicSymbol(symbolShape):
     def start(self):
         return self._start.toPoint()
 
+    @property
+    def arrayTuple(self) -> ddef.instanceArrayTuple:
+        return self._arrayTuple
+
+    @arrayTuple.setter
+    def arrayTuple(self, value: ddef.instanceArrayTuple):
+        """
+        Place the symbol as an array of columns x rows elements. The child
+        items are those of the first element, the other elements are painted
+        from them and netlisted as arr.symbolArrayElement.
+        """
+        self.prepareGeometryChange()
+        self._arrayTuple = ddef.instanceArrayTuple(*value)
+        self.update()
+
 
 class schematicPinPolygon(QGraphicsPolygonItem):
     def __init__(self, polygon: Union[QPolygonF, QPolygon], parent: QGraphicsScene):
@@ -1675,6 +1801,10 @@ class schematicPin(symbolShape):
         return (f"schematicPin({self._start}, {self._pinName}, {self._pinDir}, "
                 f"{self._pinType})")
 
+    def clone(self) -> "schematicPin":
+        return self._placedCopy(
+            schematicPin(self._start, self._pinName, self._pinDir, self._pinType))
+
     def paint(self, painter, option, widget):
         if self.isSelected():
             painter.setPen(schlyr.selectedSchematicPinPen)
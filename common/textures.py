@@ -0,0 +1,157 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Tuple, Union
+
+import numpy as np
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor, QImage, QPixmap
+
+
+class textureCache:
+    """
+    Stipple textures shared by the layout shapes and the layer select window.
+
+    A texture file is a text matrix of 0/1 values. Set pixels get the layer
+    colour, the others the background colour. The ARGB32 pixel buffer is
+    built with numpy and wrapped by QImage without copying. Pixmaps are
+    cached per (pattern, colour, background, scale). If diskCachePath is set,
+    e.g. through the REVEDA_TEXTURE_CACHE environment variable, the generated
+    images are also kept as PNG files between sessions.
+    """
+
+    _file_content_cache: Dict[str, str] = {}
+    _pattern_cache: Dict[str, np.ndarray] = {}
+    _pixmap_cache: Dict[Tuple, QPixmap] = {}
+    diskCachePath: Union[Path, None] = (
+        Path(os.environ["REVEDA_TEXTURE_CACHE"])
+        if os.environ.get("REVEDA_TEXTURE_CACHE")
+        else None
+    )
+
+    @classmethod
+    def readFileContent(cls, filePath):
+        if filePath not in cls._file_content_cache:
+            with open(filePath, "r") as file:
+                cls._file_content_cache[filePath] = file.read()
+        return cls._file_content_cache[filePath]
+
+    @classmethod
+    def readPattern(cls, filePath) -> np.ndarray:
+        filePath = str(filePath)
+        pattern = cls._pattern_cache.get(filePath)
+        if pattern is None:
+            rows = [line.split() for line in cls.readFileContent(filePath).splitlines()
+                    if line.strip()]
+            pattern = np.array(rows, dtype=np.uint8)
+            cls._pattern_cache[filePath] = pattern
+        return pattern
+
+    @staticmethod
+    def _argb(color: QColor, alpha: Union[int, None]) -> int:
+        color = QColor(color)
+        if alpha is not None:
+            color.setAlpha(alpha)
+        return color.rgba()
+
+    @classmethod
+    def _cacheKey(cls, filePath, color, scale, alpha, background) -> Tuple:
+        return (str(filePath), cls._argb(color, alpha), cls._argb(background, None),
+                scale)
+
+    @classmethod
+    def createImage(cls, filePath: Path, color: QColor, scale: int = 1,
+                    alpha: Union[int, None] = 64,
+                    background: QColor = Qt.transparent) -> QImage:
+        """
+        Create the texture image. alpha overrides the alpha of the layer colour,
+        None keeps it as it is.
+        """
+        key = cls._cacheKey(filePath, color, scale, alpha, background)
+        pattern = cls.readPattern(filePath)
+        if scale > 1:
+            pattern = np.repeat(np.repeat(pattern, scale, axis=0), scale, axis=1)
+        pixels = np.where(
+            pattern == 1,
+            np.uint32(key[1]),
+            np.uint32(key[2]),
+        ).astype(np.uint32)
+        pixels = np.ascontiguousarray(pixels)
+        height, width = pixels.shape
+        image = QImage(pixels.data, width, height, width * 4,
+                       QImage.Format.Format_ARGB32)
+        # the image does not own its pixels, keep the buffer alive with it.
+        image._buffer = pixels
+        return image
+
+    @classmethod
+    def getCachedPixmap(cls, texturePath, color: QColor, scale: int = 4,
+                        alpha: Union[int, None] = 64,
+                        background: QColor = Qt.transparent) -> QPixmap:
+        key = cls._cacheKey(texturePath, color, scale, alpha, background)
+        pixmap = cls._pixmap_cache.get(key)
+        if pixmap is None:
+            pixmap = cls._loadFromDisk(key)
+            if pixmap is None:
+                image = cls.createImage(texturePath, color, scale, alpha, background)
+                pixmap = QPixmap.fromImage(image)
+                cls._saveToDisk(key, image)
+            cls._pixmap_cache[key] = pixmap
+        return pixmap
+
+    @classmethod
+    def _diskCacheFile(cls, key: Tuple) -> Path:
+        content = cls.readFileContent(key[0])
+        digest = hashlib.sha1(f"{content}|{key[1:]}".encode()).hexdigest()
+        return cls.diskCachePath / f"{digest}.png"
+
+    @classmethod
+    def _loadFromDisk(cls, key: Tuple) -> Union[QPixmap, None]:
+        if cls.diskCachePath is None:
+            return None
+        cacheFile = cls._diskCacheFile(key)
+        if cacheFile.is_file():
+            pixmap = QPixmap(str(cacheFile))
+            if not pixmap.isNull():
+                return pixmap
+        return None
+
+    @classmethod
+    def _saveToDisk(cls, key: Tuple, image: QImage) -> None:
+        if cls.diskCachePath is None:
+            return
+        try:
+            cls.diskCachePath.mkdir(parents=True, exist_ok=True)
+            image.save(str(cls._diskCacheFile(key)), "PNG")
+        except OSError:
+            pass
+
+    @classmethod
+    def clearCaches(cls):
+        cls._file_content_cache.clear()
+        cls._pattern_cache.clear()
+        cls._pixmap_cache.clear()
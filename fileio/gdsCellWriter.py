@@ -0,0 +1,338 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+"""
+Qt-free conversion of gdstk cells read from GDSII or OASIS files to Revolution
+EDA layout view files.
+
+The functions in this module only depend on gdstk and the standard library so
+that they can run in worker processes of a process pool without creating a
+QApplication or importing the PDK.
+"""
+
+import json
+import pathlib
+from math import cos, degrees, sin
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import gdstk
+
+import revedaEditor.backend.metrics as metrics
+
+# (gdsLayer, datatype) -> index of the layer in laylyr.pdkAllLayers
+layerMapType = Dict[Tuple[int, int], int]
+
+# cells of the GDS files read by this process, keyed by the GDS file path.
+_gdsCellCache: Dict[str, Dict[str, gdstk.Cell]] = {}
+
+# name of the cell index written to the library directory by a lazy import
+gdsIndexName = "gdsIndex.json"
+
+# lazy import indices keyed by the library path
+_gdsIndexCache: Dict[str, dict] = {}
+
+
+def gdsLayerMap(pdkLayers) -> layerMapType:
+    """
+    Build the lookup table used to convert GDS layer/datatype pairs to the
+    layer indices stored in the layout files. The first PDK layer wins if
+    several layers share the same GDS layer/datatype pair.
+    """
+    layerMap = {}
+    for index, layer in enumerate(pdkLayers):
+        layerMap.setdefault((layer.gdsLayer, layer.datatype), index)
+    return layerMap
+
+
+def isOASISFile(filePath) -> bool:
+    return pathlib.Path(filePath).suffix.lower() in (".oas", ".oasis")
+
+
+@metrics.traced("gds.read")
+def readLayoutLibrary(filePath) -> gdstk.Library:
+    """Read a GDSII or, by file suffix, an OASIS file."""
+    if isOASISFile(filePath):
+        return gdstk.read_oas(str(filePath))
+    return gdstk.read_gds(str(filePath))
+
+
+@metrics.traced("gds.write")
+def writeLayoutLibrary(library: gdstk.Library, filePath) -> None:
+    """Write a library as GDSII or, by file suffix, as OASIS."""
+    if isOASISFile(filePath):
+        library.write_oas(str(filePath))
+    else:
+        library.write_gds(str(filePath))
+
+
+def convertLayoutFile(inputPath, outputPath) -> None:
+    """
+    Convert between GDSII and OASIS keeping the cell hierarchy, e.g.
+    convertLayoutFile("top.gds", "top.oas"). Does not need a GUI.
+    """
+    writeLayoutLibrary(readLayoutLibrary(inputPath), outputPath)
+
+
+def _point(point) -> Tuple[int, int]:
+    return int(round(point[0])), int(round(point[1]))
+
+
+def _polygonDict(points, layerIndex: int) -> dict:
+    return {
+        "type": "Polygon",
+        "ps": [_point(point) for point in points],
+        "ln": layerIndex,
+        "ang": 0,
+        "fl": (1, 1),
+    }
+
+
+def _instanceVector(vector, ref: gdstk.Reference) -> Tuple[float, float]:
+    # undo the rotation and reflection of the reference
+    x = vector[0] * cos(ref.rotation) + vector[1] * sin(ref.rotation)
+    y = -vector[0] * sin(ref.rotation) + vector[1] * cos(ref.rotation)
+    return x, -y if ref.x_reflection else y
+
+
+def _repetitionArray(ref: gdstk.Reference) -> Optional[list]:
+    """
+    Columns, rows and pitches in instance coordinates of a reference repeated
+    along the axes of the instance, None for other repetitions.
+    """
+    repetition = ref.repetition
+    if repetition.columns is None:
+        return None
+    if repetition.spacing is not None:
+        columnVector = (repetition.spacing[0], 0)
+        rowVector = (0, repetition.spacing[1])
+    else:
+        columnVector, rowVector = repetition.v1, repetition.v2
+    xPitch, columnY = _point(_instanceVector(columnVector, ref))
+    rowX, yPitch = _point(_instanceVector(rowVector, ref))
+    if columnY or rowX:
+        return None
+    return [repetition.columns, repetition.rows, xPitch, yPitch]
+
+
+def cellShapeDicts(
+    cell: gdstk.Cell, libraryName: str, layerMap: layerMapType
+) -> Iterator[dict]:
+    """
+    Generator that yields the layout file dictionaries of a cell. Arrays of
+    references become array instances, other repetitions one instance per
+    element.
+    """
+    counter = 0
+    for ref in cell.references:
+        repetition = ref.repetition
+        array = _repetitionArray(ref) if repetition.size > 1 else None
+        if array is not None or repetition.size < 2:
+            offsets = [(0, 0)]
+        else:
+            offsets = repetition.get_offsets()
+        # GDS reflects before rotating, layout instances are flipped after
+        # rotating, so reflected references are rotated the other way
+        angle = degrees(-ref.rotation if ref.x_reflection else ref.rotation)
+        for offset in offsets:
+            counter += 1
+            instDict = {
+                "type": "Inst",
+                "lib": libraryName,
+                "cell": ref.cell_name,
+                "view": "layout",
+                "nam": f"I{counter}",
+                "ic": counter,
+                "loc": _point((ref.origin[0] + offset[0], ref.origin[1] + offset[1])),
+                "ang": angle,
+                "fl": (1, -1) if ref.x_reflection else (1, 1),
+            }
+            if ref.x_reflection:
+                # GDS reflects about the reference origin, layout instances
+                # about their centre, the loader moves the instance to match
+                instDict["flo"] = 1
+            if array is not None:
+                instDict["arr"] = array
+            yield instDict
+
+    for polygon in cell.polygons:
+        layerIndex = layerMap.get((polygon.layer, polygon.datatype))
+        if layerIndex is not None:
+            yield _polygonDict(polygon.points, layerIndex)
+
+    for path in cell.paths:
+        for polygon in path.to_polygons():
+            layerIndex = layerMap.get((polygon.layer, polygon.datatype))
+            if layerIndex is not None:
+                yield _polygonDict(polygon.points, layerIndex)
+
+    for label in cell.labels:
+        layerIndex = layerMap.get((label.layer, 0))
+        if layerIndex is None:
+            continue
+        yield {
+            "type": "Label",
+            "st": _point(label.origin),
+            "lt": label.text,
+            "ff": "Arial",
+            "fs": "Regular",
+            "fh": "10",
+            "la": "Center",
+            "lo": "R0",
+            "ln": layerIndex,
+            "ang": degrees(label.rotation),
+            "fl": (1, 1),
+        }
+
+
+def writeCellView(
+    cell: gdstk.Cell,
+    viewPath: pathlib.Path,
+    libraryName: str,
+    layerMap: layerMapType,
+) -> None:
+    """Write the layout view file of a single cell."""
+    with pathlib.Path(viewPath).open("w") as file:
+        file.write("[\n")
+        file.write('    {"viewType": "layout"},\n')
+        file.write('    {"snapGrid": [10, 10]}')
+        for shapeDict in cellShapeDicts(cell, libraryName, layerMap):
+            file.write(",\n")
+            json.dump(shapeDict, file, indent=4)
+        file.write("\n]")
+
+
+def gdsCells(gdsPath: str) -> Dict[str, gdstk.Cell]:
+    """Read a GDS/OASIS file once per process and return its cells by name."""
+    cells = _gdsCellCache.get(gdsPath)
+    if cells is None:
+        cells = {cell.name: cell for cell in readLayoutLibrary(gdsPath).cells}
+        _gdsCellCache[gdsPath] = cells
+    return cells
+
+
+def convertCell(
+    gdsPath: str,
+    cellName: str,
+    viewPath: str,
+    libraryName: str,
+    layerMap: layerMapType,
+) -> str:
+    """
+    Process pool entry point: find the named cell in the GDS file and write
+    its layout view. Returns the cell name so that the caller can report
+    progress.
+    """
+    cell = gdsCells(gdsPath).get(cellName)
+    if cell is None:
+        raise KeyError(f"{cellName} is not in {gdsPath}")
+    writeCellView(cell, pathlib.Path(viewPath), libraryName, layerMap)
+    return cellName
+
+
+def writeGDSIndex(
+    libraryPath: pathlib.Path, gdsPath: pathlib.Path, cells: Iterable[gdstk.Cell]
+) -> dict:
+    """
+    Record the names, bounding boxes and hierarchy of the cells of a lazily
+    imported GDS file. All cells start as pending, i.e. their layout views are
+    only placeholders until materializeCellView is called.
+    """
+    cellsDict = {}
+    for cell in cells:
+        bbox = cell.bounding_box()
+        cellsDict[cell.name] = {
+            "bbox": None if bbox is None else [_point(bbox[0]), _point(bbox[1])],
+            "refs": sorted({ref.cell_name for ref in cell.references}),
+        }
+    gdsIndex = {
+        "source": str(pathlib.Path(gdsPath).resolve()),
+        "cells": cellsDict,
+        "pending": sorted(cellsDict),
+    }
+    _saveGDSIndex(pathlib.Path(libraryPath), gdsIndex)
+    return gdsIndex
+
+
+def readGDSIndex(libraryPath: pathlib.Path) -> Optional[dict]:
+    """Return the lazy import index of a library or None if it has none."""
+    key = str(libraryPath)
+    if key not in _gdsIndexCache:
+        indexPath = pathlib.Path(libraryPath).joinpath(gdsIndexName)
+        gdsIndex = None
+        if indexPath.is_file():
+            with indexPath.open("r") as file:
+                gdsIndex = json.load(file)
+        # libraries without an index are cached too, as this is called for
+        # every layout view that is opened or instantiated.
+        _gdsIndexCache[key] = gdsIndex
+    return _gdsIndexCache[key]
+
+
+def pendingCellBBox(viewPath: pathlib.Path) -> Optional[list]:
+    """
+    Return the bounding box recorded at import time of a lazily imported cell
+    whose layout view is not written yet, otherwise None.
+    """
+    viewPath = pathlib.Path(viewPath)
+    gdsIndex = readGDSIndex(viewPath.parent.parent)
+    cellName = viewPath.parent.name
+    if gdsIndex is None or cellName not in gdsIndex["pending"]:
+        return None
+    return gdsIndex["cells"][cellName]["bbox"]
+
+
+def removeGDSIndex(libraryPath: pathlib.Path) -> None:
+    """Remove the lazy import index of a library, e.g. on a full re-import."""
+    pathlib.Path(libraryPath).joinpath(gdsIndexName).unlink(missing_ok=True)
+    _gdsIndexCache[str(libraryPath)] = None
+
+
+def _saveGDSIndex(libraryPath: pathlib.Path, gdsIndex: dict) -> None:
+    indexPath = libraryPath.joinpath(gdsIndexName)
+    tempPath = indexPath.with_suffix(".tmp")
+    with tempPath.open("w") as file:
+        json.dump(gdsIndex, file)
+    tempPath.replace(indexPath)
+    _gdsIndexCache[str(libraryPath)] = gdsIndex
+
+
+def materializeCellView(viewPath: pathlib.Path, layerMap: layerMapType) -> bool:
+    """
+    Write the layout view of a lazily imported cell from its source GDS file
+    if it has not been written yet. The view path is expected to be
+    <library>/<cell>/layout.json. Returns True if the view was written.
+    """
+    viewPath = pathlib.Path(viewPath)
+    libraryPath = viewPath.parent.parent
+    gdsIndex = readGDSIndex(libraryPath)
+    cellName = viewPath.parent.name
+    if gdsIndex is None or cellName not in gdsIndex["pending"]:
+        return False
+    cell = gdsCells(gdsIndex["source"]).get(cellName)
+    if cell is None:
+        raise KeyError(f"{cellName} is not in {gdsIndex['source']}")
+    writeCellView(cell, viewPath, libraryPath.name, layerMap)
+    gdsIndex["pending"].remove(cellName)
+    _saveGDSIndex(libraryPath, gdsIndex)
+    return True
@@ -23,7 +23,12 @@
 #
 
 import gdstk
+from PySide6.QtCore import QPointF
+
+import revedaEditor.backend.metrics as metrics
+import revedaEditor.common.arrays as arr
 import revedaEditor.common.layoutShapes as lshp
+import revedaEditor.fileio.gdsCellWriter as gcw
 import inspect
 from typing import List, Dict, Tuple, Any
 from pathlib import Path
@@ -32,7 +37,7 @@ pcells = importPDKModule('pcells')
 
 class gdsExporter:
     __slots__ = ('_cellname', '_items', '_outputFileObj', '_libraryName',
-                 '_unit', '_precision', '_topCell', '_itemCounter')
+                 '_unit', '_precision', '_topCell', '_itemCounter', '_cellCache')
 
     DEFAULT_UNIT = 1e-6
     DEFAULT_PRECISION = 1e-9
@@ -46,7 +51,9 @@ class gdsExporter:
         self._libraryName = None
         self._topCell = None
         self._itemCounter = 0
+        self._cellCache = {}  # via cells keyed by size and layer
 
+    @metrics.traced("gds.export")
     def gdsExport(self):
         self._outputFileObj.parent.mkdir(parents=True, exist_ok=True)
         lib = gdstk.Library(unit=self._unit, precision=self._precision)
@@ -54,7 +61,8 @@ class gdsExporter:
         for item in self._items:
             self.createCells(lib, item, self._topCell)
 
-        lib.write_gds(self._outputFileObj)
+        # OASIS if the output file has an .oas suffix, GDSII otherwise
+        gcw.writeLayoutLibrary(lib, self._outputFileObj)
 
     def createCells(self, library: gdstk.Library, item: lshp.layoutShape, parentCell: gdstk.Cell):
         item_type = type(item)
@@ -76,6 +84,7 @@ class gdsExporter:
     def _processInstance(self, library, item, parentCell):
         cellGDSName = f"{item.libraryName}_{item.cellName}_{item.viewName}_{self._itemCounter}"
         self._itemCounter += 1
+        metrics.count("gds.exportCells")
         cellGDS = library.new_cell(cellGDSName)
         for shape in item.shapes:
             self.createCells(library, shape, cellGDS)
@@ -83,8 +92,25 @@ class gdsExporter:
             cellGDS,
             (0,0)
         )
+        self._setRepetition(item, ref)
         parentCell.add(ref)
 
+    @staticmethod
+    def _setRepetition(item, ref: gdstk.Reference) -> None:
+        """
+        Array instances are written as one reference repeated over columns and
+        rows. The cell shapes are in scene coordinates, so the repetition
+        vectors are the pitches mapped to the scene.
+        """
+        array = item.arrayTuple
+        if not arr.isArray(array):
+            return
+        origin = item.mapToScene(QPointF(0, 0))
+        columnVector = item.mapToScene(QPointF(array.xPitch, 0)) - origin
+        rowVector = item.mapToScene(QPointF(0, array.yPitch)) - origin
+        ref.repetition = gdstk.Repetition(array.columns, array.rows,
+                                          v1=columnVector.toTuple(), v2=rowVector.toTuple())
+
     def _processRectPin(self, item, parentCell):
         rect = gdstk.rectangle(
             corner1=item.mapToScene(item.start).toPoint().toTuple(),
@@ -166,6 +192,7 @@ class gdsExporter:
                 pcellGDS,
                 (0,0),
             )
+            self._setRepetition(item, ref)
             parentCell.add(ref)
 
     @staticmethod
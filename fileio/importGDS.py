@@ -2,20 +2,28 @@ from PySide6.QtWidgets import (
     QMainWindow,
 )
 from PySide6.QtCore import (
-    QPoint, QLineF
+    QObject, Signal
 )
 import gdstk
-import revedaEditor.common.layoutShapes as lshp
 import revedaEditor.backend.libBackEnd as libb
-import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.backend.metrics as metrics
+import revedaEditor.fileio.gdsCellWriter as gcw
 from revedaEditor.backend.pdkPaths import importPDKModule
 
 fabproc = importPDKModule("process")
 laylyr = importPDKModule("layoutLayers")
+import os
 import pathlib
-import json
-import revedaEditor.fileio.layoutEncoder as layenc
-from numpy import pi
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# GDS layer lookup table used by materializeLayoutView
+_pdkLayerMap = None
+
+
+class gdsImportSignals(QObject):
+    # number of converted cells, total number of cells, last converted cell
+    progress = Signal(int, int, str)
 
 
 class gdsImporter:
@@ -24,95 +32,121 @@ class gdsImporter:
         parent: QMainWindow,
         inputFile: pathlib.Path,
         importLibItem: libb.libraryItem,
+        processes: int = 0,
+        lazy: bool = False,
     ):
+        """
+        processes: number of worker processes used to convert the cells. If it
+        is 0 or 1, cells are converted in the calling thread.
+        lazy: only record the cell index in the library. Layout views are
+        written from the GDS file when they are first opened or instantiated.
+        """
         self._parent = parent
         self.inputFile = inputFile
-        self._gdsLibrary = gdstk.read_gds(str(inputFile))
+        # GDSII or OASIS depending on the file suffix
+        self._gdsLibrary = gcw.readLayoutLibrary(inputFile)
         self._gdsLibrary.set_property("name", str(inputFile.stem))
         self._libraryModel = self._parent.libraryBrowser.libraryModel
         self._libItem = importLibItem
+        self.processes = processes
+        self.lazy = lazy
+        self.signals = gdsImportSignals()
 
         self._topCells = self._gdsLibrary.top_level()
         self._unit = 1
+        self._layerMap = gcw.gdsLayerMap(laylyr.pdkAllLayers)
+        # cell name -> layout view path, filled by createCellItems
+        self._viewPaths: dict[str, pathlib.Path] = {}
 
     def gdsImporter(self):
+        self.createCellItems()
+        self.convertCells()
 
-        for cell in self._topCells:
+    def createCellItems(self):
+        """
+        Create the cell and layout view items of all cells reachable from the
+        top cells. It touches the library model, so it must run in the GUI
+        thread.
+        """
+        cells = self._hierarchyCells()
+        for cell in cells:
             cellPath = self._libItem.libraryPath.joinpath(cell.name)
             cellItem = libb.createNewCellItem(self._libItem, cellPath)
             viewPath = cellItem.cellPath.joinpath("layout.json")
-            viewItem = libb.createCellviewItem("layout", viewPath)
-            self._processInstance(cell, viewItem)
+            libb.createCellviewItem("layout", viewPath)
+            self._viewPaths[cell.name] = viewPath
+        if self.lazy:
+            gcw.writeGDSIndex(self._libItem.libraryPath, self.inputFile, cells)
+        else:
+            gcw.removeGDSIndex(self._libItem.libraryPath)
 
-    def _processInstance(self, cell: gdstk.Cell, viewItem: libb.viewItem):
-        # Open file in context manager and write header
-        with viewItem.viewPath.open("w") as file:
-            file.write("[\n")
-            file.write('    {"viewType": "layout"},\n')
-            file.write('    {"snapGrid": [10, 10]},\n')
-            
-            # Track if we need to write comma between items
-            need_comma = False
-            
-            # Process instances
-            for shape in self._processShapes(cell, viewItem):
-                if need_comma:
-                    file.write(",\n")
-                json.dump(shape, file, cls=layenc.gdsImportEncoder, indent=4)
-                need_comma = True
-            
-            # Close the JSON array
-            file.write("\n]")
-        
-        return True  # Or return some status if needed
+    @metrics.traced("gds.convertCells")
+    def convertCells(self):
+        """
+        Write the layout views of the cells created by createCellItems. Does
+        not touch the library model and can run in a worker thread.
+        """
+        total = len(self._viewPaths)
+        if self.lazy:
+            self.signals.progress.emit(total, total, "")
+        elif self.processes > 1 and total > 1:
+            self._convertParallel(total)
+        else:
+            cells = {cell.name: cell for cell in self._gdsLibrary.cells}
+            for done, (cellName, viewPath) in enumerate(
+                self._viewPaths.items(), start=1
+            ):
+                gcw.writeCellView(
+                    cells[cellName],
+                    viewPath,
+                    self._libItem.libraryName,
+                    self._layerMap,
+                )
+                self.signals.progress.emit(done, total, cellName)
 
-    def _processShapes(self, cell: gdstk.Cell, viewItem: libb.viewItem):
-        """Generator that yields shapes one at a time."""
-        # Process references
-        for ref in cell.references:
-            cellPath = self._libItem.libraryPath.joinpath(ref.cell_name)
-            cellItem = libb.createNewCellItem(self._libItem, cellPath)
-            viewPath = cellItem.cellPath.joinpath("layout.json")
-            # Process nested instance first
-            self._processInstance(ref.cell, libb.createCellviewItem("layout", viewPath))
-            
-            layoutInstance = lshp.layoutInstance([])
-            layoutInstance.libraryName = cellItem.parent().libraryName
-            layoutInstance.cellName = cellItem.cellName
-            layoutInstance.viewName = viewItem.viewName
-            layoutInstance.counter = 1
-            layoutInstance.instanceName = 'I1'
-            layoutInstance.setPos(0,0)
-            layoutInstance.angle = ref.rotation * 180 / pi
-            layoutInstance.flipTuple = (1,1)
-            yield layoutInstance
+    def _convertParallel(self, total: int):
+        # spawn instead of fork: the parent process runs Qt threads.
+        context = multiprocessing.get_context("spawn")
+        workers = min(self.processes, total, os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(
+                    gcw.convertCell,
+                    str(self.inputFile),
+                    cellName,
+                    str(viewPath),
+                    self._libItem.libraryName,
+                    self._layerMap,
+                )
+                for cellName, viewPath in self._viewPaths.items()
+            ]
+            for done, future in enumerate(as_completed(futures), start=1):
+                self.signals.progress.emit(done, total, future.result())
 
-        # Process polygons
-        for polygon in cell.polygons:
-            layoutLayer = ddef.layLayer.filterByGDSLayer(
-                laylyr.pdkAllLayers, polygon.layer, polygon.datatype
+    def _hierarchyCells(self) -> list[gdstk.Cell]:
+        """Top cells and all the cells they reference, each cell once."""
+        cells = []
+        seen = set()
+        stack = list(self._topCells)
+        while stack:
+            cell = stack.pop()
+            if cell.name in seen:
+                continue
+            seen.add(cell.name)
+            cells.append(cell)
+            stack.extend(
+                ref.cell for ref in cell.references if isinstance(ref.cell, gdstk.Cell)
             )
-            if layoutLayer:
-                points = [QPoint(point[0], point[1]) for point in polygon.points]
-                yield lshp.layoutPolygon(points, layoutLayer)
+        return cells
 
-        # Process paths
-        for path in cell.paths:
-            for polygon in path.to_polygons():
-                layoutLayer = ddef.layLayer.filterByGDSLayer(
-                    laylyr.pdkAllLayers, polygon.layer, polygon.datatype
-                )
-                points = [QPoint(point[0], point[1]) for point in polygon.points]
-                yield lshp.layoutPolygon(points, layoutLayer)
 
-        for label in cell.labels:
-            textLayer= ddef.layLayer.filterByGDSLayer(
-                    laylyr.pdkAllLayers, label.layer,0)
-            if not textLayer:
-                continue
-            origin = QPoint(label.origin[0], label.origin[1])
-            angle = label.rotation * 180 / pi
-            label = lshp.layoutLabel(origin, label.text, "Arial", "Regular", "10", "Center", "R0", layoutLayer)
-            label.angle = angle
-            yield label
+def materializeLayoutView(viewPath: pathlib.Path) -> bool:
+    """
+    Write the layout view of a lazily imported GDS cell on first use. Returns
+    False for views that are not part of a lazy import or already written.
+    """
+    global _pdkLayerMap
+    if _pdkLayerMap is None:
+        _pdkLayerMap = gcw.gdsLayerMap(laylyr.pdkAllLayers)
+    return gcw.materializeCellView(viewPath, _pdkLayerMap)
 
@@ -23,136 +23,186 @@
 #
 
 import json
-import inspect
 
 from revedaEditor.backend.pdkPaths import importPDKModule
 laylyr = importPDKModule('layoutLayers')
 
+import revedaEditor.common.arrays as arr
 import revedaEditor.common.layoutShapes as lshp
 
 
+_layerIndices = {}
+
+
+def layerIndex(layer) -> int:
+    """Index of a layer in the PDK layer list, PDK layers are found by identity."""
+    index = _layerIndices.get(id(layer))
+    if index is None:
+        index = laylyr.pdkAllLayers.index(layer)
+        if laylyr.pdkAllLayers[index] is layer:
+            _layerIndices[id(layer)] = index
+    return index
+
+
+def _arrayEntry(itemDict: dict, item: lshp.layoutInstance) -> dict:
+    # only arrays are saved with their columns, rows and pitches
+    if arr.isArray(item.arrayTuple):
+        itemDict["arr"] = item.arrayTuple
+    return itemDict
+
+
+def _instanceDict(item: lshp.layoutInstance) -> dict:
+    return _arrayEntry({
+        "type": "Inst",
+        "lib": item.libraryName,
+        "cell": item.cellName,
+        "view": item.viewName,
+        "nam": item.instanceName,
+        "ic": item.counter,
+        "loc": (item.scenePos() - item.scene().origin).toTuple(),
+        "ang": item.angle,
+        "fl": item.flipTuple,
+    }, item)
+
+
+def _rectDict(item: lshp.layoutRect) -> dict:
+    return {
+        "type": "Rect",
+        "tl": item.mapToScene(item.rect.topLeft()).toTuple(),
+        "br": item.mapToScene(item.rect.bottomRight()).toTuple(),
+        "ang": item.angle,
+        "ln": layerIndex(item.layer),
+        "fl": item.flipTuple,
+    }
+
+
+def _pathDict(item: lshp.layoutPath) -> dict:
+    return {
+        "type": "Path",
+        "dfl1": item.mapToScene(item.draftLine.p1()).toTuple(),
+        "dfl2": item.mapToScene(item.draftLine.p2()).toTuple(),
+        "ln": layerIndex(item.layer),
+        "w": item.width,
+        "se": item.startExtend,
+        "ee": item.endExtend,
+        "md": item.mode,
+        "nam": item.name,
+        "ang": item.angle,
+        "fl": item.flipTuple,
+    }
+
+
+def _viaArrayDict(item: lshp.layoutViaArray) -> dict:
+    viaDict = {
+        "vdt": item.via.viaDefTuple.name,
+        "st": item.via.mapToScene(item.via.start).toTuple(),
+        "w": item.via.width,
+        "h": item.via.height,
+        "ang": item.angle,
+        "fl": item.flipTuple,
+    }
+    return {
+        "type": "Via",
+        "st": item.mapToScene(item.start).toTuple(),
+        "via": viaDict,
+        "xs": item.xs,
+        "ys": item.ys,
+        "xn": item.xnum,
+        "yn": item.ynum,
+    }
+
+
+def _pinDict(item: lshp.layoutPin) -> dict:
+    return {
+        "type": "Pin",
+        "tl": item.mapToScene(item.rect.topLeft()).toTuple(),
+        "br": item.mapToScene(item.rect.bottomRight()).toTuple(),
+        "pn": item.pinName,
+        "pd": item.pinDir,
+        "pt": item.pinType,
+        "ln": layerIndex(item.layer),
+        "ang": item.angle,
+        "fl": item.flipTuple,
+    }
+
+
+def _labelDict(item: lshp.layoutLabel) -> dict:
+    return {
+        "type": "Label",
+        "st": item.mapToScene(item.start).toTuple(),
+        "lt": item.labelText,
+        "ff": item.fontFamily,
+        "fs": item.fontStyle,
+        "fh": item.fontHeight,
+        "la": item.labelAlign,
+        "lo": item.labelOrient,
+        "ln": layerIndex(item.layer),
+        "ang": item.angle,
+        "fl": item.flipTuple,
+    }
+
+
+def _polygonDict(item: lshp.layoutPolygon) -> dict:
+    return {
+        "type": "Polygon",
+        "ps": [item.mapToScene(point).toTuple() for point in item.points],
+        "ln": layerIndex(item.layer),
+        "ang": item.angle,
+        "fl": item.flipTuple,
+    }
+
+
+def _rulerDict(item: lshp.layoutRuler) -> dict:
+    return {
+        "type": "Ruler",
+        "dfl1": item.mapToScene(item.draftLine.p1()).toTuple(),
+        "dfl2": item.mapToScene(item.draftLine.p2()).toTuple(),
+        "md": item.mode,
+        "ang": item.angle,
+        "fl": item.flipTuple,
+    }
+
+
+def _pcellDict(item) -> dict:
+    return _arrayEntry({
+        "type": "Pcell",
+        "lib": item.libraryName,
+        "cell": item.cellName,
+        "view": item.viewName,
+        "nam": item.instanceName,
+        "ic": item.counter,
+        "loc": item.pos().toPoint().toTuple(),
+        "ang": item.angle,
+        "fl": item.flipTuple,
+        "params": lshp.pcellParams(item),
+    }, item)
+
+
+# exact item type -> dictionary function, other types are pcells
+_itemDicts = {
+    lshp.layoutInstance: _instanceDict,
+    lshp.layoutRect: _rectDict,
+    lshp.layoutPath: _pathDict,
+    lshp.layoutViaArray: _viaArrayDict,
+    lshp.layoutPin: _pinDict,
+    lshp.layoutLabel: _labelDict,
+    lshp.layoutPolygon: _polygonDict,
+    lshp.layoutRuler: _rulerDict,
+}
+
+
+def layoutItemDict(item) -> dict:
+    """
+    Plain dictionary of a layout item as it is saved. Encoding these with
+    one reused layoutEncoder avoids the JSONEncoder set-up for every item.
+    """
+    return _itemDicts.get(type(item), _pcellDict)(item)
+
+
 class layoutEncoder(json.JSONEncoder):
     def default(self, item):
-        match type(item):
-            case lshp.layoutInstance:
-                itemDict = {
-                    "type": "Inst",
-                    "lib": item.libraryName,
-                    "cell": item.cellName,
-                    "view": item.viewName,
-                    "nam": item.instanceName,
-                    "ic": item.counter,
-                    "loc": (item.scenePos() - item.scene().origin).toTuple(),
-                    # "loc": item.mapToScene(item.pos()).toTuple(),
-                    "ang": item.angle,
-                    "fl": item.flipTuple,
-                }
-            case lshp.layoutRect:
-                itemDict = {
-                    "type": "Rect",
-                    "tl": item.mapToScene(item.rect.topLeft()).toTuple(),
-                    "br": item.mapToScene(item.rect.bottomRight()).toTuple(),
-                    "ang": item.angle,
-                    "ln": laylyr.pdkAllLayers.index(item.layer),
-                    "fl": item.flipTuple,
-                }
-            case lshp.layoutPath:
-                itemDict = {
-                    "type": "Path",
-                    "dfl1": item.mapToScene(item.draftLine.p1()).toTuple(),
-                    "dfl2": item.mapToScene(item.draftLine.p2()).toTuple(),
-                    "ln": laylyr.pdkAllLayers.index(item.layer),
-                    "w": item.width,
-                    "se": item.startExtend,
-                    "ee": item.endExtend,
-                    "md": item.mode,
-                    "nam": item.name,
-                    "ang": item.angle,
-                    "fl": item.flipTuple,
-                }
-            case lshp.layoutViaArray:
-                viaDict = {
-                    "vdt": item.via.viaDefTuple.name,
-                    "st": item.via.mapToScene(item.via.start).toTuple(),
-                    "w": item.via.width,
-                    "h": item.via.height,
-                    "ang": item.angle,
-                    "fl": item.flipTuple,
-                }
-                itemDict = {
-                    "type": "Via",
-                    "st": item.mapToScene(item.start).toTuple(),
-                    "via": viaDict,
-                    "xs": item.xs,
-                    "ys": item.ys,
-                    "xn": item.xnum,
-                    "yn": item.ynum,
-                }
-            case lshp.layoutPin:
-                itemDict = {
-                    "type": "Pin",
-                    "tl": item.mapToScene(item.rect.topLeft()).toTuple(),
-                    "br": item.mapToScene(item.rect.bottomRight()).toTuple(),
-                    "pn": item.pinName,
-                    "pd": item.pinDir,
-                    "pt": item.pinType,
-                    "ln": laylyr.pdkAllLayers.index(item.layer),
-                    "ang": item.angle,
-                    "fl": item.flipTuple,
-                }
-            case lshp.layoutLabel:
-                itemDict = {
-                    "type": "Label",
-                    "st": item.mapToScene(item.start).toTuple(),
-                    "lt": item.labelText,
-                    "ff": item.fontFamily,
-                    "fs": item.fontStyle,
-                    "fh": item.fontHeight,
-                    "la": item.labelAlign,
-                    "lo": item.labelOrient,
-                    "ln": laylyr.pdkAllLayers.index(item.layer),
-                    "ang": item.angle,
-                    "fl": item.flipTuple,
-                }
-            case lshp.layoutPolygon:
-                pointsList = [item.mapToScene(point).toTuple() for point in item.points]
-                itemDict = {
-                    "type": "Polygon",
-                    "ps": pointsList,
-                    "ln": laylyr.pdkAllLayers.index(item.layer),
-                    "ang": item.angle,
-                    "fl": item.flipTuple,
-                }
-            case lshp.layoutRuler:
-                itemDict = {
-                    "type": "Ruler",
-                    "dfl1": item.mapToScene(item.draftLine.p1()).toTuple(),
-                    "dfl2": item.mapToScene(item.draftLine.p2()).toTuple(),
-                    "md": item.mode,
-                    "ang": item.angle,
-                    "fl": item.flipTuple,
-                }
-            case _:  # now check super class types:
-                match item.__class__.__bases__[0]:
-                    case baseCell:
-                        init_args = inspect.signature(item.__class__.__init__).parameters
-                        args_used = [param for param in init_args if (param != "self")]
-
-                        argDict = {arg: getattr(item, arg) for arg in args_used if hasattr(item, arg)}
-                        itemDict = {
-                            "type": "Pcell",
-                            "lib": item.libraryName,
-                            "cell": item.cellName,
-                            "view": item.viewName,
-                            "nam": item.instanceName,
-                            "ic": item.counter,
-                            "loc": item.pos().toPoint().toTuple(),
-                            "ang": item.angle,
-                            "fl": item.flipTuple,
-                            "params": argDict,
-                        }
-        return itemDict
-    
+        return layoutItemDict(item)
+
 
 class gdsImportEncoder(json.JSONEncoder):
     def default(self, item):
@@ -169,12 +219,13 @@ class gdsImportEncoder(json.JSONEncoder):
                     "ang": item.angle,
                     "fl": item.flipTuple,
                 }
+                _arrayEntry(itemDict, item)
             case lshp.layoutPath:
                 itemDict = {
                     "type": "Path",
                     "dfl1": item.mapToScene(item.draftLine.p1()).toTuple(),
                     "dfl2": item.mapToScene(item.draftLine.p2()).toTuple(),
-                    "ln": laylyr.pdkAllLayers.index(item.layer),
+                    "ln": layerIndex(item.layer),
                     "w": item.width,
                     "se": item.startExtend,
                     "ee": item.endExtend,
@@ -209,7 +260,7 @@ class gdsImportEncoder(json.JSONEncoder):
                     "pn": item.pinName,
                     "pd": item.pinDir,
                     "pt": item.pinType,
-                    "ln": laylyr.pdkAllLayers.index(item.layer),
+                    "ln": layerIndex(item.layer),
                     "ang": item.angle,
                     "fl": item.flipTuple,
                 }
@@ -223,7 +274,7 @@ class gdsImportEncoder(json.JSONEncoder):
                     "fh": item.fontHeight,
                     "la": item.labelAlign,
                     "lo": item.labelOrient,
-                    "ln": laylyr.pdkAllLayers.index(item.layer),
+                    "ln": layerIndex(item.layer),
                     "ang": item.angle,
                     "fl": item.flipTuple,
                 }
@@ -232,7 +283,7 @@ class gdsImportEncoder(json.JSONEncoder):
                 itemDict = {
                     "type": "Polygon",
                     "ps": pointsList,
-                    "ln": laylyr.pdkAllLayers.index(item.layer),
+                    "ln": layerIndex(item.layer),
                     "ang": item.angle,
                     "fl": item.flipTuple,
                 }
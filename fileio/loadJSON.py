@@ -27,9 +27,10 @@
 
 import json
 import pathlib
-from typing import Any, List
+from typing import Any, List, Union
 
-from PySide6.QtCore import QPoint, QLineF, QRect
+from PySide6.QtCore import QPoint, QPointF, QLineF, QRect, QRectF
+from PySide6.QtGui import QTransform
 from PySide6.QtGui import (
     QColor,
     QFont,
@@ -42,10 +43,14 @@ from PySide6.QtWidgets import (
 )
 # from methodtools import lru_cache
 
+import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.common.arrays as arr
 import revedaEditor.common.labels as lbl
 import revedaEditor.common.layoutShapes as lshp
 import revedaEditor.common.net as net
 import revedaEditor.common.shapes as shp
+import revedaEditor.fileio.gdsCellWriter as gcw
+import revedaEditor.fileio.importGDS as igds
 import revedaEditor.fileio.symbolEncoder as se
 from revedaEditor.backend.pdkPaths import importPDKModule
 
@@ -284,12 +289,10 @@ class schematicItems:
         symbolInstance.counter = item["ic"]
         symbolInstance.instanceName = item["nam"]
         symbolInstance.netlistIgnore = bool(item.get("ign", 0))
+        if "arr" in item:
+            symbolInstance.arrayTuple = ddef.instanceArrayTuple(*item["arr"])
         symbolInstance.labelDict = item["ld"]
         symbolInstance.setPos(*item["loc"])
-        [
-            labelItem.labelDefs()
-            for labelItem in symbolInstance.labels.values()
-        ]
         libraryPath = self.libraryDict.get(item["lib"])
         if libraryPath is None:
             self.createDraftSymbol(item, symbolInstance)
@@ -324,26 +327,20 @@ class schematicItems:
                                     symbolShape.create(jsonItem)
                                 )
                         symbolInstance.shapes = itemShapes
+                        # values are only assigned here, each label is
+                        # evaluated once all values and attributes are set
                         for labelItem in symbolInstance.labels.values():
                             if (
                                     labelItem.labelName
                                     in symbolInstance.labelDict.keys()
                             ):
-                                labelItem.labelValue = (
-                                    symbolInstance.labelDict[
-                                        labelItem.labelName
-                                    ][0]
-                                )
-                                labelItem.labelVisible = (
-                                    symbolInstance.labelDict[
+                                labelItem.setValue(
+                                    *symbolInstance.labelDict[
                                         labelItem.labelName
-                                    ][1]
+                                    ][:2]
                                 )
                         symbolInstance.symattrs = symbolAttributes
-                        [
-                            labelItem.labelDefs()
-                            for labelItem in symbolInstance.labels.values()
-                        ]
+                        symbolInstance.evaluateLabels()
                         symbolInstance.angle = item.get("ang", 0)
                         symbolInstance.flipTuple = item.get('fl', (1,1))
                         return symbolInstance
@@ -416,11 +413,17 @@ class PCellCache:
 
 
 class layoutItems:
-    def __init__(self, scene: QGraphicsScene):
+    # (file path, modification time) -> bounding rect of the layout view
+    _fileRects = {}
+
+    def __init__(self, scene: QGraphicsScene, depth: int = 0):
         """
-        Create layout items from json file.
+        Create layout items from json file. depth is the number of instances
+        above the created items, instances at or below the display levels of
+        the scene are created without their shapes.
         """
         self.scene = scene
+        self.depth = depth
         self.libraryDict = scene.libraryDict
         self.rulerFont = scene.rulerFont
         self.rulerTickLength = scene.rulerTickLength
@@ -494,6 +497,8 @@ class layoutItems:
             pcellInstance.viewName = item["view"]
             pcellInstance.counter = item["ic"]
             pcellInstance.instanceName = item["nam"]
+            if "arr" in item:
+                pcellInstance.arrayTuple = ddef.instanceArrayTuple(*item["arr"])
             pcellInstance.setPos(QPoint(*item["loc"]))
             pcellInstance.angle = item.get("ang", 0)
             pcellInstance.flipTuple = item.get('fl', (1,1))
@@ -517,6 +522,35 @@ class layoutItems:
         if not filePath.is_file():
             self.scene.logger.error(f"File {filePath} does not exist.")
             return None
+        if self.depth >= getattr(self.scene, "displayLevels", self.depth + 1):
+            # shapes are only created once the display levels are raised
+            layoutInstance = lshp.layoutInstance([])
+            layoutInstance.setDeferred(self.layoutFileRect(filePath),
+                                       lambda: self.instanceShapes(filePath) or [])
+        else:
+            itemShapes = self.instanceShapes(filePath)
+            if itemShapes is None:
+                return None
+            layoutInstance = lshp.layoutInstance(itemShapes)
+        layoutInstance.libraryName = libraryName
+        layoutInstance.cellName = cell
+        layoutInstance.counter = item.get("ic")
+        layoutInstance.instanceName = item.get("nam", "")
+        if "arr" in item:
+            layoutInstance.arrayTuple = ddef.instanceArrayTuple(*item["arr"])
+        layoutInstance.setPos(item["loc"][0], item["loc"][1])
+        layoutInstance.angle = item.get("ang", 0)
+        layoutInstance.flipTuple = item.get('fl', (1,1))
+        if item.get("flo"):
+            # flipped about the instance origin as in GDS, see gcw.cellShapeDicts
+            layoutInstance.setPos(layoutInstance.pos() + QPointF(*item["loc"])
+                                  - layoutInstance.mapToScene(QPointF(0, 0)))
+        layoutInstance.viewName = viewName
+        return layoutInstance
+
+    def layoutFileContents(self, filePath: pathlib.Path) -> Union[List, None]:
+        # lazily imported GDS cells are written on first instantiation
+        igds.materializeLayoutView(filePath)
 
         # Try to get the cached file contents
         file_contents = self.cache.getLayoutFileContents(str(filePath))
@@ -529,24 +563,81 @@ class layoutItems:
             except (json.JSONDecodeError, FileNotFoundError) as e:
                 self.scene.logger.error(f"Error reading Layout file: {e}")
                 return None
+        return file_contents
 
+    def instanceShapes(self, filePath: pathlib.Path) -> Union[List, None]:
+        """Create the shapes of an instance of the layout view one level down."""
+        file_contents = self.layoutFileContents(filePath)
+        if file_contents is None:
+            return None
+        childItems = layoutItems(self.scene, self.depth + 1)
         itemShapes = []
         for shape in file_contents[2:]:
             try:
-                itemShapes.append(layoutItems(self.scene).create(shape))
+                itemShapes.append(childItems.create(shape))
             except Exception as e:
                 self.scene.logger.error(f"Error creating shape: {e}")
+        return itemShapes
 
-        layoutInstance = lshp.layoutInstance(itemShapes)
-        layoutInstance.libraryName = libraryName
-        layoutInstance.cellName = cell
-        layoutInstance.counter = item.get("ic")
-        layoutInstance.instanceName = item.get("nam", "")
-        layoutInstance.setPos(item["loc"][0], item["loc"][1])
-        layoutInstance.angle = item.get("ang", 0)
-        layoutInstance.flipTuple = item.get('fl', (1,1))
-        layoutInstance.viewName = viewName
-        return layoutInstance
+    def layoutFileRect(self, filePath: pathlib.Path) -> QRectF:
+        """
+        Bounding rectangle of a layout view computed from its file without
+        creating any items. Cells of a lazy GDS import that are not written
+        yet use the bounding box recorded at import time.
+        """
+        try:
+            key = (str(filePath), filePath.stat().st_mtime_ns)
+        except OSError:
+            key = (str(filePath), None)
+        rect = self._fileRects.get(key)
+        if rect is None:
+            bbox = gcw.pendingCellBBox(filePath)
+            if bbox is not None:
+                rect = QRectF(QPointF(*bbox[0]), QPointF(*bbox[1])).normalized()
+            else:
+                rect = QRectF()
+                for shape in (self.layoutFileContents(filePath) or [])[2:]:
+                    rect = rect.united(self._shapeDictRect(shape))
+            self._fileRects[key] = rect
+        return rect
+
+    def _shapeDictRect(self, item: dict) -> QRectF:
+        match item.get("type"):
+            case "Rect" | "Pin":
+                return QRectF(QPointF(*item["tl"]), QPointF(*item["br"])).normalized()
+            case "Path":
+                margin = max(item["w"] / 2, item.get("se", 0), item.get("ee", 0))
+                return QRectF(QPointF(*item["dfl1"]), QPointF(*item["dfl2"])).normalized(
+                ).adjusted(-margin, -margin, margin, margin)
+            case "Polygon":
+                xs = [point[0] for point in item["ps"]]
+                ys = [point[1] for point in item["ps"]]
+                return QRectF(QPointF(min(xs), min(ys)), QPointF(max(xs), max(ys)))
+            case "Via":
+                width = item["xn"] * item["via"]["w"] + (item["xn"] - 1) * item["xs"]
+                height = item["yn"] * item["via"]["h"] + (item["yn"] - 1) * item["ys"]
+                return QRectF(QPointF(*item["st"]), QPointF(item["st"][0] + width,
+                                                            item["st"][1] + height))
+            case "Label" | "Pcell":
+                point = item["st"] if item["type"] == "Label" else item["loc"]
+                return QRectF(QPointF(*point), QPointF(*point))
+            case "Inst":
+                libraryPath = self.libraryDict.get(item.get("lib"))
+                if libraryPath is None:
+                    return QRectF()
+                filePath = pathlib.Path(libraryPath) / item["cell"] / f"{item['view']}.json"
+                if not filePath.is_file():
+                    return QRectF()
+                # flipping is done around the centre and keeps the bounding box
+                transform = QTransform().translate(*item["loc"])
+                if item.get("flo"):
+                    transform.scale(*item["fl"])
+                transform.rotate(item.get("ang", 0))
+                rect = self.layoutFileRect(filePath)
+                if "arr" in item:
+                    rect = arr.arrayRect(rect, ddef.instanceArrayTuple(*item["arr"]))
+                return transform.mapRect(rect)
+        return QRectF()
 
     def createRectShape(self, item):
         start = QPoint(item["tl"][0], item["tl"][1])
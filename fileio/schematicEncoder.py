@@ -24,84 +24,114 @@
 
 import json
 
+import revedaEditor.common.arrays as arr
 import revedaEditor.common.net as net
 import revedaEditor.common.shapes as shp
 
 from typing import Dict, Any
 from PySide6.QtCore import QPointF
 
+def _schematicSymbolDict(item: shp.schematicSymbol) -> Dict[str, Any]:
+    item_label_dict = (
+        item.labelDict if item.draft
+        else {label.labelName: [label.labelValue, label.labelVisible]
+              for label in item.labels.values()}
+    )
+    scene_origin = item.scene().origin
+    itemDict = {
+        "type": "sys",
+        "lib": item.libraryName,
+        "cell": item.cellName,
+        "view": item.viewName,
+        "nam": item.instanceName,
+        "ic": item.counter,
+        "ld": item_label_dict,
+        "loc": _subtract_point(item.scenePos(), scene_origin),
+        "ang": item.angle,
+        "ign": int(item.netlistIgnore),
+        "br": item.childrenBoundingRect().getCoords(),
+        "fl": item.flipTuple,
+    }
+    # only arrays are saved with their columns, rows and pitches
+    if arr.isArray(item.arrayTuple):
+        itemDict["arr"] = item.arrayTuple
+    return itemDict
+
+
+def _schematicNetDict(item: net.schematicNet) -> Dict[str, Any]:
+    scene_origin = item.scene().origin
+    return {
+        "type": "scn",
+        "st": _subtract_point(item.mapToScene(item.draftLine.p1()), scene_origin),
+        "end": _subtract_point(item.mapToScene(item.draftLine.p2()), scene_origin),
+        "nam": item.name,
+        "ns": item.nameStrength.value,
+    }
+
+
+def _schematicPinDict(item: shp.schematicPin) -> Dict[str, Any]:
+    return {
+        "type": "scp",
+        "st": _subtract_point(item.mapToScene(item.start), item.scene().origin),
+        "pn": item.pinName,
+        "pd": item.pinDir,
+        "pt": item.pinType,
+        "ang": item.angle,
+        "fl": item.flipTuple,
+    }
+
+
+def _textDict(item: shp.text) -> Dict[str, Any]:
+    return {
+        "type": "txt",
+        "st": _subtract_point(item.mapToScene(item.start), item.scene().origin),
+        "tc": item.textContent,
+        "ff": item.fontFamily,
+        "fs": item.fontStyle,
+        "th": item.textHeight,
+        "ta": item.textAlignment,
+        "to": item.textOrient,
+        "ang": item.angle,
+        "fl": item.flipTuple,
+    }
+
+
+def _unknownDict(item) -> Dict[str, Any]:
+    return {'type': 'unknown'}
+
+
+def _subtract_point(point: QPointF, origin: QPointF) -> tuple:
+    return (point - origin).toTuple()
+
+
+# checked in order with isinstance, the result is cached per item type
+_itemTypes = (
+    (shp.schematicSymbol, _schematicSymbolDict),
+    (net.schematicNet, _schematicNetDict),
+    (shp.schematicPin, _schematicPinDict),
+    (shp.text, _textDict),
+)
+_itemDicts = {}
+
+
+def schematicItemDict(item) -> Dict[str, Any]:
+    """
+    Plain dictionary of a schematic item as it is saved. Encoding these with
+    one reused schematicEncoder avoids the JSONEncoder set-up for every item.
+    """
+    itemDict = _itemDicts.get(type(item))
+    if itemDict is None:
+        itemDict = next((function for itemType, function in _itemTypes
+                         if isinstance(item, itemType)), _unknownDict)
+        _itemDicts[type(item)] = itemDict
+    return itemDict(item)
+
+
 class schematicEncoder(json.JSONEncoder):
     def default(self, item: Any) -> Dict[str, Any]:
-        if isinstance(item, shp.schematicSymbol):
-            return self._encodeSchematicSymbol(item)
-        elif isinstance(item, net.schematicNet):
-            return self._encodeSchematicNet(item)
-        elif isinstance(item, shp.schematicPin):
-            return self._encodeSchematicPin(item)
-        elif isinstance(item, shp.text):
-            return self._encodeText(item)
+        if isinstance(item, (shp.schematicSymbol, net.schematicNet, shp.schematicPin, shp.text)):
+            return schematicItemDict(item)
         try:
             return super().default(item)
         except TypeError:
             return {'type': 'unknown'}
-
-    def _encodeSchematicSymbol(self, item: shp.schematicSymbol) -> Dict[str, Any]:
-        item_label_dict = (
-            item.labelDict if item.draft
-            else {label.labelName: [label.labelValue, label.labelVisible]
-                  for label in item.labels.values()}
-        )
-        scene_origin = item.scene().origin
-        return {
-            "type": "sys",
-            "lib": item.libraryName,
-            "cell": item.cellName,
-            "view": item.viewName,
-            "nam": item.instanceName,
-            "ic": item.counter,
-            "ld": item_label_dict,
-            "loc": self._subtract_point(item.scenePos(), scene_origin),
-            "ang": item.angle,
-            "ign": int(item.netlistIgnore),
-            "br": item.boundingRect().getCoords(),
-            "fl": item.flipTuple,
-        }
-
-    def _encodeSchematicNet(self, item: net.schematicNet) -> Dict[str, Any]:
-        scene_origin = item.scene().origin
-        return {
-            "type": "scn",
-            "st": self._subtract_point(item.mapToScene(item.draftLine.p1()), scene_origin),
-            "end": self._subtract_point(item.mapToScene(item.draftLine.p2()), scene_origin),
-            "nam": item.name,
-            "ns": item.nameStrength.value,
-        }
-
-    def _encodeSchematicPin(self, item: shp.schematicPin) -> Dict[str, Any]:
-        return {
-            "type": "scp",
-            "st": self._subtract_point(item.mapToScene(item.start), item.scene().origin),
-            "pn": item.pinName,
-            "pd": item.pinDir,
-            "pt": item.pinType,
-            "ang": item.angle,
-            "fl": item.flipTuple,
-        }
-
-    def _encodeText(self, item: shp.text) -> Dict[str, Any]:
-        return {
-            "type": "txt",
-            "st": self._subtract_point(item.mapToScene(item.start), item.scene().origin),
-            "tc": item.textContent,
-            "ff": item.fontFamily,
-            "fs": item.fontStyle,
-            "th": item.textHeight,
-            "ta": item.textAlignment,
-            "to": item.textOrient,
-            "ang": item.angle,
-            "fl": item.flipTuple,
-        }
-
-    @staticmethod
-    def _subtract_point(point: QPointF, origin: QPointF) -> tuple:
-        return (point - origin).toTuple()
@@ -22,17 +22,21 @@
 #    Licensor: Revolution Semiconductor (Registered in the Netherlands)
 #
 import revedaEditor.common.net as net
+import revedaEditor.backend.metrics as metrics
 import revedaEditor.backend.undoStack as us
-from collections import Counter
+import math
+from collections import Counter, OrderedDict
 
-# import numpy as np
-from PySide6.QtCore import (QPoint, QRect, Qt, Signal, QLine,)
-from PySide6.QtGui import (QColor, QKeyEvent, QPainter, QWheelEvent, QPolygon, )
+import numpy as np
+from PySide6.QtCore import (QPoint, QRect, QRectF, Qt, Signal, )
+from PySide6.QtGui import (QBrush, QColor, QImage, QKeyEvent, QPainter, QPixmap, QTransform,
+                           QWheelEvent, )
 from PySide6.QtWidgets import (QGraphicsView, )
 from PySide6.QtPrintSupport import (QPrinter,)
 from revedaEditor.backend.pdkPaths import importPDKModule
 
 schlyr = importPDKModule('schLayers')
+laylyr = importPDKModule('layoutLayers')
 
 
 
@@ -41,6 +45,9 @@ class editorView(QGraphicsView):
     The qgraphicsview for qgraphicsscene. It is used for both schematic and layout editors.
     """
     keyPressedSignal = Signal(int)
+    # grid dots or lines closer than this on screen are coarsened
+    minGridPixels = 8
+    maxGridCoarsening = 64
 
     # zoomFactorChanged = Signal(float)
     def __init__(self, scene, parent):
@@ -61,6 +68,7 @@ class editorView(QGraphicsView):
         self._bottom: QPoint = QPoint()
         self.viewRect = QRect()
         self.zoomFactor = 1.0
+        self._gridBrushes = {}  # (pitch, scale, lines) -> QBrush
         self.init_UI()
 
     def init_UI(self):
@@ -109,6 +117,10 @@ class editorView(QGraphicsView):
 
 
 
+    def paintEvent(self, event):
+        with metrics.span("view.paint"):
+            super().paintEvent(event)
+
     def drawBackground(self, painter, rect):
         """
         Draws the background of the painter within the given rectangle.
@@ -130,76 +142,65 @@ class editorView(QGraphicsView):
         if self.gridbackg or self.linebackg:
             # Fill rectangle with black color
             painter.fillRect(rect, QColor("black"))
-            x_coords, y_coords = self.findCoords()
-
-            if self.gridbackg:
-                painter.setPen(QColor("white"))
-
-                # Pre-allocate the polygon for better performance
-                points = QPolygon()
-                num_points = len(x_coords) * len(y_coords)
-                points.reserve(num_points)
-
-                # Fill the polygon with points
-                for x in x_coords:
-                    for y in y_coords:
-                        points.append(QPoint(int(x), int(y)))
-
-                # Draw all points in a single call
-                painter.drawPoints(points)
-
-            else:  # self.linebackg
-
-                painter.setPen(QColor("gray"))
-
-                # Create vertical and horizontal lines
-                vertical_lines = [
-                    QLine(int(x), self._top, int(x), self._bottom)
-                    for x in x_coords
-                ]
-
-                horizontal_lines = [
-                    QLine(self._left, int(y), self._right, int(y))
-                    for y in y_coords
-                ]
-
-                # Draw all lines with minimal calls
-                painter.drawLines(vertical_lines)
-                painter.drawLines(horizontal_lines)
+            scale = abs(self.transform().m11())
+            pitch = self.gridPitch(scale)
+            if pitch is not None:
+                painter.save()
+                painter.setRenderHint(QPainter.SmoothPixmapTransform, False)
+                painter.fillRect(rect, self.gridBrush(pitch, scale, self.linebackg
+                                                       and not self.gridbackg))
+                painter.restore()
         elif self._transparent:
             self.viewport().setAttribute(Qt.WA_TranslucentBackground)
         else:
             painter.fillRect(rect, QColor("black"))
             super().drawBackground(painter, rect)
 
-    def findCoords(self):
+    def gridPitch(self, scale: float):
         """
-        Calculate the coordinates for drawing lines or points on a grid.
+        Return the grid spacing in scene units for the given zoom scale. The
+        major grid is coarsened by powers of two until the dots or lines are
+        at least minGridPixels apart on the screen, and switched off when that
+        would need more than maxGridCoarsening times the major grid.
 
         Returns:
-            tuple: A tuple containing the x and y coordinates for drawing the lines or points.
+            int | None: grid spacing or None if no grid should be drawn.
+        """
+        pitch = self.majorGrid
+        while pitch * scale < self.minGridPixels:
+            pitch *= 2
+            if pitch > self.majorGrid * self.maxGridCoarsening:
+                return None
+        return pitch
+
+    def gridBrush(self, pitch: int, scale: float, lines: bool) -> QBrush:
+        """
+        Return a textured brush drawing one grid cell per texture. The
+        texture is a little smaller than a grid cell on screen so that the
+        brush transform never shrinks the single pixel dots or lines away.
+        Brushes are cached per grid pitch, zoom scale and grid style.
         """
-        x_coords = range(self._left, self._right, self.majorGrid)
-        y_coords = range(self._top, self._bottom, self.majorGrid)
-
-        if 160 <= len(x_coords) < 320:
-            # Create a range of x and y coordinates for drawing the lines
-            x_coords = range(self._left, self._right, self.majorGrid * 2)
-            y_coords = range(self._top, self._bottom, self.majorGrid * 2)
-        elif 320 <= len(x_coords) < 640:
-            x_coords = range(self._left, self._right, self.majorGrid * 4)
-            y_coords = range(self._top, self._bottom, self.majorGrid * 4)
-        elif 640 <= len(x_coords) < 1280:
-            x_coords = range(self._left, self._right, self.majorGrid * 8)
-            y_coords = range(self._top, self._bottom, self.majorGrid * 8)
-        elif 1280 <= len(x_coords) < 2560:
-            x_coords = range(self._left, self._right, self.majorGrid * 16)
-            y_coords = range(self._top, self._bottom, self.majorGrid * 16)
-        elif len(x_coords) >= 2560:  # grid dots are too small to see
-            x_coords = range(self._left, self._right, self.majorGrid * 1000)
-            y_coords = range(self._top, self._bottom, self.majorGrid * 1000)
-
-        return x_coords, y_coords
+        key = (pitch, scale, lines)
+        brush = self._gridBrushes.get(key)
+        if brush is None:
+            size = max(1, int(pitch * scale))
+            pixmap = QPixmap(size, size)
+            pixmap.fill(Qt.transparent)
+            pixmapPainter = QPainter(pixmap)
+            if lines:
+                pixmapPainter.setPen(QColor("gray"))
+                pixmapPainter.drawLine(0, 0, size - 1, 0)
+                pixmapPainter.drawLine(0, 0, 0, size - 1)
+            else:
+                pixmapPainter.setPen(QColor("white"))
+                pixmapPainter.drawPoint(0, 0)
+            pixmapPainter.end()
+            brush = QBrush(pixmap)
+            brush.setTransform(QTransform.fromScale(pitch / size, pitch / size))
+            if len(self._gridBrushes) >= 32:
+                self._gridBrushes.clear()
+            self._gridBrushes[key] = brush
+        return brush
 
     def keyPressEvent(self, event: QKeyEvent):
         self.keyPressedSignal.emit(event.key())
@@ -380,11 +381,131 @@ class schematicView(editorView):
         super().keyPressEvent(event)
 
 
+class layoutTileCache:
+    """
+    Off-screen images of the static part of a layout scene. Tiles are square
+    in device pixels and anchored to the scene origin, so panning only renders
+    the tiles newly exposed. Tiles are keyed by zoom level, visible layer set
+    and tile index and are dropped when any item inside them changes.
+    """
+    tilePixels = 256
+    maxTiles = 256
+
+    def __init__(self, scene):
+        self.scene = scene
+        self._tiles = OrderedDict()  # (scale, layers, ix, iy) -> QImage
+
+    def clear(self):
+        self._tiles.clear()
+
+    @staticmethod
+    def _visibleLayers() -> frozenset:
+        return frozenset(
+            index for index, layer in enumerate(laylyr.pdkAllLayers) if layer.visible)
+
+    def _tileRect(self, scale: float, ix: int, iy: int) -> QRectF:
+        size = self.tilePixels / scale
+        return QRectF(ix * size, iy * size, size, size)
+
+    def invalidate(self, rects: list):
+        """Drop the tiles intersecting any of the changed scene rectangles."""
+        if not rects:
+            self._tiles.clear()
+            return
+        staleKeys = [key for key in self._tiles if any(
+            self._tileRect(key[0], key[2], key[3]).intersects(rect) for rect in rects)]
+        for key in staleKeys:
+            del self._tiles[key]
+
+    def _renderTile(self, scale: float, ix: int, iy: int) -> QImage:
+        image = QImage(self.tilePixels, self.tilePixels, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        painter.setRenderHint(QPainter.TextAntialiasing, True)
+        self.scene.tilePass = True
+        try:
+            self.scene.render(painter, QRectF(image.rect()), self._tileRect(scale, ix, iy),
+                              Qt.IgnoreAspectRatio)
+        finally:
+            self.scene.tilePass = False
+            painter.end()
+        return image
+
+    def draw(self, painter: QPainter, rect: QRectF, scale: float):
+        """Blit the tiles covering the exposed scene rectangle."""
+        size = self.tilePixels / scale
+        layers = self._visibleLayers()
+        for ix in range(math.floor(rect.left() / size), math.floor(rect.right() / size) + 1):
+            for iy in range(math.floor(rect.top() / size),
+                            math.floor(rect.bottom() / size) + 1):
+                key = (scale, layers, ix, iy)
+                image = self._tiles.get(key)
+                if image is None:
+                    image = self._renderTile(scale, ix, iy)
+                    self._tiles[key] = image
+                    if len(self._tiles) > self.maxTiles:
+                        self._tiles.popitem(last=False)
+                else:
+                    self._tiles.move_to_end(key)
+                painter.drawImage(self._tileRect(scale, ix, iy), image)
+
+
 class layoutView(editorView):
     def __init__(self, scene, parent):
         self.scene = scene
         self.parent = parent
         super().__init__(self.scene, self.parent)
+        self.tileCache = layoutTileCache(self.scene)
+        self.scene.changed.connect(self.tileCache.invalidate)
+        # (heatmap image, scene rectangle) of a layer density map
+        self.densityOverlay = None
+
+    def setTileCaching(self, value: bool):
+        """
+        Paint non-selected shapes from cached tiles and only selected or
+        edited shapes item by item.
+        """
+        self.scene.tileCaching = value
+        self.tileCache.clear()
+        # item caches hold pixmaps painted under the previous setting
+        for item in self.scene.items():
+            item.update()
+        self.viewport().update()
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        if self.scene.tileCaching:
+            self.tileCache.draw(painter, rect, self.transform().m11())
+
+    def setDensityOverlay(self, layerMap=None):
+        """
+        Show the densities of a density map as a heatmap over the layout, from
+        blue for empty to red for full windows. None removes the heatmap.
+        """
+        if layerMap is None or not layerMap.densities.size:
+            self.densityOverlay = None
+        else:
+            densities = np.clip(layerMap.densities, 0, 1)
+            rows, columns = densities.shape
+            colours = np.zeros((rows, columns, 4), dtype=np.uint8)
+            colours[..., 0] = np.rint(densities * 255)
+            colours[..., 2] = 255 - colours[..., 0]
+            colours[..., 3] = 110
+            image = QImage(colours.tobytes(), columns, rows, columns * 4,
+                           QImage.Format_RGBA8888).copy()
+            # each window is drawn as the step sized square at its centre
+            inset = (layerMap.window - layerMap.step) / 2
+            target = QRectF(layerMap.origin[0] + inset, layerMap.origin[1] + inset,
+                            columns * layerMap.step, rows * layerMap.step)
+            self.densityOverlay = (image, target)
+        self.viewport().update()
+
+    def drawForeground(self, painter, rect):
+        super().drawForeground(painter, rect)
+        if self.densityOverlay is not None:
+            image, target = self.densityOverlay
+            painter.drawImage(target, image)
 
 
     def keyPressEvent(self, event: QKeyEvent):
@@ -24,14 +24,12 @@
 
 
 import pathlib
-from contextlib import contextmanager
-import time
 from logging import getLogger
 from PySide6.QtCore import (Qt, QSize, Signal,)
 from PySide6.QtGui import (QAction, QIcon, QImage, QKeySequence, QPainter,)
 from PySide6.QtPrintSupport import QPrintDialog, QPrinter, QPrintPreviewDialog
-from PySide6.QtWidgets import (QApplication, QDialog, QFileDialog, QLabel, QMainWindow,
-                               QMenu, QToolBar, QGraphicsItem)
+from PySide6.QtWidgets import (QApplication, QDialog, QFileDialog, QInputDialog, QLabel,
+                               QMainWindow, QMenu, QToolBar, QGraphicsItem)
 
 import revedaEditor.backend.dataDefinitions as ddef
 import revedaEditor.backend.libraryModelView as lmview
@@ -208,6 +206,9 @@ class editorWindow(QMainWindow):
         self.redoAction = QAction(redoIcon, "Redo", self)
         self.redoAction.setToolTip("Redo the last undone action")
 
+        self.undoMemoryAction = QAction("Undo Memory...", self)
+        self.undoMemoryAction.setToolTip("Report and limit the memory of the undo history")
+
         yankIcon = QIcon(":/icons/node-insert.png")
         self.yankAction = QAction(yankIcon, "Yank", self)
 
@@ -434,6 +435,7 @@ class editorWindow(QMainWindow):
         # edit menu
         self.menuEdit.addAction(self.undoAction)
         self.menuEdit.addAction(self.redoAction)
+        self.menuEdit.addAction(self.undoMemoryAction)
         # self.menuEdit.addAction(self.yankAction)
         self.menuEdit.addAction(self.pasteAction)
         self.menuEdit.addAction(self.deleteAction)
@@ -489,6 +491,7 @@ class editorWindow(QMainWindow):
         self.copyAction.triggered.connect(self.copyClick)
         self.undoAction.triggered.connect(self.undoClick)
         self.redoAction.triggered.connect(self.redoClick)
+        self.undoMemoryAction.triggered.connect(self.undoMemoryClick)
         self.moveAction.triggered.connect(self.moveClick)
         self.moveByAction.triggered.connect(self.moveByClick)
         self.rotateAction.triggered.connect(self.rotateItemClick)
@@ -661,7 +664,13 @@ class editorWindow(QMainWindow):
     def closeWindow(self):
         self.close()
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.centralW and self.centralW.scene.journal is None:
+            self.centralW.scene.startJournal()
+
     def closeEvent(self, event):
+        self.centralW.scene.stopJournal()
         cellViewTuple = ddef.viewTuple(self.libName, self.cellName, self.viewName)
         self.appMainW.openViews.pop(cellViewTuple, None)
         event.accept()
@@ -678,6 +687,15 @@ class editorWindow(QMainWindow):
     def redoClick(self, s):
         self.centralW.scene.undoStack.redo()
 
+    def undoMemoryClick(self, s):
+        undoStack = self.centralW.scene.undoStack
+        for line in undoStack.memoryReport():
+            self.logger.info(line)
+        capMiB, ok = QInputDialog.getInt(self, "Undo Memory", "Undo history limit (MiB):",
+                                         undoStack.memoryCap // 2 ** 20, 1, 65536)
+        if ok:
+            undoStack.setMemoryCap(capMiB * 2 ** 20)
+
     def rotateItemClick(self, s):
         self.centralW.scene.editModes.setMode("rotateItem")
 
@@ -697,12 +715,3 @@ class editorWindow(QMainWindow):
         self.centralW.scene.selectionChanged.connect(self.appMainW.selectionChangedScene)
         self.centralW.view.keyPressedSignal.connect(self.appMainW.viewKeyPressed)
 
-
-    @contextmanager
-    def measureDuration(self):
-        start_time = time.perf_counter()
-        try:
-            yield
-        finally:
-            end_time = time.perf_counter()
-            self.logger.info(f"Total processing time: {end_time - start_time:.3f} seconds")
@@ -368,6 +368,10 @@ class gdsExportDialogue(QDialog):
         self.precisionEdit = edf.shortLineEdit()
         self.precisionEdit.setToolTip("The precision of the GDS file.")
         settingsBoxLayout.addRow(edf.boldLabel("Precision:"), self.precisionEdit)
+        self.formatCombo = QComboBox()
+        self.formatCombo.addItems(["GDS", "OASIS"])
+        self.formatCombo.setToolTip("The file format of the exported layout.")
+        settingsBoxLayout.addRow(edf.boldLabel("Format:"), self.formatCombo)
         self.mainLayout.addWidget(settingsBox)
         fileBox = QGroupBox("GDS Export Directory")
         fileDialogLayout = QHBoxLayout()
@@ -415,6 +419,16 @@ class gdsImportDialogue(QDialog):
         self.precisionEdit = edf.shortLineEdit()
         self.precisionEdit.setToolTip("The precision of the GDS file.")
         settingsBoxLayout.addRow(edf.boldLabel("Precision:"), self.precisionEdit)
+        self.processesEdit = edf.shortLineEdit()
+        self.processesEdit.setToolTip(
+            "Number of worker processes converting the cells. 1 for serial import."
+        )
+        settingsBoxLayout.addRow(edf.boldLabel("Worker Processes:"), self.processesEdit)
+        self.lazyImportCheck = QCheckBox()
+        self.lazyImportCheck.setToolTip(
+            "Only import the cell index. Cells are converted when first opened."
+        )
+        settingsBoxLayout.addRow(edf.boldLabel("Lazy Import:"), self.lazyImportCheck)
         self.mainLayout.addWidget(settingsBox)
         fileBox = QGroupBox("GDS File")
         fileDialogLayout = QHBoxLayout()
@@ -431,7 +445,8 @@ class gdsImportDialogue(QDialog):
         self.setLayout(self.mainLayout)
 
     def onFileButtonClicked(self):
-        gdsFileName, _ = QFileDialog.getOpenFileName(self, caption="Select GDS file.", filter="GDS files (*.gds)")
+        gdsFileName, _ = QFileDialog.getOpenFileName(self, caption="Select GDS or OASIS file.",
+                                                     filter="Layout files (*.gds *.oas)")
         if gdsFileName:
             self.inputFileEdit.setText(
                 gdsFileName
@@ -95,6 +95,19 @@ class layoutInstancePropertiesDialogue(layoutInstanceDialogue):
         self.instanceNameEdit = edf.longLineEdit()
         self.instanceParamsLayout.addRow("Instance Name:", self.instanceNameEdit)
         self.locationGroup.show()
+        self.arrayGroup = QGroupBox("Array")
+        arrayLayout = QFormLayout()
+        self.arrayGroup.setLayout(arrayLayout)
+        self.columnsEdit = edf.shortLineEdit()
+        self.rowsEdit = edf.shortLineEdit()
+        self.xPitchEdit = edf.shortLineEdit()
+        self.yPitchEdit = edf.shortLineEdit()
+        arrayLayout.addRow("Columns:", self.columnsEdit)
+        arrayLayout.addRow("Rows:", self.rowsEdit)
+        arrayLayout.addRow("X Pitch:", self.xPitchEdit)
+        arrayLayout.addRow("Y Pitch:", self.yPitchEdit)
+        # above the buttons
+        self.layout().insertWidget(self.layout().count() - 1, self.arrayGroup)
 
 
 class pcellLinkDialogue(QDialog):
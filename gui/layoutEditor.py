@@ -22,6 +22,7 @@
 #    Licensor: Revolution Semiconductor (Registered in the Netherlands)
 #
 import json
+import math
 import time
 
 import pathlib
@@ -36,6 +37,7 @@ from PySide6.QtGui import (
 )
 from PySide6.QtWidgets import (
     QDialog,
+    QInputDialog,
     QMenu,
     QSplitter,
     QToolBar,
@@ -55,6 +57,8 @@ import revedaEditor.backend.dataDefinitions as ddef
 import revedaEditor.backend.libraryMethods as libm
 import revedaEditor.backend.libraryModelView as lmview
 import revedaEditor.backend.libBackEnd as libb
+import revedaEditor.checks.connectivity as lcon
+import revedaEditor.common.layoutShapes as lshp
 import revedaEditor.fileio.gdsExport as gdse
 import revedaEditor.fileio.layoutEncoder as layenc
 import revedaEditor.fileio.loadJSON as lj
@@ -63,6 +67,7 @@ import revedaEditor.gui.editorWindow as edw
 import revedaEditor.gui.fileDialogues as fd
 import revedaEditor.gui.layoutDialogues as ldlg
 import revedaEditor.gui.lsw as lsw
+import revedaEditor.gui.schematicEditor as sced
 from revedaEditor.scenes.layoutScene import layoutScene
 from revedaEditor.gui.startThread import startThread
 
@@ -98,6 +103,21 @@ class layoutEditor(edw.editorWindow):
         super()._createActions()
         self.exportGDSAction = QAction("Export GDS", self)
         self.exportGDSAction.setToolTip("Export GDS from Layout")
+        self.batchPaintAction = QAction("Batch Layer Painting", self)
+        self.batchPaintAction.setToolTip("Paint instance contents per layer")
+        self.batchPaintAction.setCheckable(True)
+        self.tileCacheAction = QAction("Tiled Render Cache", self)
+        self.tileCacheAction.setToolTip("Paint unselected shapes from cached tiles")
+        self.tileCacheAction.setCheckable(True)
+        self.displayLevelsAction = QAction("Display Levels...", self)
+        self.displayLevelsAction.setToolTip("Hierarchy levels shown with their contents")
+        self.highlightNetAction = QAction("Highlight Net", self)
+        self.highlightNetAction.setToolTip("Highlight Shapes Connected to Selection")
+        self.highlightNetAction.setCheckable(True)
+        self.densityMapAction = QAction("Density Map...", self)
+        self.densityMapAction.setToolTip("Show Layer Density as Heatmap")
+        self.lvsAction = QAction("Compare with Schematic...", self)
+        self.lvsAction.setToolTip("Compare Layout Connectivity with Schematic")
 
 
     def _addActions(self):
@@ -122,6 +142,14 @@ class layoutEditor(edw.editorWindow):
         self.menuCreate.addAction(self.rulerAction)
         self.menuCreate.addAction(self.delRulerAction)
         self.menuTools.addAction(self.exportGDSAction)
+        self.menuView.addAction(self.batchPaintAction)
+        self.menuView.addAction(self.tileCacheAction)
+        self.menuView.addAction(self.displayLevelsAction)
+        self.menuView.addAction(self.densityMapAction)
+        self.menuCheck.addAction(self.viewErrorsAction)
+        self.menuCheck.addAction(self.deleteErrorsAction)
+        self.menuCheck.addAction(self.lvsAction)
+        self.menuTools.addAction(self.highlightNetAction)
         
         # hierarchy submenu
         self.hierMenu = self.menuEdit.addMenu("Hierarchy")
@@ -160,6 +188,14 @@ class layoutEditor(edw.editorWindow):
         self.createInstAction.triggered.connect(self.createInstClick)
         self.createRectAction.triggered.connect(self.createRectClick)
         self.exportGDSAction.triggered.connect(self.exportGDSClick)
+        self.batchPaintAction.toggled.connect(self.centralW.scene.setBatchPainting)
+        self.tileCacheAction.toggled.connect(self.centralW.view.setTileCaching)
+        self.displayLevelsAction.triggered.connect(self.displayLevelsClick)
+        self.viewErrorsAction.triggered.connect(self.checkErrorsClick)
+        self.deleteErrorsAction.triggered.connect(self.deleteErrorsClick)
+        self.highlightNetAction.triggered.connect(self.highlightNetClick)
+        self.lvsAction.triggered.connect(self.lvsClick)
+        self.densityMapAction.triggered.connect(self.densityMapClick)
 
         self.createPathAction.triggered.connect(self.createPathClick)
         self.createPinAction.triggered.connect(self.createPinClick)
@@ -412,6 +448,71 @@ class layoutEditor(edw.editorWindow):
                 libItem, cellItem, viewItem
             )
 
+    def displayLevelsClick(self):
+        levels, ok = QInputDialog.getInt(self, "Display Levels",
+                                         "Hierarchy levels to display:",
+                                         self.centralW.scene.displayLevels, 0, 99)
+        if ok:
+            self.centralW.scene.setDisplayLevels(levels)
+
+    def checkErrorsClick(self):
+        self.centralW.scene.checkErrors()
+        self.logger.info("Layout design rules checked.")
+
+    def deleteErrorsClick(self):
+        self.centralW.scene.deleteErrors()
+        self.logger.info("Layout design rule markers deleted.")
+
+    def highlightNetClick(self, s):
+        if s:
+            self.centralW.scene.highlightNet()
+        else:
+            self.centralW.scene.clearNetHighlight()
+
+    def densityMapClick(self):
+        layerNames = ["None"] + [f"{layer.name}.{layer.purpose}" for layer in
+                                 laylyr.pdkAllLayers]
+        layerName, ok = QInputDialog.getItem(self, "Density Map", "Layer:", layerNames, 0,
+                                             False)
+        if not ok:
+            return
+        if layerName == "None":
+            self.centralW.view.setDensityOverlay(None)
+            return
+        layer = laylyr.pdkAllLayers[layerNames.index(layerName) - 1]
+        layerMap = self.centralW.scene.densityMap(layer)
+        self.centralW.view.setDensityOverlay(layerMap)
+        if layerMap.densities.size:
+            self.logger.info(f"{layerName} density {layerMap.densities.min():.1%} to "
+                             f"{layerMap.densities.max():.1%}")
+
+    def lvsClick(self):
+        libItem = libm.getLibItem(self.libraryView.libraryModel, self.libName)
+        cellItem = libm.getCellItem(libItem, self.cellName)
+        schematicItem = libm.getViewItem(cellItem, "schematic") if cellItem else None
+        if schematicItem is None:
+            self.logger.error(f"{self.cellName} has no schematic view.")
+            return
+        schematicObj = sced.schematicEditor(schematicItem, self.libraryDict,
+                                            self.libraryView)
+        schematicObj.loadSchematic()
+        schematicScene = schematicObj.centralW.scene
+        schematicScene.nameSceneNets()
+        sceneSymbolSet = schematicScene.findSceneSymbolSet()
+        schematicScene.generatePinNetMap(sceneSymbolSet)
+        schematicNets = {(symbolItem.instanceName, pinName): netName
+                         for symbolItem in sceneSymbolSet
+                         for pinName, netName in symbolItem.pinNetMap.items()}
+        # nets at schematic pins are named after the pins
+        schematicNets.update({("", pinItem.pinName): pinItem.pinName
+                              for pinItem in schematicScene.findSceneSchemPinsSet()})
+        nets = self.centralW.scene.extractNets()
+        report = lcon.lvsReport(schematicNets, nets)
+        for line in report:
+            self.logger.warning(line)
+        self.logger.info(f"{len(nets)} layout nets compared with {self.cellName} "
+                         f"schematic, {len(report)} differences.")
+
     def exportGDSClick(self):
         dlg = fd.gdsExportDialogue(self)
         dlg.unitEdit.setText("1 um")
@@ -420,27 +521,38 @@ class layoutEditor(edw.editorWindow):
 
         if dlg.exec() == QDialog.Accepted:
             self.gdsExportDir = pathlib.Path(dlg.exportPathEdit.text().strip())
-            gdsExportPath: pathlib.Path = self.gdsExportDir / f"{self.cellName}.gds"
+            suffix = ".oas" if dlg.formatCombo.currentText() == "OASIS" else ".gds"
+            gdsExportPath: pathlib.Path = self.gdsExportDir / f"{self.cellName}{suffix}"
             # reprocess the layout to get the layout positions right.
-            topLevelItems = [
-                item for item in self.centralW.scene.items() if item.parentItem() is None
-            ]
+            topLevelItems = self.centralW.scene.topLevelShapes()
             decodedData = json.loads(json.dumps(topLevelItems, cls=layenc.layoutEncoder))
             layoutItems = [
                 lj.layoutItems(self.centralW.scene).create(item)
                 for item in decodedData
                 if item.get("type") in self.centralW.scene.layoutShapes
             ]
+            # instances beyond the display levels are created here, not in the
+            # export thread
+            for item in layoutItems:
+                if isinstance(item, lshp.layoutInstance):
+                    item.expandToLevel(math.inf)
             gdsExportObj = gdse.gdsExporter(self.cellName, layoutItems, gdsExportPath)
             gdsExportObj.unit = Quantity(dlg.unitEdit.text().strip()).real
             gdsExportObj.precision = Quantity(dlg.precisionEdit.text().strip()).real
             if gdsExportObj:
 
                 start_time = time.time()
-                gdsExportRunner = startThread(gdsExportObj.gdsExport())
+                gdsExportRunner = startThread(gdsExportObj.gdsExport)
+                gdsExportRunner.signals.finished.connect(
+                    lambda _: self.logger.info(
+                        f"{gdsExportPath.name} exported in "
+                        f"{time.time() - start_time:.4f} seconds"
+                    )
+                )
+                gdsExportRunner.signals.error.connect(
+                    lambda error: self.logger.error(f"Layout export failed: {error[0]}")
+                )
                 self.appMainW.threadPool.start(gdsExportRunner)
-                elapsed_time = time.time() - start_time
-                self.logger.info(f"GDS Export completed in {elapsed_time:.4f} seconds")
 
 
     def _createSignalConnections(self):
@@ -495,12 +607,8 @@ class layoutContainer(QWidget):
         if selectedLayer:
             selectedLayer.selectable = layerSelectable
 
-        for item in self.scene.items():
-            if (
-                    hasattr(item, "layer")
-                    and item.layer == selectedLayer
-                    and item.parentItem() is None
-            ):
+        for item in self.scene.layerItems(selectedLayer):
+            if item.parentItem() is None:
                 item.setEnabled(layerSelectable)
                 item.update()
 
@@ -509,10 +617,13 @@ class layoutContainer(QWidget):
         if selectedLayer:
             selectedLayer.visible = layerVisible
 
-            for item in self.scene.items():
-                if hasattr(item, "layer") and item.layer == selectedLayer:
+            for item in self.scene.layerItems(selectedLayer):
+                # batched shapes stay hidden, their batch checks layer.visible
+                if getattr(item.topLevelItem(), "_batch", None) is None:
                     item.setVisible(layerVisible)
                     item.update()
+            if self.scene.batchPainting:
+                self.scene.update()
 
 
 class lswWindow(QWidget):
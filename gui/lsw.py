@@ -26,26 +26,19 @@ from pathlib import Path
 
 from PySide6.QtCore import (Signal, Qt, QModelIndex)
 from PySide6.QtGui import (
-    QPainter,
     QStandardItemModel,
     QStandardItem,
     QBrush,
     QColor,
-    QBitmap,
-    QPixmap,
-    QImage,
 )
 from PySide6.QtWidgets import (QTableView, QMenu, QGraphicsItem, )
-import numpy as np
 import os
 from revedaEditor.backend.pdkPaths import importPDKModule
+from revedaEditor.common.textures import textureCache
 fabproc = importPDKModule('process')
 laylyr = importPDKModule('layoutLayers')
 
 class layerDataModel(QStandardItemModel):
-    _file_content_cache = {}
-    _pixmap_cache = {}
-
     def __init__(self, data: list):
         super().__init__()
         self._data = data or []
@@ -69,7 +62,8 @@ class layerDataModel(QStandardItemModel):
                 reveda_pdk_pathobj = pathlib.Path(reveda_pdk_path)
 
             texturePath = reveda_pdk_pathobj.joinpath(layer.btexture)
-            _pixmap = QPixmap.fromImage(self.createImage(texturePath, layer.bcolor))
+            _pixmap = textureCache.getCachedPixmap(texturePath, layer.bcolor, scale=1,
+                                                   alpha=255, background=QColor('black'))
             # Create a brush with black background
             brush = QBrush(QColor('black'))
             # Set the texture pattern over the black background
@@ -102,45 +96,6 @@ class layerDataModel(QStandardItemModel):
             for layer in layerlist
         ]
 
-    @classmethod
-    def readFileContent(cls, filePath):
-        if filePath not in cls._file_content_cache:
-            with open(filePath, "r") as file:
-                cls._file_content_cache[filePath] = file.read()
-        return cls._file_content_cache[filePath]
-    
-
-    @classmethod
-    def createImage(cls,filePath: Path, color: QColor, scale: int = 1):
-        content = cls.readFileContent(str(filePath))
-
-        # Use numpy's loadtxt for faster parsing of text data
-        data = np.loadtxt(content.splitlines(), dtype=np.uint8)
-        
-        # Scale up the pattern by repeating each pixel
-        data_scaled = np.repeat(np.repeat(data, scale, axis=0), scale, axis=1)
-        
-        height, width = data_scaled.shape
-
-        # Create QImage with Format_ARGB32 (not premultiplied)
-        image = QImage(width, height, QImage.Format.Format_ARGB32)
-        # Fill with transparent pixels first
-        image.fill(Qt.black)
-
-        # Create painter to draw on the image
-        painter = QPainter(image)
-        painter.setPen(Qt.NoPen)
-        painter.setBrush(QBrush(color))
-
-        # Draw solid rectangles for each pixel that should be colored
-        for i in range(height):
-            for j in range(width):
-                if data_scaled[i, j] == 1:  # Draw colored pixel
-                    painter.drawRect(j, i, 1, 1)
-
-        painter.end()
-        return image
-
 
 class layerViewTable(QTableView):
     columnTexture = 0
@@ -216,15 +171,11 @@ class layerViewTable(QTableView):
             if selectable is not None:
                 layer.selectable = selectable
 
+        # each changed check box updates the items of its own layer through
+        # the layerVisible and layerSelectable signals
         for row in range(self._model.rowCount()):
             self._model.item(row, column).setCheckState(state)
 
-        # Update item selectability if needed
-        if selectable is not None:
-            for item in self.layoutScene.items():
-                if item.parentItem() is None and hasattr(item, 'layer'):
-                    item.setEnabled(selectable)
-
     def noLayersVisible(self):
         self.updateAllLayers(visible=False)
 
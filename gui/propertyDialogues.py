@@ -529,6 +529,18 @@ class instanceProperties(QDialog):
         self.instanceAttributesLayout.setColumnStretch(1, 1)
         attributesGroup.setLayout(self.instanceAttributesLayout)
         tabWidget.addTab(attributesGroup, "Instance Attributes")
+        arrayGroup = QGroupBox()
+        arrayLayout = QFormLayout()
+        self.columnsEdit = edf.shortLineEdit()
+        arrayLayout.addRow(edf.boldLabel("Columns", self), self.columnsEdit)
+        self.rowsEdit = edf.shortLineEdit()
+        arrayLayout.addRow(edf.boldLabel("Rows", self), self.rowsEdit)
+        self.xPitchEdit = edf.shortLineEdit()
+        arrayLayout.addRow(edf.boldLabel("x pitch", self), self.xPitchEdit)
+        self.yPitchEdit = edf.shortLineEdit()
+        arrayLayout.addRow(edf.boldLabel("y pitch", self), self.yPitchEdit)
+        arrayGroup.setLayout(arrayLayout)
+        tabWidget.addTab(arrayGroup, "Array")
         mainLayout.addWidget(tabWidget)
         mainLayout.addWidget(self.buttonBox)
         self.setLayout(mainLayout)
@@ -55,6 +55,8 @@ import revedaEditor.gui.revinit as revinit
 import revedaEditor.gui.stippleEditor as stip
 import revedaEditor.fileio.importGDS as igds
 import revedaEditor.backend.libraryMethods as libm
+# metrics.enable() and metrics.report() from the python console
+import revedaEditor.backend.metrics as metrics  # noqa: F401
 from revedaEditor.gui.startThread import startThread
 from revedaEditor.resources import resources  # noqa: F401
 
@@ -454,6 +456,7 @@ class MainWindow(QMainWindow):
         dlg = fd.gdsImportDialogue(self)
         dlg.unitEdit.setText("1 nm")
         dlg.libNameEdit.setText("importLib")
+        dlg.processesEdit.setText(str(QThread.idealThreadCount()))
         # dlg.inputFileEdit.setText("/home/eskiyerli/onedrive_reveda/Projects/gds/newSymbol/newSymbol.gds")
         if dlg.exec() == QDialog.Accepted:
             gdsImportLibName = dlg.libNameEdit.text().strip()
@@ -472,14 +475,36 @@ class MainWindow(QMainWindow):
             else:
                 gdsImportLibDirObj, gdsImportLibItem = self.createNewLibrary(gdsImportLibName)
             try:
-                gdsImportObj = igds.gdsImporter(self, gdsImportFileObj, gdsImportLibItem)
-                if gdsImportObj:
-                    gdsImportRunner = startThread(gdsImportObj.gdsImporter())
+                processes = int(dlg.processesEdit.text().strip() or 1)
+            except ValueError:
+                processes = 1
+            try:
+                gdsImportObj = igds.gdsImporter(
+                    self,
+                    gdsImportFileObj,
+                    gdsImportLibItem,
+                    processes,
+                    dlg.lazyImportCheck.isChecked(),
+                )
+                # library model items are created here, cell conversion runs
+                # in the thread pool.
+                gdsImportObj.createCellItems()
+                gdsImportObj.signals.progress.connect(self._gdsImportProgress)
+                gdsImportRunner = startThread(gdsImportObj.convertCells)
+                gdsImportRunner.signals.finished.connect(
+                    lambda _: self.logger.info("GDS Import is finished.")
+                )
+                gdsImportRunner.signals.error.connect(
+                    lambda error: self.logger.error(f"GDS Import failed: {error[0]}")
+                )
                 self.threadPool.start(gdsImportRunner)
-                self.logger.info("GDS Import is finished.")
             except Exception as e:
                 self.logger.error(f"GDS Import failed: {e}")
 
+    def _gdsImportProgress(self, done: int, total: int, cellName: str):
+        self.mainW_statusbar.showMessage(f"GDS Import: {cellName} ({done}/{total})")
+        if done == total:
+            self.mainW_statusbar.showMessage(self.STATUS_READY)
 
     def createNewLibrary(self, libraryName):
         warning = QMessageBox()
@@ -35,6 +35,7 @@ from PySide6.QtWidgets import (QDialog, QGridLayout, QMenu, QToolBar, QWidget, )
 import revedaEditor.backend.dataDefinitions as ddef
 import revedaEditor.backend.libraryMethods as libm
 import revedaEditor.backend.libraryModelView as lmview
+import revedaEditor.backend.metrics as metrics
 import revedaEditor.backend.libBackEnd as libb
 import revedaEditor.common.shapes as shp  # import the shapes
 import revedaEditor.fileio.symbolEncoder as symenc
@@ -415,12 +416,11 @@ class schematicEditor(edw.editorWindow):
         return None
 
     def runNetlisting(self, netlist_obj, threadPool: QThreadPool = None):
-        with self.measureDuration():
-            xyceNetlRunner = startThread(fn=netlist_obj.writeNetlist)
-            xyceNetlRunner.signals.finished.connect(self.netListingFinished)
-            xyceNetlRunner.signals.error.connect(self.netlistingError)
-            xyceNetlRunner.setAutoDelete(False)
-            threadPool.start(xyceNetlRunner)
+        xyceNetlRunner = startThread(fn=netlist_obj.writeNetlist)
+        xyceNetlRunner.signals.finished.connect(self.netListingFinished)
+        xyceNetlRunner.signals.error.connect(self.netlistingError)
+        xyceNetlRunner.setAutoDelete(False)
+        threadPool.start(xyceNetlRunner)
 
     def netListingFinished(self, result):
         self.logger.info(f"Netlisting finished: {result}")
@@ -653,6 +653,7 @@ class xyceNetlist:
     def stopViewList(self, value: List[str]):
         self._stopViewList = value
 
+    @metrics.traced("netlist.write")
     def writeNetlist(self):
         with self.filePathObj.open(mode="w") as cirFile:
             cirFile.write("*".join(["\n", 80 * "*", "\n", "* Revolution EDA CDL Netlist\n",
@@ -687,7 +688,8 @@ class xyceNetlist:
         """
         schematicScene = schematic.centralW.scene
         schematicScene.nameSceneNets()  # name all nets in the schematic
-        sceneSymbolSet = schematicScene.findSceneSymbolSet()
+        sceneSymbolSet = schematicScene.findNetlistSymbolSet()
+        metrics.count("netlist.instances", len(sceneSymbolSet))
         schematicScene.generatePinNetMap(sceneSymbolSet)
         for elementSymbol in sceneSymbolSet:
             self.processElementSymbol(elementSymbol, schematic, cirFile)
@@ -876,6 +878,7 @@ class vacaskNetlist():
     def stopViewList(self, value: List[str]):
         self._stopViewList = value
 
+    @metrics.traced("netlist.write")
     def writeNetlist(self):
         with self.filePathObj.open(mode="w") as cirFile:
             cirFile.write("*".join(
@@ -910,7 +913,8 @@ class vacaskNetlist():
         """
         schematicScene = schematic.centralW.scene
         schematicScene.nameSceneNets()  # name all nets in the schematic
-        sceneSymbolSet = schematicScene.findSceneSymbolSet()
+        sceneSymbolSet = schematicScene.findNetlistSymbolSet()
+        metrics.count("netlist.instances", len(sceneSymbolSet))
         schematicScene.generatePinNetMap(sceneSymbolSet)
         for elementSymbol in sceneSymbolSet:
             self.processElementSymbol(elementSymbol, schematic, cirFile)
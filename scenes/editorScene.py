@@ -21,22 +21,47 @@
 #    License: Mozilla Public License 2.0
 #    Licensor: Revolution Semiconductor (Registered in the Netherlands)
 
-from typing import List, Sequence
+from typing import List, Optional, Sequence, Tuple
 from PySide6.QtCore import (QEvent, QPoint, QRectF, Qt, )
 from PySide6.QtGui import (QGuiApplication, QTransform,)
 from PySide6.QtWidgets import (QGraphicsScene, QMenu, QGraphicsItem,
                                QDialog,
-                               QCompleter)
-from contextlib import contextmanager
-import time
+                               QCompleter, QMessageBox)
+import json
+import shutil
+import weakref
 import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.backend.editJournal as ejr
 import revedaEditor.backend.undoStack as us
 import revedaEditor.gui.propertyDialogues as pdlg
 
 
+def _reusedEncoder(encoder: json.JSONEncoder):
+    """
+    encoder.encode for one item dictionary at a time. JSONEncoder.encode sets
+    up a new C encoder on every call, which costs as much as the encoding of
+    a small dictionary, so one C encoder is made and reused instead.
+    """
+    if json.encoder.c_make_encoder is None or encoder.indent is not None:
+        return encoder.encode
+    try:
+        cEncoder = json.encoder.c_make_encoder(
+            {} if encoder.check_circular else None, encoder.default,
+            json.encoder.encode_basestring_ascii if encoder.ensure_ascii
+            else json.encoder.encode_basestring,
+            encoder.indent, encoder.key_separator, encoder.item_separator,
+            encoder.sort_keys, encoder.skipkeys, encoder.allow_nan)
+    except TypeError:
+        # the C encoder arguments are not part of the public json API
+        return encoder.encode
+    return lambda itemDict: "".join(cEncoder(itemDict, 0))
+
+
 class editorScene(QGraphicsScene):
     # Class-level constants for quick access
     DEFAULT_GRID = (20, 10)
+    # item types whose encodings are reused between saves, see encodeItems
+    cachedItemTypes: Tuple[type, ...] = ()
     def __init__(self, parent):
         super().__init__()
         self.parent = parent
@@ -67,6 +92,15 @@ class editorScene(QGraphicsScene):
         # Initialize undo stack with limit
         self.undoStack = us.undoStack()
         self.undoStack.setUndoLimit(99)
+        # crash-recovery journal, started when the editor window is shown
+        self.journal: Optional[ejr.editJournal] = None
+        # encoded items from the last save and the items changed since
+        self._encodedItems = weakref.WeakKeyDictionary()
+        self._encodedOrigin = None
+        self._dirtyItems = weakref.WeakSet()
+        self._lastSelection = []
+        self.undoStack.itemsChanged.connect(self.markItemsDirty)
+        self.selectionChanged.connect(self._markSelectionDirty)
 
         # Group selection-related attributes
         self.partialSelection = False
@@ -74,6 +108,8 @@ class editorScene(QGraphicsScene):
         self._selectedItems = []
         self._selectedItemGroup = None
         self._groupItems = []
+        # positions of the selected items at mouse press, to record drags
+        self._dragStartPositions = []
 
         # Initialize UI elements
         self.origin = QPoint(0, 0)
@@ -111,6 +147,8 @@ class editorScene(QGraphicsScene):
         if event.button() == Qt.MouseButton.LeftButton:
             self.mousePressLoc = event.scenePos().toPoint()
             selectedItems = self.selectedItems()
+            self._dragStartPositions = [(item, item.pos()) for item in selectedItems
+                                        if item.parentItem() is None]
             if self.editModes.moveItem and selectedItems:
                 self._selectedItemGroup = self.createItemGroup(selectedItems)
                 self._selectedItemGroup.setFlag(QGraphicsItem.ItemIsMovable)
@@ -128,7 +166,28 @@ class editorScene(QGraphicsScene):
                 self._groupItems = self._selectedItemGroup.childItems()
                 self.destroyItemGroup(self._selectedItemGroup)
                 self._selectedItemGroup = None
+            self._recordDragMove()
 
+    def _recordDragMove(self):
+        """
+        Push an undo command for the items moved by a mouse drag. Drags of the
+        same items merge into one command.
+        """
+        startPositions, self._dragStartPositions = self._dragStartPositions, []
+        moved = [(item, item.pos() - start) for item, start in startPositions
+                 if item.scene() is self and item.pos() != start]
+        if not moved:
+            return
+        delta = moved[0][1]
+        # items that moved by different amounts were not dragged together
+        if any(itemDelta != delta for _, itemDelta in moved):
+            return
+        # put the items back so the edit journal sees the move as any other
+        # undo command, pushing it redoes the move
+        for item, _ in moved:
+            item.moveBy(-delta.x(), -delta.y())
+        self.undoStack.push(us.undoMoveByCommand(self, [item for item, _ in moved],
+                                                 delta.x(), delta.y(), "Drag Items"))
 
     def snapToBase(self, number, base):
         """
@@ -224,6 +283,16 @@ class editorScene(QGraphicsScene):
         Will be implemented in the subclasses.
         '''
 
+    def serializeItem(self, item: QGraphicsItem) -> Optional[str]:
+        """
+        Encoder output of an item for compact undo records, None if the item
+        cannot be encoded. Implemented in the subclasses.
+        """
+        return None
+
+    def deserializeItem(self, record: str) -> Optional[QGraphicsItem]:
+        return None
+
     def flipHorizontal(self):
         for item in self.selectedItems():
             item.flipTuple = (-1, 1)
@@ -276,6 +345,8 @@ class editorScene(QGraphicsScene):
 
             # Reload layout
             self.loadDesign(self.editorWindow.file)
+            # the unsaved edits are gone, so are their journal records
+            self.resetJournal()
 
             # Optional: Update scene rect to fit content
             self.setSceneRect(self.itemsBoundingRect())
@@ -293,6 +364,82 @@ class editorScene(QGraphicsScene):
         """
         pass
 
+    def markItemsDirty(self, items: Sequence[QGraphicsItem]) -> None:
+        """Encode the items again at the next save."""
+        self._dirtyItems.update(item.topLevelItem() for item in items)
+
+    def _markSelectionDirty(self) -> None:
+        # items are edited in place only while they are selected
+        selection = self.selectedItems()
+        self.markItemsDirty(self._lastSelection)
+        self.markItemsDirty(selection)
+        self._lastSelection = selection
+
+    def encodeItems(self, items: Sequence[QGraphicsItem], itemDict,
+                    encoder: json.JSONEncoder) -> List[str]:
+        """
+        Encode the items to JSON for saving, itemDict turns an item into plain
+        data for the encoder. Items of cachedItemTypes that did not change
+        since the previous save reuse their previous encoding.
+        """
+        origin = self.origin.toTuple()
+        if origin != self._encodedOrigin:
+            # encoded positions are relative to the origin
+            self._encodedItems.clear()
+            self._encodedOrigin = origin
+        self.markItemsDirty(self.selectedItems())
+        dirty = self._dirtyItems
+        checkDirty = bool(dirty)
+        cache = self._encodedItems
+        cached = cache.get
+        encode = _reusedEncoder(encoder)
+        encoded = []
+        for item in items:
+            text = None if checkDirty and item in dirty else cached(item)
+            if text is None:
+                text = encode(itemDict(item))
+                if isinstance(item, self.cachedItemTypes):
+                    cache[item] = text
+            encoded.append(text)
+        dirty.clear()
+        return encoded
+
+    def startJournal(self) -> None:
+        """
+        Start journaling the edits of the scene. Edits left in the journal by
+        a session that did not close are offered for recovery first.
+        """
+        file = self.editorWindow.file
+        path = ejr.journalPath(file)
+        if path.exists():
+            recovered = ejr.replayJournal(file)
+            if recovered and QMessageBox.question(
+                    self.editorWindow, "Recover Edits",
+                    f"{self.editorWindow.cellName}:{self.editorWindow.viewName} has "
+                    f"unsaved edits from a session that did not close. Recover them?"
+            ) == QMessageBox.Yes:
+                shutil.copy2(file, file.with_name(f"{file.name}.bak"))
+                with file.open(mode="w") as f:
+                    json.dump(recovered, f)
+                self.reloadScene()
+                self.logger.info(f"Recovered unsaved edits of {self.editorWindow.cellName}:"
+                                 f"{self.editorWindow.viewName}, saved file is kept as "
+                                 f"{file.name}.bak")
+            path.unlink(missing_ok=True)
+        self.journal = ejr.editJournal(self, path)
+        self.undoStack.journal = self.journal
+
+    def resetJournal(self) -> None:
+        """Empty the journal once the scene is saved."""
+        if self.journal:
+            self.journal.reset()
+
+    def stopJournal(self) -> None:
+        if self.journal:
+            self.undoStack.journal = None
+            self.journal.close()
+            self.journal = None
+
 
     def fitItemsInView(self) -> None:
         self.setSceneRect(self.itemsBoundingRect().adjusted(-40, -40, 40, 40))
@@ -383,11 +530,3 @@ class editorScene(QGraphicsScene):
         dlg.instanceViewName.setCompleter(viewNameCompleter)
         dlg.instanceViewName.setText(viewNameList[0])
 
-    @contextmanager
-    def measureDuration(self):
-        start_time = time.perf_counter()
-        try:
-            yield
-        finally:
-            end_time = time.perf_counter()
-            self.logger.info(f"Total processing time: {end_time - start_time:.3f} seconds")
@@ -27,21 +27,28 @@ import inspect
 import json
 import pathlib
 import time
-from typing import List, Dict, Any, Union, Generator
+from typing import List, Dict, Any, Optional, Union, Generator
 
 from contextlib import contextmanager
 
 from PySide6.QtCore import (QPoint, QPointF, QRect, QRectF, Qt, QLineF,)
 from PySide6.QtGui import (QColor, QGuiApplication, QTransform, QPen, QFontDatabase,
-                           QFont, )
+                           QFont, QPolygonF, )
 from PySide6.QtWidgets import (QDialog, QGraphicsSceneMouseEvent, QGraphicsLineItem,
-                               QCompleter, QGraphicsRectItem, QGraphicsItem)
+                               QCompleter, QGraphicsRectItem, QGraphicsItem,
+                               QGraphicsPolygonItem)
 
 import revedaEditor.backend.dataDefinitions as ddef
 import revedaEditor.backend.libraryMethods as libm
 import revedaEditor.backend.libraryModelView as lmview
+import revedaEditor.backend.metrics as metrics
 import revedaEditor.backend.undoStack as us
+import revedaEditor.checks.connectivity as lcon
+import revedaEditor.checks.density as lden
+import revedaEditor.checks.layout as lchk
+import revedaEditor.common.layoutGeometry as lgeo
 import revedaEditor.common.layoutShapes as lshp  # import layout shapes
+import revedaEditor.fileio.importGDS as igds
 import revedaEditor.fileio.layoutEncoder as layenc
 import revedaEditor.fileio.loadJSON as lj
 import revedaEditor.gui.editFunctions as edf
@@ -58,6 +65,8 @@ pcells = importPDKModule('pcells')
 
 
 class layoutScene(editorScene):
+    cachedItemTypes = (lshp.layoutShape,)
+
     def __init__(self, parent):
         super().__init__(parent)
         self.selectEdLayer = laylyr.pdkAllLayers[0]
@@ -104,6 +113,184 @@ class layoutScene(editorScene):
         self.rulerTickGap = fabproc.dbu
         self.rulerTickLength = 10
         self.rulerWidth = 2
+        # instances paint their static shapes per layer, see setBatchPainting
+        self.batchPainting = False
+        # static shapes are painted from off-screen tiles, see layoutView
+        self.tileCaching = False
+        self.tilePass = False
+        # instances this deep in the hierarchy are drawn as labeled boxes and
+        # their shapes are only created when the levels are raised
+        self.displayLevels = 32
+        # id(layer) -> layout shapes on that layer, including instance children
+        self._layerItems = {}
+        self.defaultDensityWindow = 100  # microns
+        # design rule violation markers, see checkErrors
+        self.drcMarkerSet = set()
+        # outlines of the highlighted layout nets, see highlightNet
+        self.netHighlightSet = set()
+
+    def topLevelShapes(self) -> list:
+        """
+        Layout shapes without a parent item, i.e. the items that are saved.
+        Markers, highlights and guide lines are plain graphics items.
+        """
+        return [item for item in self.items()
+                if item.parentItem() is None and isinstance(item, lshp.layoutShape)]
+
+    def setBatchPainting(self, value: bool) -> None:
+        """
+        Switch between painting the shapes inside instances item by item and
+        painting them per layer from batched geometry.
+        """
+        self.batchPainting = value
+        for item in self.items():
+            if isinstance(item, lshp.layoutInstance) and item.parentItem() is None:
+                item.setBatchPainting(value)
+
+    def setDisplayLevels(self, levels: int) -> None:
+        """
+        Show the contents of instances less than levels deep in the hierarchy.
+        Deferred instances above the new levels are expanded.
+        """
+        self.displayLevels = levels
+        for item in self.items():
+            if isinstance(item, lshp.layoutInstance) and item.parentItem() is None:
+                item.expandToLevel(levels)
+        self.update()
+
+    def indexLayerItem(self, item, layer: ddef.layLayer) -> None:
+        self._layerItems.setdefault(id(layer), set()).add(item)
+
+    def unindexLayerItem(self, item, layer: ddef.layLayer) -> None:
+        self._layerItems.get(id(layer), set()).discard(item)
+
+    def layerItems(self, layer: ddef.layLayer) -> list:
+        """Return the shapes on the given layer without visiting all items."""
+        return list(self._layerItems.get(id(layer), ()))
+
+    def clear(self):
+        # QGraphicsScene.clear does not notify the items it deletes
+        self._layerItems.clear()
+        self.drcMarkerSet.clear()
+        self.netHighlightSet.clear()
+        super().clear()
+
+    def checkErrors(self):
+        """
+        Run the design rule checks of the PDK on the flattened layout and mark
+        the violations.
+        """
+        self.logger.info("Checking design rules...")
+        self.deleteErrors()
+        index = lgeo.buildLayoutIndex(self.topLevelShapes())
+        rules = lchk.pdkRules(fabproc, lgeo.layerIndices())
+        markers = lchk.runChecks(index, rules)
+        densityRules = lden.pdkDensityRules(fabproc, lgeo.layerIndices())
+        markers.extend(lden.runDensityChecks(index, densityRules)[1])
+        rules.extend(densityRules)
+        errorPen = QPen(Qt.red, 1, Qt.DashDotLine)
+        errorPen.setCosmetic(True)
+        ruleCounts = {}
+        for marker in markers:
+            layer = laylyr.pdkAllLayers[marker.layer]
+            left, top, right, bottom = marker.bbox
+            rectItem = self.addRect(QRectF(left, top, right - left, bottom - top), errorPen)
+            value = (f"{marker.value:.1%}" if marker.rule == "density" else
+                     f"{marker.value / fabproc.dbu:.3f}")
+            rectItem.setToolTip(f"{layer.name}.{layer.purpose} {marker.rule}: {value}")
+            self.drcMarkerSet.add(rectItem)
+            ruleCounts[marker.rule] = ruleCounts.get(marker.rule, 0) + 1
+        for rule, count in ruleCounts.items():
+            self.logger.warning(f"{count} {rule} violations")
+        self.logger.info(f"{len(rules)} rules checked, {len(markers)} violations found.")
+
+    def deleteErrors(self):
+        for rectItem in self.drcMarkerSet:
+            self.removeItem(rectItem)
+        self.drcMarkerSet.clear()
+
+    def densityMap(self, layer: ddef.layLayer) -> lden.densityMap:
+        """
+        Density of a layer over the layout in the windows of its PDK density
+        rule, or in windows of defaultDensityWindow microns.
+        """
+        layerIndex = lgeo.layerIndices()
+        index = lgeo.buildLayoutIndex(self.topLevelShapes())
+        key = layerIndex[id(layer)]
+        rules = [rule for rule in lden.pdkDensityRules(fabproc, layerIndex) if rule.layer == key]
+        if rules:
+            window, step = rules[0].window, rules[0].step
+        else:
+            window = step = round(self.defaultDensityWindow * fabproc.dbu)
+        return lden.layerDensity(index.layer(key), key, lden.indexExtent(index), window, step)
+
+    def extractNets(self) -> lcon.layoutNets:
+        """
+        Extract the nets of the flattened layout and attach the names of the
+        labels and pins to them.
+        """
+        topItems = self.topLevelShapes()
+        index = lgeo.buildLayoutIndex(topItems)
+        groupOf, viaConnections = lcon.pdkConnectivity(fabproc, laylyr.pdkAllLayers,
+                                                       lgeo.layerIndices())
+        nets = lcon.extractNets(index, groupOf, viaConnections)
+        for layer, (x, y), name, terminal in lgeo.flattenLabels(topItems):
+            net = nets.netAt(lcon.groupLayers(groupOf, layer), x, y)
+            if net is None:
+                if terminal:
+                    self.logger.warning(f"Pin {terminal[1]} is not on a shape.")
+                continue
+            if name:
+                nets.attachName(net, name)
+            if terminal:
+                nets.terminals[terminal] = net
+        return nets
+
+    def highlightNet(self):
+        """
+        Outline all the shapes connected to the selected shapes.
+        """
+        self.clearNetHighlight()
+        selectedItems = set(self.selectedItems())
+        if not selectedItems:
+            return
+        nets = self.extractNets()
+        selectedNets = set()
+        for layer in nets.index.layers:
+            for shapeIndex, item in enumerate(nets.index.layer(layer).payloads):
+                if item in selectedItems or item.topLevelItem() in selectedItems:
+                    selectedNets.add(nets.shapeNet(layer, shapeIndex))
+        highlightPen = QPen(QColor("yellow"), 2, Qt.SolidLine)
+        highlightPen.setCosmetic(True)
+        for net in selectedNets:
+            for layer, shapeIndex in nets.netShapes(net):
+                points = nets.index.layer(layer).polygons[shapeIndex]
+                polygonItem = QGraphicsPolygonItem(
+                    QPolygonF([QPointF(x, y) for x, y in points.tolist()]))
+                polygonItem.setPen(highlightPen)
+                polygonItem.setZValue(10000)
+                self.addItem(polygonItem)
+                self.netHighlightSet.add(polygonItem)
+            self.logger.info(f"Net {nets.netName(net)} highlighted.")
+
+    def clearNetHighlight(self):
+        for polygonItem in self.netHighlightSet:
+            self.removeItem(polygonItem)
+        self.netHighlightSet.clear()
+
+    def tileLive(self, item) -> bool:
+        """
+        True if the item is painted directly by the view rather than into
+        the tile cache: selected items, rulers and items being drawn or
+        stretched.
+        """
+        top = item.topLevelItem()
+        if top.isSelected() or isinstance(top, lshp.layoutRuler):
+            return True
+        return any(top is draft for draft in (
+            self._newPath, self._stretchPath, self._newPin, self._newLabel,
+            self._newRect, self._newPolygon, self._singleVia, self._arrayVia,
+            self._newRuler, self.newInstance, ))
 
     @property
     def drawMode(self):
@@ -378,13 +565,16 @@ class layoutScene(editorScene):
         """
         match layoutInstanceTuple.viewItem.viewType:
             case "layout":
+                igds.materializeLayoutView(layoutInstanceTuple.viewItem.viewPath)
                 with layoutInstanceTuple.viewItem.viewPath.open("r") as temp:
                     try:
                         decodedData = json.load(temp)
                         if decodedData[0]["viewType"] != "layout":
                             self.logger.error("Not a layout cell")
                         else:
-                            instanceShapes = [lj.layoutItems(self).create(item) for item in
+                            # the shapes are one level below the new instance
+                            layoutItems = lj.layoutItems(self, 1)
+                            instanceShapes = [layoutItems.create(item) for item in
                                               decodedData[2:] if
                                               item.get("type") in self.layoutShapes]
                             layoutInstance = lshp.layoutInstance(instanceShapes)
@@ -432,6 +622,7 @@ class layoutScene(editorScene):
         return {item for item in self.items() if isinstance(item, lshp.layoutInstance)}
 
 
+    @metrics.traced("layout.save")
     def saveLayoutCell(self, filePathObj: pathlib.Path) -> None:
         """Save the layout cell to a JSON file.
 
@@ -440,7 +631,7 @@ class layoutScene(editorScene):
 
         Raises:
             IOError: If there are issues writing to the file
-            JSONEncodeError: If there are issues encoding the JSON
+            TypeError: If an item cannot be encoded
             ValueError: If the layout data is invalid
         """
         def get_layout_data() -> list:
@@ -456,7 +647,7 @@ class layoutScene(editorScene):
                 raise ValueError("Missing required attribute: snapTuple")
 
             # Pre-validate top-level items
-            top_level_items = [item for item in self.items() if item.parentItem() is None]
+            top_level_items = self.topLevelShapes()
 
             return [
                 {"viewType": "layout"},
@@ -467,20 +658,31 @@ class layoutScene(editorScene):
         def safeJsonWrite(file_obj, data: list) -> None:
             """Write JSON data with optimized settings.
 
+            The items are written as the encodings kept from the previous
+            save unless they changed, the output is the same as dumping
+            the whole list.
+
             Args:
                 file_obj: File object to write to
                 data: Data to be written
 
             Raises:
-                JSONEncodeError: If JSON encoding fails
+                TypeError: If JSON encoding fails
             """
-            json.dump(
-                data,
-                file_obj,
-                cls=layenc.layoutEncoder,
-                separators=(',', ':'),  # Minimize JSON size
-                check_circular=False    # Optimize for non-circular references
+            header = [json.dumps(entry, separators=(',', ':')) for entry in data[:2]]
+            encodedItems = self.encodeItems(
+                data[2:],
+                layenc.layoutItemDict,
+                layenc.layoutEncoder(
+                    separators=(',', ':'),  # Minimize JSON size
+                    check_circular=False    # Optimize for non-circular references
+                )
             )
+            file_obj.write("[" + ",".join(header))
+            for start in range(0, len(encodedItems), 65536):
+                file_obj.write(",")
+                file_obj.write(",".join(encodedItems[start:start + 65536]))
+            file_obj.write("]")
 
         try:
             # Create parent directory if it doesn't exist
@@ -497,6 +699,7 @@ class layoutScene(editorScene):
 
                 # Atomic rename for safer file writing
                 temp_path.replace(filePathObj)
+                self.resetJournal()
 
             finally:
                 # Clean up temp file if it still exists
@@ -512,7 +715,7 @@ class layoutScene(editorScene):
             self.logger.error(f"Invalid layout data: {str(e)}")
             raise
 
-        except (IOError, json.JSONEncodeError) as e:
+        except (IOError, TypeError) as e:
             self.logger.error(
                 f"Failed to save layout to {filePathObj}: {str(e)}"
             )
@@ -588,13 +791,16 @@ class layoutScene(editorScene):
                     raise ValueError(f"Invalid JSON format: {e}")
 
         try:
-            with self.measureDuration():
+            with metrics.span("layout.load"):
                 # Validate file existence and size
                 if not filePathObj.exists():
                     raise FileNotFoundError(f"Layout file not found: {filePathObj}")
+                if igds.materializeLayoutView(filePathObj):
+                    self.logger.info(f"Layout view written from GDS: {filePathObj}")
 
                 file_size = filePathObj.stat().st_size
                 self.logger.debug(f"Loading layout file of size: {file_size/1024:.2f}KB")
+                metrics.observe("layout.load.kB", file_size / 1024)
 
                 # Load and validate data
                 decoded_data = stream_load_json(filePathObj)
@@ -961,6 +1167,10 @@ class layoutScene(editorScene):
 
         dlg.xEdit.setText(str(item.scenePos().x() / fabproc.dbu))
         dlg.yEdit.setText(str(item.scenePos().y() / fabproc.dbu))
+        dlg.columnsEdit.setText(str(item.arrayTuple.columns))
+        dlg.rowsEdit.setText(str(item.arrayTuple.rows))
+        dlg.xPitchEdit.setText(str(item.arrayTuple.xPitch / fabproc.dbu))
+        dlg.yPitchEdit.setText(str(item.arrayTuple.yPitch / fabproc.dbu))
 
         if dlg.exec() == QDialog.Accepted:
             libraryName = dlg.instanceLibName.text().strip()
@@ -982,6 +1192,12 @@ class layoutScene(editorScene):
                     instanceValuesDict[key] = value.text()
             if instanceValuesDict:
                 newLayoutInstance(*instanceValuesDict.values())
+            newLayoutInstance.arrayTuple = ddef.instanceArrayTuple(
+                max(int(dlg.columnsEdit.text()), 1),
+                max(int(dlg.rowsEdit.text()), 1),
+                self.snapToBase(float(dlg.xPitchEdit.text()) * fabproc.dbu, self.snapTuple[0]),
+                self.snapToBase(float(dlg.yPitchEdit.text()) * fabproc.dbu, self.snapTuple[1]),
+            )
             newLayoutInstance.setPos(QPoint(
                 self.snapToBase(float(dlg.xEdit.text()) * fabproc.dbu, self.snapTuple[0]),
                 self.snapToBase(float(dlg.yEdit.text()) * fabproc.dbu,
@@ -1042,34 +1258,44 @@ class layoutScene(editorScene):
             dlg.xEdit.setText("0.0")
             dlg.yEdit.setText("0.0")
             if dlg.exec() == QDialog.Accepted:
-                for item in self.selectedItems():
-                    item.moveBy(self.snapToBase(float(dlg.xEdit.text()) * fabproc.dbu,
-                                                self.snapTuple[0]),
-                                self.snapToBase(float(dlg.yEdit.text()) * fabproc.dbu,
-                                                self.snapTuple[1]), )
+                dx = self.snapToBase(float(dlg.xEdit.text()) * fabproc.dbu,
+                                     self.snapTuple[0])
+                dy = self.snapToBase(float(dlg.yEdit.text()) * fabproc.dbu,
+                                     self.snapTuple[1])
+                self.undoStack.push(us.undoMoveByCommand(self, self.selectedItems(), dx, dy))
                 self.editorWindow.messageLine.setText(
                     f"Moved items by {dlg.xEdit.text()} and {dlg.yEdit.text()}")
                 self.editModes.setMode("selectItem")
 
+    def serializeItem(self, item: QGraphicsItem) -> Optional[str]:
+        try:
+            return json.dumps(item, cls=layenc.layoutEncoder)
+        except (TypeError, ValueError, AttributeError):
+            return None
+
+    def deserializeItem(self, record: str) -> Optional[QGraphicsItem]:
+        return lj.layoutItems(self).create(json.loads(record))
+
     def copySelectedItems(self):
         selectedItems = [item for item in self.selectedItems() if item.parentItem() is None]
         if selectedItems:
+            # shift position by one grid unit to right and down
+            offset = QPointF(self.snapTuple[0] * fabproc.dbu,
+                             self.snapTuple[1] * fabproc.dbu)
+            shapes = []
             for item in selectedItems:
-                selectedItemJson = json.dumps(item, cls=layenc.layoutEncoder)
-                itemCopyDict = json.loads(selectedItemJson)
-                shape = lj.layoutItems(self).create(itemCopyDict)
-                if shape is not None:
-                    item.setSelected(False)
-                    self.addUndoStack(shape)
-                    shape.setSelected(True)
-                    # shift position by four grid units to right and down
-                    shape.setPos(QPoint(item.pos().x() + self.snapTuple[0] * fabproc.dbu,
-                                        item.pos().y() + self.snapTuple[1] * fabproc.dbu, ))
-                    if isinstance(shape, lshp.layoutInstance) or isinstance(shape,
-                                                                            lshp.layoutPcell):
-                        self.itemCounter += 1
-                        shape.counter = self.itemCounter
-                        shape.instanceName = f"I{shape.counter}"
+                shape = item.clone()
+                shape.setPos(item.pos() + offset)
+                if isinstance(shape, lshp.layoutInstance):
+                    self.itemCounter += 1
+                    shape.counter = self.itemCounter
+                    shape.instanceName = f"I{shape.counter}"
+                item.setSelected(False)
+                shapes.append(shape)
+            # the whole paste is undone in one step
+            self.addListUndoStack(shapes)
+            for shape in shapes:
+                shape.setSelected(True)
 
     def deleteAllRulers(self):
         for ruler in self.rulersSet:
@@ -1121,9 +1347,7 @@ class layoutScene(editorScene):
         self._stretchPath.stretch = True
         self._stretchPath.name = pathItem.name
 
-        addDeleteStretchNetCommand = us.addDeleteShapeUndo(self, self._stretchPath,
-                                                           pathItem)
-        self.undoStack.push(addDeleteStretchNetCommand)
+        self.undoStack.push(us.stretchShapeUndo(self, self._stretchPath, pathItem))
 
     def findClosestFontSize(self, sizes: List[int], target: int = 16) -> int:
         return min(sizes, key=lambda x: abs(x - target))
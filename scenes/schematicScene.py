@@ -29,7 +29,7 @@ import pathlib
 from collections import Counter
 
 import re
-from typing import Union, Set, Dict, Tuple, List
+from typing import Optional, Union, Set, Dict, Tuple, List
 from PySide6.QtCore import (
     QPoint,
     QPointF,
@@ -42,7 +42,6 @@ from PySide6.QtCore import (
     QRegularExpression,
 )
 from PySide6.QtGui import (
-    QTextDocument,
     QFontDatabase,
     QFont,
     QGuiApplication,
@@ -59,7 +58,9 @@ from PySide6.QtWidgets import (
 
 import revedaEditor.backend.dataDefinitions as ddef
 import revedaEditor.backend.libraryMethods as libm
+import revedaEditor.backend.metrics as metrics
 import revedaEditor.backend.undoStack as us
+import revedaEditor.common.arrays as arr
 import revedaEditor.common.labels as lbl
 import revedaEditor.common.shapes as shp  # import the shapes
 import revedaEditor.common.net as snet
@@ -78,6 +79,8 @@ schlyr = importPDKModule("schLayers")
 class schematicScene(editorScene):
     wireEditFinished = Signal(snet.schematicNet)
     stretchNet = Signal(snet.schematicNet, str)
+    # nets are renamed in place, so they are always encoded again
+    cachedItemTypes = (shp.schematicSymbol, shp.schematicPin, shp.text)
 
     def __init__(self, parent):
         super().__init__(parent)
@@ -706,10 +709,7 @@ class schematicScene(editorScene):
                 )
         self._stretchNet.stretch = True
         self._stretchNet.mergeNetName(netItem)
-        addDeleteStretchNetCommand = us.addDeleteShapeUndo(
-            self, self._stretchNet, netItem
-        )
-        self.undoStack.push(addDeleteStretchNetCommand)
+        self.undoStack.push(us.stretchShapeUndo(self, self._stretchNet, netItem))
 
     def generatePinNetMap(self, sceneSymbolSet: set[shp.schematicSymbol]):
         """
@@ -777,7 +777,19 @@ class schematicScene(editorScene):
         Find all the symbols on the scene as a set.
         """
         return {item for item in self.items() if isinstance(item, shp.schematicSymbol)}
-        
+
+    def findNetlistSymbolSet(self) -> set:
+        """
+        Find the symbols to netlist, symbol arrays are replaced by their
+        elements.
+        """
+        symbolSet = set()
+        for item in self.findSceneSymbolSet():
+            if arr.isArray(item.arrayTuple):
+                symbolSet.update(arr.symbolArrayElements(item))
+            else:
+                symbolSet.add(item)
+        return symbolSet
 
     def findSceneNetsSet(self) -> set[snet.schematicNet]:
         return {item for item in self.items() if isinstance(item, snet.schematicNet)}
@@ -930,8 +942,7 @@ class schematicScene(editorScene):
                 setattr(symbolInstance, prop, value)
 
             # Process labels
-            for labelItem in symbolInstance.labels.values():
-                labelItem.labelDefs()
+            symbolInstance.evaluateLabels()
 
             return symbolInstance
 
@@ -945,31 +956,37 @@ class schematicScene(editorScene):
             self.logger.warning(f"instantiation error: {e}")
             return None
 
+    def serializeItem(self, item: QGraphicsItem) -> Optional[str]:
+        try:
+            return json.dumps(item, cls=schenc.schematicEncoder)
+        except (TypeError, ValueError, AttributeError):
+            return None
+
+    def deserializeItem(self, record: str) -> Optional[QGraphicsItem]:
+        return lj.schematicItems(self).create(json.loads(record))
+
     def copySelectedItems(self):
         selectedItems = [
             item for item in self.selectedItems() if item.parentItem() is None
         ]
         if selectedItems:
+            # shift position by four grid units to right and down
+            offset = QPoint(4 * self.snapTuple[0], 4 * self.snapTuple[1])
+            shapes = []
             for item in selectedItems:
-                selectedItemJson = json.dumps(item, cls=schenc.schematicEncoder)
-                itemCopyDict = json.loads(selectedItemJson)
-                shape = lj.schematicItems(self).create(itemCopyDict)
-                if shape is not None:
-                    item.setSelected(False)
-                    self.addUndoStack(shape)
-                    shape.setSelected(True)
-                    # shift position by four grid units to right and down
-                    shape.setPos(
-                        QPoint(
-                            int(item.pos().x() + 4 * self.snapTuple[0]),
-                            int(item.pos().y() + 4 * self.snapTuple[1]),
-                        )
-                    )
-                    if isinstance(shape, shp.schematicSymbol):
-                        self.instanceCounter += 1
-                        shape.instanceName = f"I{self.instanceCounter}"
-                        shape.counter = int(self.instanceCounter)
-                        [label.labelDefs() for label in shape.labels.values()]
+                shape = item.clone()
+                shape.setPos(item.pos().toPoint() + offset)
+                if isinstance(shape, shp.schematicSymbol):
+                    self.instanceCounter += 1
+                    shape.instanceName = f"I{self.instanceCounter}"
+                    shape.counter = int(self.instanceCounter)
+                    shape.evaluateLabels()
+                item.setSelected(False)
+                shapes.append(shape)
+            # the whole paste is undone in one step
+            self.addListUndoStack(shapes)
+            for shape in shapes:
+                shape.setSelected(True)
 
     def saveSchematic(self, file: pathlib.Path):
         """
@@ -991,7 +1008,7 @@ class schematicScene(editorScene):
             if self._snapPointRect.scene():
                 self.removeItem(self._snapPointRect)
             # Write to temporary file first
-            with self.measureDuration():
+            with metrics.span("schematic.save"):
                 with tempFile.open(mode="w", buffering=8192) as f:
                     # Start array
                     f.write("[\n")
@@ -1009,16 +1026,19 @@ class schematicScene(editorScene):
                         item for item in self.items() if item.parentItem() is None
                     }
                     self.addItem(self._snapPointRect)
-                    # Stream items
-                    for item in list(topLevelItems):
+                    # Only the items changed since the last save are encoded
+                    try:
+                        encodedItems = self.encodeItems(
+                            list(topLevelItems), schenc.schematicItemDict,
+                            schenc.schematicEncoder(check_circular=False))
+                    except Exception as json_err:
+                        self.logger.error(
+                            f"Failed to serialize item: {str(json_err)}"
+                        )
+                        return
+                    for encodedItem in encodedItems:
                         f.write(",\n")
-                        try:
-                            json.dump(item, f, cls=schenc.schematicEncoder)
-                        except Exception as json_err:
-                            self.logger.error(
-                                f"Failed to serialize item: {str(json_err)}"
-                            )
-                            return
+                        f.write(encodedItem)
 
                     # Close array
                     f.write("\n]")
@@ -1029,6 +1049,7 @@ class schematicScene(editorScene):
 
                 # Atomic file replacement
                 tempFile.replace(file)
+                self.resetJournal()
 
                 self.logger.info(
                     f"Saved schematic to {self.editorWindow.cellName}:"
@@ -1075,7 +1096,7 @@ class schematicScene(editorScene):
         try:
             with filePathObj.open("r") as file:
                 decodedData = json.load(file)
-            with self.measureDuration():
+            with metrics.span("schematic.load"):
                 viewDict, gridSettings, *itemData = decodedData
                 if viewDict.get("viewType") != "schematic":
                     self.logger.error("Not a schematic file!")
@@ -1135,11 +1156,18 @@ class schematicScene(editorScene):
                 item for item in self.selectedItems() if item.parentItem() is None
             ]
             if selectedItems:
+                # instances of the same cell are edited together
+                instanceGroups: Dict[Tuple[str, str, str], List[shp.schematicSymbol]] = {}
                 for item in selectedItems:
-                    item.prepareGeometryChange()
                     if isinstance(item, shp.schematicSymbol):
-                        self.setInstanceProperties(item)
-                    elif isinstance(item, snet.schematicNet):
+                        instanceGroups.setdefault(
+                            (item.libraryName, item.cellName, item.viewName), []
+                        ).append(item)
+                for instances in instanceGroups.values():
+                    self.setInstanceProperties(instances[0], instances[1:])
+                for item in selectedItems:
+                    item.prepareGeometryChange()
+                    if isinstance(item, snet.schematicNet):
                         self.setNetProperties(item)
                     elif isinstance(item, shp.text):
                         self.setTextProperties(item)
@@ -1150,7 +1178,13 @@ class schematicScene(editorScene):
         except Exception as e:
             self.logger.error(e)
 
-    def setInstanceProperties(self, item: shp.schematicSymbol):
+    def setInstanceProperties(self, item: shp.schematicSymbol,
+                              otherItems: List[shp.schematicSymbol] = ()):
+        """
+        Edit the instance properties in a dialog. The label values and
+        visibility, angle and array changed in the dialog are also applied to
+        otherItems, the selected instances of the same cell, in one undo step.
+        """
         dlg = pdlg.instanceProperties(self.editorWindow)
         dlg.libNameEdit.setText(item.libraryName)
         dlg.cellNameEdit.setText(item.cellName)
@@ -1159,11 +1193,20 @@ class schematicScene(editorScene):
         location = (item.scenePos() - self.origin).toTuple()
         dlg.xLocationEdit.setText(str(location[0]))
         dlg.yLocationEdit.setText(str(location[1]))
+        if otherItems:
+            # names and locations are not shared by the instances
+            for edit in (dlg.instNameEdit, dlg.xLocationEdit, dlg.yLocationEdit):
+                edit.setReadOnly(True)
         dlg.angleEdit.setText(str(item.angle))
-        row_index = 0
+        dlg.columnsEdit.setText(str(item.arrayTuple.columns))
+        dlg.rowsEdit.setText(str(item.arrayTuple.rows))
+        dlg.xPitchEdit.setText(str(item.arrayTuple.xPitch))
+        dlg.yPitchEdit.setText(str(item.arrayTuple.yPitch))
+        labelRows = []  # (labelName, value, visible) shown in each row
         # iterate through the item labels.
         for label in item.labels.values():
             if label.labelDefinition not in lbl.symbolLabel.predefinedLabels:
+                row_index = len(labelRows)
                 dlg.instanceLabelsLayout.addWidget(
                     edf.boldLabel(label.labelName[1:], dlg), row_index, 0
                 )
@@ -1178,7 +1221,9 @@ class schematicScene(editorScene):
                 else:
                     visibleCombo.setCurrentIndex(1)
                 dlg.instanceLabelsLayout.addWidget(visibleCombo, row_index, 2)
-                row_index += 1
+                labelRows.append(
+                    (label.labelName, labelValueEdit.text(), visibleCombo.currentText())
+                )
         # now list instance attributes
         for counter, name in enumerate(item.symattrs.keys()):
             dlg.instanceAttributesLayout.addWidget(edf.boldLabel(name, dlg), counter, 0)
@@ -1189,52 +1234,70 @@ class schematicScene(editorScene):
             labelNameEdit.setToolTip(f"{name} attribute (Read Only)")
             dlg.instanceAttributesLayout.addWidget(labelNameEdit, counter, 1)
         if dlg.exec() == QDialog.Accepted:
-            libraryName = dlg.libNameEdit.text().strip()
-            cellName = dlg.cellNameEdit.text().strip()
-            viewName = dlg.viewNameEdit.text().strip()
-            instanceTuple = ddef.viewTuple(libraryName, cellName, viewName)
+            # only the labels edited in the dialog are set
+            labelEdits = {}
+            for row_index, (labelName, value, visible) in enumerate(labelRows):
+                newValue = dlg.instanceLabelsLayout.itemAtPosition(
+                    row_index, 1).widget().text()
+                newVisible = dlg.instanceLabelsLayout.itemAtPosition(
+                    row_index, 2).widget().currentText()
+                if (newValue, newVisible) != (value, visible):
+                    labelEdits[labelName] = (newValue, newVisible == "True")
+            angle = float(dlg.angleEdit.text().strip())
+            arrayTuple = ddef.instanceArrayTuple(
+                max(int(dlg.columnsEdit.text()), 1),
+                max(int(dlg.rowsEdit.text()), 1),
+                self.snapToBase(float(dlg.xPitchEdit.text()), self.snapTuple[0]),
+                self.snapToBase(float(dlg.yPitchEdit.text()), self.snapTuple[1]),
+            )
+            angle = None if angle == item.angle else angle
+            arrayTuple = None if arrayTuple == item.arrayTuple else arrayTuple
+
+            newInstance = self._editedInstance(
+                item, labelEdits, angle, arrayTuple, dlg.instNameEdit.text().strip()
+            )
             location = QPoint(
                 int(float(dlg.xLocationEdit.text().strip())),
                 int(float(dlg.yLocationEdit.text().strip())),
             )
-            newInstance = self.instSymbol(instanceTuple, location)
-
-            if newInstance:
-                newInstance.instanceName = dlg.instNameEdit.text().strip()
-                newInstance.angle = float(dlg.angleEdit.text().strip())
-                newInstance.counter = item.counter
-
-                tempDoc = QTextDocument()
-                for i in range(dlg.instanceLabelsLayout.rowCount()):
-                    # first create label name document with HTML annotations
-                    tempDoc.setHtml(
-                        dlg.instanceLabelsLayout.itemAtPosition(i, 0).widget().text()
-                    )
-                    # now strip html annotations
-                    tempLabelName = f"@{tempDoc.toPlainText().strip()}"
-                    # check if label name is in label dictionary of item.
-                    if newInstance.labels.get(tempLabelName):
-                        # this is where the label value is set.
-                        newInstance.labels[tempLabelName].labelValue = (
-                            dlg.instanceLabelsLayout.itemAtPosition(i, 1)
-                            .widget()
-                            .text()
-                        )
-                        visible = (
-                            dlg.instanceLabelsLayout.itemAtPosition(i, 2)
-                            .widget()
-                            .currentText()
-                        )
-                        if visible == "True":
-                            newInstance.labels[tempLabelName].labelVisible = True
-                        else:
-                            newInstance.labels[tempLabelName].labelVisible = False
-                [labelItem.labelDefs() for labelItem in newInstance.labels.values()]
-                newInstance.setPos(
-                    self.snapToGrid(location - self.origin, self.snapTuple)
-                )
-                newInstance.flipTuple = item.flipTuple
-                self.undoStack.push(us.addDeleteShapeUndo(self, newInstance, item))
+            newInstance.setPos(self.snapToGrid(location - self.origin, self.snapTuple))
+            newInstances = [newInstance] + [
+                self._editedInstance(other, labelEdits, angle, arrayTuple)
+                for other in otherItems
+            ]
+            undoCommand = us.addDeleteShapesUndo(self, newInstances, [item, *otherItems])
+            undoCommand.setText("Edit Instance Properties")
+            self.undoStack.push(undoCommand)
+
+    @staticmethod
+    def _editedInstance(
+        item: shp.schematicSymbol,
+        labelEdits: Dict[str, Tuple[str, bool]],
+        angle: Optional[float] = None,
+        arrayTuple: Optional[ddef.instanceArrayTuple] = None,
+        instanceName: Optional[str] = None,
+    ) -> shp.schematicSymbol:
+        """
+        Copy of the instance with the edits applied. Only the edited labels and
+        the labels depending on them are evaluated again.
+        """
+        newInstance = item.clone()
+        changedLabels = set()
+        if instanceName is not None and instanceName != item.instanceName:
+            newInstance.instanceName = instanceName
+            changedLabels.add("@instName")
+        if angle is not None:
+            newInstance.angle = angle
+        if arrayTuple is not None:
+            newInstance.arrayTuple = arrayTuple
+        for labelName, (labelValue, labelVisible) in labelEdits.items():
+            label = newInstance.labels.get(labelName)
+            if label is not None:
+                if label.labelValue != labelValue:
+                    changedLabels.add(labelName)
+                label.setValue(labelValue, labelVisible)
+        newInstance.updateLabels(changedLabels)
+        return newInstance
 
     def setNetProperties(self, netItem: snet.schematicNet):
         dlg = pdlg.netProperties(self.editorWindow)
@@ -1425,12 +1488,12 @@ class schematicScene(editorScene):
             item for item in self.items() if isinstance(item, shp.schematicSymbol)
         ]
 
+        self.markItemsDirty(symbolList)
         for index, symbolInstance in enumerate(symbolList):
             symbolInstance.counter = index
             if symbolInstance.instanceName.startswith("I"):
                 symbolInstance.instanceName = f"I{index}"
-                for label in symbolInstance.labels.values():
-                    label.labelDefs()
+                symbolInstance.evaluateLabels()
         self.instanceCounter = index + 1
         self.saveSchematic(self.editorWindow.file)
         self.reloadScene()
@@ -1448,6 +1511,7 @@ class schematicScene(editorScene):
             if otherNetItem.name == netItem.name
         }
 
+    @metrics.traced("schematic.nameNets")
     def nameSceneNets(self):
         """
         Name all nets in the scene.
@@ -29,7 +29,7 @@ from functools import lru_cache
 # from hashlib import new
 import pathlib
 from copy import deepcopy
-from typing import List
+from typing import List, Optional
 
 # import numpy as np
 from PySide6.QtCore import (
@@ -47,6 +47,7 @@ from PySide6.QtGui import (
 )
 from PySide6.QtWidgets import (
     QDialog,
+    QGraphicsItem,
     QGraphicsLineItem,
     QGraphicsRectItem,
     QGraphicsSceneMouseEvent,
@@ -406,11 +407,9 @@ class symbolScene(editorScene):
             dlg.xEdit.setText("0")
             dlg.yEdit.setText("0")
             if dlg.exec() == QDialog.Accepted:
-                for item in self.selectedItems():
-                    item.moveBy(
-                        self.snapToBase(float(dlg.xEdit.text()), self.snapTuple[0]),
-                        self.snapToBase(float(dlg.yEdit.text()), self.snapTuple[1]),
-                    )
+                dx = self.snapToBase(float(dlg.xEdit.text()), self.snapTuple[0])
+                dy = self.snapToBase(float(dlg.yEdit.text()), self.snapTuple[1])
+                self.undoStack.push(us.undoMoveByCommand(self, self.selectedItems(), dx, dy))
             self.editorWindow.messageLine.setText(
                 f"Moved items by {dlg.xEdit.text()} and {dlg.yEdit.text()}"
             )
@@ -617,11 +616,11 @@ class symbolScene(editorScene):
             newPolygon = shp.symbolPolygon(tempPoints)
             self.undoStack.push(us.addDeleteShapeUndo(self, newPolygon, item))
 
-    def loadDesign(self) -> None:
+    def loadDesign(self, filePathObj: Optional[pathlib.Path] = None) -> None:
         """Ultra-fast load implementation without caching"""
         try:
             # Load file contents
-            with open(self.editorWindow.file) as file:
+            with open(filePathObj or self.editorWindow.file) as file:
                 itemsList = json.load(file)
 
             # Disable updates
@@ -705,6 +704,7 @@ class symbolScene(editorScene):
                     indent=4
                 )
 
+            self.resetJournal()
             self.undoStack.clear()
             return True
 
@@ -746,6 +746,15 @@ class symbolScene(editorScene):
                     )
                 self.attributeList = deepcopy(localAttributeList)
 
+    def serializeItem(self, item: QGraphicsItem) -> Optional[str]:
+        try:
+            return json.dumps(item, cls=symenc.symbolEncoder)
+        except (TypeError, ValueError, AttributeError):
+            return None
+
+    def deserializeItem(self, record: str) -> Optional[QGraphicsItem]:
+        return lj.symbolItems(self).create(json.loads(record))
+
     def copySelectedItems(self):
         copyOffset = QPoint(2 * self.snapTuple[0], 2 * self.snapTuple[1])
 
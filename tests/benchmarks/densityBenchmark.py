@@ -0,0 +1,65 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+"""
+Density maps of a large random layer, rasterised strip by strip.
+
+    python densityBenchmark.py [shapes]
+"""
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import revedaEditor.backend.spatialIndex as sidx
+import revedaEditor.checks.density as lden
+
+
+def main(argv: list) -> None:
+    shapeCount = int(argv[1]) if len(argv) > 1 else 1_000_000
+    rng = np.random.default_rng(1)
+    corners = rng.integers(0, 5_000_000, (shapeCount, 2))
+    sizes = rng.integers(50, 2000, (shapeCount, 2))
+    index = sidx.layoutIndex()
+    start = time.perf_counter()
+    index.bulkLoad((0, np.array(((x, y), (x + w, y), (x + w, y + h), (x, y + h))), None)
+                   for (x, y), (w, h) in zip(corners.tolist(), sizes.tolist()))
+    print(f"{shapeCount} shapes loaded in {time.perf_counter() - start:.2f} s")
+
+    region = lden.indexExtent(index)
+    for window, step in ((100_000, 100_000), (50_000, 25_000)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        layerMap = lden.layerDensity(index.layer(0), 0, region, window, step)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+        print(f"window {window} step {step}: {layerMap.densities.shape} windows, "
+              f"{elapsed:.2f} s, peak {peak:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,84 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+"""
+Design rule checks on a large synthetic layout block, flattened from layout
+items and run without a view.
+
+    REVEDA_PDK_PATH=/path/to/PDK python drcBenchmark.py [instances]
+"""
+
+import sys
+import time
+
+from PySide6.QtCore import QPoint
+from PySide6.QtWidgets import QApplication, QGraphicsScene
+
+import revedaEditor.checks.layout as lchk
+import revedaEditor.common.layoutGeometry as lgeo
+import revedaEditor.common.layoutShapes as lshp
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule("layoutLayers")
+
+
+def buildScene(instanceCount: int) -> QGraphicsScene:
+    scene = QGraphicsScene()
+    layers = laylyr.pdkAllLayers
+    columns = int(instanceCount ** 0.5) or 1
+    for index in range(instanceCount):
+        shapes = []
+        for shapeIndex in range(40):
+            x, y = (shapeIndex % 8) * 60, (shapeIndex // 8) * 60
+            # every seventh shape is too narrow
+            height = 10 if shapeIndex % 7 == 0 else 20
+            shapes.append(lshp.layoutRect(QPoint(x, y), QPoint(x + 40, y + height),
+                                          layers[shapeIndex % len(layers)]))
+        instance = lshp.layoutInstance(shapes)
+        instance.setPos((index % columns) * 500, (index // columns) * 400)
+        scene.addItem(instance)
+    return scene
+
+
+def main(argv: list) -> None:
+    app = QApplication.instance() or QApplication(argv)
+    instanceCount = int(argv[1]) if len(argv) > 1 else 2500
+    scene = buildScene(instanceCount)
+    topLevelItems = [item for item in scene.items() if item.parentItem() is None]
+    start = time.perf_counter()
+    index = lgeo.buildLayoutIndex(topLevelItems)
+    print(f"{len(index)} shapes flattened in {time.perf_counter() - start:.2f} s")
+
+    layerCount = len(laylyr.pdkAllLayers)
+    rules = [lchk.widthRule(layer, 15) for layer in range(layerCount)]
+    rules += [lchk.spacingRule(layer, 25) for layer in range(layerCount)]
+    start = time.perf_counter()
+    markers = lchk.runChecks(index, rules)
+    print(f"{len(rules)} rules, {len(markers)} violations in "
+          f"{time.perf_counter() - start:.2f} s")
+    del app
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,93 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+"""
+Compare GDSII and OASIS file size and read/write time with gdstk.
+
+    python layoutFormatBenchmark.py [layout.gds]
+
+Without an argument a synthetic hierarchical library with rectangles, paths,
+labels and arrayed references is generated.
+"""
+
+import pathlib
+import sys
+import tempfile
+import time
+
+import gdstk
+
+
+def syntheticLibrary(cellCount: int = 200, shapesPerCell: int = 500) -> gdstk.Library:
+    library = gdstk.Library(unit=1e-6, precision=1e-9)
+    leafCells = []
+    for cellIndex in range(cellCount):
+        cell = library.new_cell(f"leaf_{cellIndex}")
+        for shapeIndex in range(shapesPerCell):
+            x = (shapeIndex % 25) * 2.0
+            y = (shapeIndex // 25) * 2.0
+            cell.add(gdstk.rectangle((x, y), (x + 1.0, y + 0.5), layer=shapeIndex % 8))
+        cell.add(gdstk.FlexPath([(0, 0), (50, 0), (50, 40)], 0.2, layer=9))
+        cell.add(gdstk.Label(f"pin_{cellIndex}", (0, 0), layer=10))
+        leafCells.append(cell)
+    top = library.new_cell("top")
+    for index, cell in enumerate(leafCells):
+        top.add(
+            gdstk.Reference(
+                cell, (index * 60.0, 0), columns=4, rows=4, spacing=(60.0, 60.0)
+            )
+        )
+    return library
+
+
+def timeIt(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv: list) -> None:
+    workDir = pathlib.Path(tempfile.mkdtemp())
+    if len(argv) > 1:
+        library, _ = timeIt(gdstk.read_gds, argv[1])
+    else:
+        library = syntheticLibrary()
+    gdsPath = workDir / "bench.gds"
+    oasPath = workDir / "bench.oas"
+
+    _, gdsWrite = timeIt(library.write_gds, str(gdsPath))
+    _, oasWrite = timeIt(library.write_oas, str(oasPath))
+    _, gdsRead = timeIt(gdstk.read_gds, str(gdsPath))
+    _, oasRead = timeIt(gdstk.read_oas, str(oasPath))
+    gdsSize = gdsPath.stat().st_size
+    oasSize = oasPath.stat().st_size
+
+    print(f"{'format':8}{'size (kB)':>12}{'write (s)':>12}{'read (s)':>12}")
+    print(f"{'GDSII':8}{gdsSize / 1024:>12.1f}{gdsWrite:>12.4f}{gdsRead:>12.4f}")
+    print(f"{'OASIS':8}{oasSize / 1024:>12.1f}{oasWrite:>12.4f}{oasRead:>12.4f}")
+    print(f"OASIS/GDSII size ratio: {oasSize / gdsSize:.3f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
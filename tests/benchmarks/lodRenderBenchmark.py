@@ -0,0 +1,95 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+"""
+Frame time of a large synthetic layout block while zooming out, with and
+without level of detail rendering.
+
+    REVEDA_PDK_PATH=/path/to/PDK python lodRenderBenchmark.py [instances]
+"""
+
+import sys
+import time
+
+from PySide6.QtCore import QPoint
+from PySide6.QtGui import QImage, QPainter
+from PySide6.QtWidgets import QApplication, QGraphicsItem, QGraphicsScene, QGraphicsView
+
+import revedaEditor.common.layoutShapes as lshp
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule("layoutLayers")
+
+
+def buildScene(instanceCount: int) -> QGraphicsScene:
+    scene = QGraphicsScene()
+    layers = laylyr.pdkAllLayers
+    columns = int(instanceCount ** 0.5) or 1
+    for index in range(instanceCount):
+        shapes = []
+        for shapeIndex in range(40):
+            x, y = (shapeIndex % 8) * 60, (shapeIndex // 8) * 60
+            shapes.append(lshp.layoutRect(QPoint(x, y), QPoint(x + 40, y + 20),
+                                          layers[shapeIndex % len(layers)]))
+        shapes.append(lshp.layoutLabel(QPoint(0, 0), f"I{index}", "Arial", "Regular",
+                                       "10", "Left", "R0", layers[0]))
+        instance = lshp.layoutInstance(shapes)
+        instance.setPos((index % columns) * 600, (index // columns) * 400)
+        scene.addItem(instance)
+    # measure painting, not the device coordinate cache of the items
+    for item in scene.items():
+        item.setCacheMode(QGraphicsItem.NoCache)
+    return scene
+
+
+def frameTime(view: QGraphicsView, image: QImage, frames: int = 3) -> float:
+    start = time.perf_counter()
+    for _ in range(frames):
+        painter = QPainter(image)
+        view.render(painter)
+        painter.end()
+    return (time.perf_counter() - start) / frames
+
+
+def main(argv: list) -> None:
+    app = QApplication.instance() or QApplication(argv)
+    instanceCount = int(argv[1]) if len(argv) > 1 else 400
+    scene = buildScene(instanceCount)
+    view = QGraphicsView(scene)
+    view.resize(1200, 800)
+    image = QImage(1200, 800, QImage.Format.Format_ARGB32_Premultiplied)
+    print(f"{'zoom':>10}{'full (ms)':>12}{'lod (ms)':>12}")
+    for zoom in (1.0, 0.25, 0.05, 0.01):
+        view.resetTransform()
+        view.scale(zoom, zoom)
+        lshp.layoutShape.lodEnabled = False
+        full = frameTime(view, image)
+        lshp.layoutShape.lodEnabled = True
+        lod = frameTime(view, image)
+        print(f"{zoom:>10}{full * 1000:>12.1f}{lod * 1000:>12.1f}")
+    del app
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,93 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+"""
+Encoding time of a large flat layout for saving: the JSONEncoder.default
+dispatch of the previous save paths against item dictionaries encoded with
+one reused encoder, and a second save that reuses the cached encodings.
+
+    REVEDA_PDK_PATH=/path/to/PDK python saveBenchmark.py [shapes]
+"""
+
+import json
+import sys
+import time
+
+from PySide6.QtCore import QLineF, QPoint, QPointF
+from PySide6.QtWidgets import QApplication, QGraphicsScene
+
+import revedaEditor.common.layoutShapes as lshp
+import revedaEditor.fileio.layoutEncoder as layenc
+from revedaEditor.scenes.editorScene import _reusedEncoder
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule("layoutLayers")
+
+
+def buildScene(shapeCount: int) -> QGraphicsScene:
+    scene = QGraphicsScene()
+    scene.setItemIndexMethod(QGraphicsScene.NoIndex)
+    scene.origin = QPoint(0, 0)
+    layers = laylyr.pdkAllLayers
+    for index in range(shapeCount):
+        x, y = (index % 1000) * 100, (index // 1000) * 100
+        layer = layers[index % len(layers)]
+        if index % 10 == 0:
+            scene.addItem(lshp.layoutPath(QLineF(QPointF(x, y), QPointF(x + 80, y)),
+                                          layer, 10, 0, 0, 0))
+        else:
+            scene.addItem(lshp.layoutRect(QPoint(x, y), QPoint(x + 50, y + 50), layer))
+    return scene
+
+
+def timeIt(label: str, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{label:<40}{time.perf_counter() - start:8.2f} s")
+    return result
+
+
+def main(argv: list) -> None:
+    app = QApplication.instance() or QApplication([])
+    shapeCount = int(argv[1]) if len(argv) > 1 else 100_000
+    scene = timeIt(f"build {shapeCount} shapes", lambda: buildScene(shapeCount))
+    items = [item for item in scene.items() if item.parentItem() is None]
+    options = dict(separators=(",", ":"), check_circular=False)
+
+    timeIt("json.dumps per item with cls",
+           lambda: [json.dumps(item, cls=layenc.layoutEncoder, **options) for item in items])
+    whole = timeIt("json.dumps of the item list with cls",
+                   lambda: json.dumps(items, cls=layenc.layoutEncoder, **options))
+    itemDicts = timeIt("item dictionaries", lambda: [layenc.layoutItemDict(item)
+                                                     for item in items])
+    timeIt("json.dumps of the dictionary list", lambda: json.dumps(itemDicts, **options))
+    encode = _reusedEncoder(layenc.layoutEncoder(**options))
+    encoded = timeIt("reused encoder per item dictionary",
+                     lambda: [encode(itemDict) for itemDict in itemDicts])
+    joined = timeIt("join cached encodings", lambda: f"[{','.join(encoded)}]")
+    assert joined == whole, "encodings differ"
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,98 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting) a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#
+#   Add-ons and extensions developed for this software may be distributed
+#   under their own separate licenses.
+#
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+#
+
+"""
+Region queries on a large synthetic layout block through the scene and
+through the flattened layout spatial index.
+
+    REVEDA_PDK_PATH=/path/to/PDK python spatialIndexBenchmark.py [instances]
+"""
+
+import random
+import sys
+import time
+
+from PySide6.QtCore import QPoint, QRectF
+from PySide6.QtWidgets import QApplication, QGraphicsScene
+
+import revedaEditor.common.layoutGeometry as lgeo
+import revedaEditor.common.layoutShapes as lshp
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule("layoutLayers")
+
+
+def buildScene(instanceCount: int) -> QGraphicsScene:
+    scene = QGraphicsScene()
+    layers = laylyr.pdkAllLayers
+    columns = int(instanceCount ** 0.5) or 1
+    for index in range(instanceCount):
+        shapes = []
+        for shapeIndex in range(40):
+            x, y = (shapeIndex % 8) * 60, (shapeIndex // 8) * 60
+            shapes.append(lshp.layoutRect(QPoint(x, y), QPoint(x + 40, y + 20),
+                                          layers[shapeIndex % len(layers)]))
+        instance = lshp.layoutInstance(shapes)
+        instance.setPos((index % columns) * 600, (index // columns) * 400)
+        scene.addItem(instance)
+    return scene
+
+
+def sceneQuery(scene: QGraphicsScene, rect: QRectF, layer) -> list:
+    # what selection and snapping code does today: filter and map every hit
+    return [item.mapToScene(QRectF(item.rect)).boundingRect() for item in scene.items(rect)
+            if isinstance(item, lshp.layoutRect) and item.layer is layer]
+
+
+def main(argv: list) -> None:
+    app = QApplication.instance() or QApplication(argv)
+    instanceCount = int(argv[1]) if len(argv) > 1 else 2500
+    scene = buildScene(instanceCount)
+    topLevelItems = [item for item in scene.items() if item.parentItem() is None]
+    start = time.perf_counter()
+    index = lgeo.buildLayoutIndex(topLevelItems)
+    print(f"{len(index)} shapes indexed in {time.perf_counter() - start:.2f} s")
+
+    bounds = scene.itemsBoundingRect()
+    random.seed(1)
+    regions = []
+    for _ in range(200):
+        x = random.uniform(bounds.left(), bounds.right())
+        y = random.uniform(bounds.top(), bounds.bottom())
+        regions.append(QRectF(x, y, 2000, 1500))
+    layer = laylyr.pdkAllLayers[0]
+
+    print(f"{'query':>10}{'hits':>10}{'time (ms)':>12}")
+    start = time.perf_counter()
+    hits = sum(len(sceneQuery(scene, region, layer)) for region in regions)
+    print(f"{'scene':>10}{hits:>10}{(time.perf_counter() - start) * 5:>12.3f}")
+    start = time.perf_counter()
+    hits = sum(len(index.query((int(region.left()), int(region.top()), int(region.right()),
+                                int(region.bottom())), [0])) for region in regions)
+    print(f"{'index':>10}{hits:>10}{(time.perf_counter() - start) * 5:>12.3f}")
+    del app
+
+
+if __name__ == "__main__":
+    main(sys.argv)
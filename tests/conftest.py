@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+
+@pytest.fixture(scope="session", autouse=True)
+def qapp():
+    """Graphics items need a QApplication, one is shared by all tests."""
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def layoutScene(tmp_path):
+    """Empty layout scene of the cell lib/top under tmp_path."""
+    import logging
+    import types
+
+    from PySide6.QtWidgets import QLabel
+
+    import revedaEditor.scenes.layoutScene as lscn
+
+    libraryPath = tmp_path / "lib"
+    editor = types.SimpleNamespace(
+        majorGrid=10, snapGrid=1, snapTuple=(1, 1), cellName="top", viewName="layout",
+        file=libraryPath / "top" / "layout.json", libraryDict={"lib": libraryPath},
+        appMainW=types.SimpleNamespace(logger=logging.getLogger("test")),
+        messageLine=QLabel(), statusLine=QLabel())
+    scene = lscn.layoutScene(types.SimpleNamespace(parent=editor))
+    yield scene
+    # deleting a scene with selected items crashes some PySide builds
+    scene.clearSelection()
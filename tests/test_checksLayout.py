@@ -0,0 +1,116 @@
+import types
+
+import numpy as np
+
+import revedaEditor.backend.spatialIndex as sidx
+import revedaEditor.checks.layout as lchk
+
+
+def rectPoints(x0, y0, x1, y1) -> np.ndarray:
+    return np.array([(x0, y0), (x1, y0), (x1, y1), (x0, y1)])
+
+
+def layerShapes(*polygons) -> sidx.layerShapes:
+    shapes = sidx.layerShapes()
+    for polygon in polygons:
+        shapes.add(polygon, None)
+    return shapes
+
+
+# L shaped polygon with a 100 wide vertical and a 40 wide horizontal leg
+lShape = np.array([(0, 0), (500, 0), (500, 40), (100, 40), (100, 400), (0, 400)])
+
+
+def test_rect_mask():
+    shapes = layerShapes(rectPoints(0, 0, 10, 10), lShape,
+                         np.array([(0, 0), (10, 5), (5, 15), (-5, 10)]))
+    assert lchk.rectMask(shapes).tolist() == [True, False, False]
+    assert lchk.rectMask(shapes, np.array([1, 0])).tolist() == [False, True]
+
+
+def test_width():
+    rule = lchk.widthRule("M1", 50)
+    markers = lchk.checkWidth(layerShapes(rectPoints(0, 0, 30, 300),
+                                          rectPoints(100, 0, 200, 300), lShape), rule)
+    assert [(marker.bbox, marker.value) for marker in markers] == [
+        ((0, 0, 30, 300), 30.0), ((0, 0, 500, 40), 40.0)]
+    assert lchk.checkWidth(layerShapes(lShape), lchk.widthRule("M1", 40)) == []
+
+
+def test_spacing_between_rectangles():
+    shapes = layerShapes(rectPoints(0, 0, 100, 100), rectPoints(130, 0, 230, 100),
+                         rectPoints(230, 0, 300, 100), rectPoints(0, 200, 100, 300))
+    markers = lchk.checkSpacing(shapes, lchk.spacingRule("M1", 50))
+    # touching shapes are connected, 100 apart is far enough
+    assert [(marker.bbox, marker.value) for marker in markers] == [
+        ((100, 0, 130, 100), 30.0)]
+
+
+def test_spacing_of_polygons():
+    triangle = np.array([(120, 60), (300, 60), (300, 300)])
+    markers = lchk.checkSpacing(layerShapes(lShape, triangle), lchk.spacingRule("M1", 30))
+    assert len(markers) == 1 and markers[0].value == 20.0
+    assert lchk.checkSpacing(layerShapes(lShape, triangle), lchk.spacingRule("M1", 20)) == []
+
+
+def test_polygon_distance():
+    assert lchk.polygonDistance(rectPoints(0, 0, 10, 10), rectPoints(13, 14, 20, 20)) == 5.0
+    assert lchk.polygonDistance(rectPoints(0, 0, 100, 100), rectPoints(10, 10, 20, 20)) == 0.0
+    # crossing without a vertex inside the other polygon
+    assert lchk.polygonDistance(rectPoints(0, 40, 100, 60), rectPoints(40, 0, 60, 100)) == 0.0
+
+
+def test_candidate_pairs_match_brute_force():
+    rng = np.random.default_rng(3)
+    corners = rng.integers(0, 10000, size=(400, 2))
+    boxes = np.column_stack((corners, corners + rng.integers(1, 300, size=(400, 2))))
+    pairsA, pairsB = lchk.candidatePairs(boxes[:200], boxes[200:], 50)
+    found = set(zip(pairsA.tolist(), pairsB.tolist()))
+    gaps = lchk._boxDistances(boxes[:200][:, None].repeat(200, 1).reshape(-1, 4),
+                              np.tile(boxes[200:], (200, 1))).reshape(200, 200)
+    expected = {(a, b) for a, b in zip(*np.nonzero(gaps <= 50))}
+    assert found == expected
+
+
+def test_enclosure():
+    inner = layerShapes(rectPoints(20, 20, 40, 40), rectPoints(200, 20, 220, 40),
+                        rectPoints(500, 500, 520, 520))
+    outer = layerShapes(rectPoints(0, 0, 60, 60), rectPoints(190, 0, 260, 60),
+                        np.array([(480, 480), (560, 480), (560, 560), (480, 560)]))
+    markers = lchk.checkEnclosure(inner, outer, lchk.enclosureRule("V1", "M1", 20))
+    assert [marker.bbox for marker in markers] == [(200, 20, 220, 40)]
+    assert len(lchk.checkEnclosure(inner, layerShapes(), lchk.enclosureRule("V1", "M1", 0))) == 3
+
+
+def test_enclosure_by_polygon():
+    inner = layerShapes(rectPoints(10, 300, 30, 320), rectPoints(200, 200, 220, 220))
+    markers = lchk.checkEnclosure(inner, layerShapes(lShape), lchk.enclosureRule("V1", "M1", 10))
+    assert [marker.bbox for marker in markers] == [(200, 200, 220, 220)]
+
+
+def test_via_size():
+    rule = lchk.viaSizeRule("V1", "via1", 20, 40, 20, 40)
+    markers = lchk.checkViaSize(layerShapes(rectPoints(0, 0, 30, 30), rectPoints(0, 0, 10, 30),
+                                            rectPoints(0, 0, 30, 50)), rule)
+    assert [(marker.rule, marker.value) for marker in markers] == [("via1 size", 10.0),
+                                                                   ("via1 size", 30.0)]
+
+
+def test_run_checks_and_pdk_rules():
+    m1, v1 = object(), object()
+    viaDef = types.SimpleNamespace(layer=v1, name="via1", minWidth=0.02, maxWidth=0.04,
+                                   minHeight=0.02, maxHeight=0.04, minSpacing=0.05)
+    fabproc = types.SimpleNamespace(
+        dbu=1000, processVias=[viaDef],
+        layerRules=[types.SimpleNamespace(layer=m1, minWidth=0.05, minSpacing=0)],
+        enclosureRules=[types.SimpleNamespace(inner=v1, outer=m1, enclosure=0.01)])
+    rules = lchk.pdkRules(fabproc, {id(m1): 0, id(v1): 1})
+    assert rules == [lchk.viaSizeRule(1, "via1", 20, 40, 20, 40), lchk.spacingRule(1, 50),
+                     lchk.widthRule(0, 50), lchk.enclosureRule(1, 0, 10)]
+    index = sidx.layoutIndex()
+    index.bulkLoad([(0, rectPoints(0, 0, 95, 100), "metal"),
+                    (1, rectPoints(10, 10, 40, 40), "cut"),
+                    (1, rectPoints(60, 10, 90, 40), "cut")])
+    markers = lchk.runChecks(index, rules)
+    assert [(marker.rule, marker.bbox) for marker in markers] == [
+        ("spacing", (40, 10, 60, 40)), ("enclosure", (60, 10, 90, 40))]
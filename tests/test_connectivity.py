@@ -0,0 +1,113 @@
+import types
+
+import numpy as np
+
+import revedaEditor.backend.spatialIndex as sidx
+import revedaEditor.checks.connectivity as conn
+
+
+def rectPoints(x0, y0, x1, y1) -> np.ndarray:
+    return np.array([(x0, y0), (x1, y0), (x1, y1), (x0, y1)])
+
+
+def test_union_find_components():
+    sets = conn.unionFind(8)
+    sets.union(np.array([0, 3, 5, 6]), np.array([3, 5, 7, 2]))
+    components = sets.components()
+    assert components[0] == components[3] == components[5] == components[7]
+    assert components[6] == components[2]
+    assert len({components[0], components[1], components[2], components[4]}) == 4
+    assert sorted(set(components.tolist())) == [0, 1, 2, 3]
+
+
+def test_union_find_long_chain():
+    sets = conn.unionFind(1000)
+    nodes = np.random.default_rng(4).permutation(1000)
+    sets.union(nodes[:-1], nodes[1:])
+    assert set(sets.components().tolist()) == {0}
+
+
+def twoLayerIndex() -> sidx.layoutIndex:
+    # layer 0 and 1 are metal, layer 2 is a cut between them
+    index = sidx.layoutIndex()
+    index.bulkLoad([
+        (0, rectPoints(0, 0, 100, 20), "a"),
+        (0, rectPoints(100, 0, 200, 20), "b"),  # touches a
+        (0, rectPoints(300, 0, 400, 20), "c"),
+        (0, np.array([(500, 0), (600, 0), (500, 100)]), "triangle"),
+        (0, rectPoints(560, 60, 600, 100), "near"),  # box overlaps, shape does not
+        (1, rectPoints(150, -50, 170, 100), "up"),
+        (1, rectPoints(350, -50, 370, 100), "up2"),
+        (2, rectPoints(155, 5, 165, 15), "cut"),
+    ])
+    return index
+
+
+def test_extract_nets():
+    index = twoLayerIndex()
+    nets = conn.extractNets(index, {0: "M1", 1: "M2", 2: "V1"}, [(2, 0), (2, 1)])
+    assert nets.shapeNet(0, 0) == nets.shapeNet(0, 1) == nets.shapeNet(1, 0) \
+           == nets.shapeNet(2, 0)
+    # metal layers only connect through cuts
+    assert nets.shapeNet(0, 2) != nets.shapeNet(1, 1)
+    assert nets.shapeNet(0, 3) != nets.shapeNet(0, 4)
+    assert len(nets) == 5
+    assert sorted(nets.netShapes(nets.shapeNet(2, 0))) == [(0, 0), (0, 1), (1, 0), (2, 0)]
+
+
+def test_same_named_layers_are_one_conductor():
+    index = sidx.layoutIndex()
+    index.bulkLoad([(0, rectPoints(0, 0, 100, 20), "drawing"),
+                    (1, rectPoints(90, 0, 200, 20), "pin")])
+    nets = conn.extractNets(index, {0: "M1", 1: "M1"}, [])
+    assert len(nets) == 1
+    assert conn.groupLayers({0: "M1", 1: "M1", 2: "M2"}, 1) == [0, 1]
+
+
+def test_net_at_and_names():
+    index = twoLayerIndex()
+    nets = conn.extractNets(index, {}, [(2, 0), (2, 1)])
+    net = nets.netAt([0], 50, 10)
+    assert net == nets.shapeNet(0, 0)
+    assert nets.netAt([1, 0], 160, 90) == net
+    # inside the box of the triangle but outside the triangle
+    assert nets.netAt([0], 590, 50) is None
+    assert nets.netAt([0], 250, 10) is None
+    assert nets.netName(net) == f"net{net}"
+    nets.attachName(net, "vdd")
+    nets.attachName(net, "avdd")
+    assert nets.netName(net) == "avdd,vdd"
+
+
+def test_pdk_connectivity():
+    m1 = types.SimpleNamespace(name="M1")
+    m2 = types.SimpleNamespace(name="M2")
+    m1Pin = types.SimpleNamespace(name="M1")
+    v1 = types.SimpleNamespace(name="V1")
+    fabproc = types.SimpleNamespace(viaConnections=[
+        types.SimpleNamespace(cut=v1, lower=m1, upper=m2)])
+    layers = [m1, m1Pin, v1, m2]
+    groupOf, viaConnections = conn.pdkConnectivity(
+        fabproc, layers, {id(layer): index for index, layer in enumerate(layers)})
+    assert groupOf == {0: "M1", 1: "M1", 2: "V1", 3: "M2"}
+    assert viaConnections == [(2, 0), (2, 1), (2, 3)]
+    assert conn.pdkConnectivity(types.SimpleNamespace(), layers, {}) == (groupOf, [])
+
+
+def test_lvs_report():
+    index = twoLayerIndex()
+    nets = conn.extractNets(index, {}, [(2, 0), (2, 1)])
+    nets.terminals = {("I0", "D"): nets.shapeNet(0, 0), ("I1", "S"): nets.shapeNet(0, 1),
+                      ("I2", "G"): nets.shapeNet(0, 2), ("", "out"): nets.shapeNet(0, 3),
+                      ("I3", "B"): nets.shapeNet(0, 4)}
+    schematicNets = {("I0", "D"): "n1", ("I1", "S"): "n2", ("I2", "G"): "n3",
+                     ("", "out"): "n3", ("I4", "D"): "n4"}
+    n1, n3a, n3b = nets.shapeNet(0, 0), nets.shapeNet(0, 2), nets.shapeNet(0, 3)
+    assert conn.lvsReport(schematicNets, nets) == [
+        "missing in layout: I4.D",
+        "missing in schematic: I3.B",
+        f"open: n3 is split into {', '.join(sorted([f'net{n3a}', f'net{n3b}']))}",
+        f"short: net{n1} joins n1, n2",
+    ]
+    nets.terminals = {("I0", "D"): n1}
+    assert conn.lvsReport({("I0", "D"): "n1"}, nets) == []
@@ -0,0 +1,72 @@
+import types
+
+import numpy as np
+import pytest
+
+import revedaEditor.backend.spatialIndex as sidx
+import revedaEditor.checks.density as dens
+
+
+def rectPoints(x0, y0, x1, y1) -> np.ndarray:
+    return np.array([(x0, y0), (x1, y0), (x1, y1), (x0, y1)])
+
+
+def layerShapes(*polygons) -> sidx.layerShapes:
+    shapes = sidx.layerShapes()
+    for polygon in polygons:
+        shapes.add(polygon, None)
+    return shapes
+
+
+def test_rectangle_density_is_exact():
+    # pixel edges do not line up with the rectangle
+    shapes = layerShapes(rectPoints(13, 7, 77, 91))
+    layerMap = dens.layerDensity(shapes, 0, (0, 0, 100, 100), 100, pixelsPerStep=8)
+    assert layerMap.densities.shape == (1, 1)
+    assert layerMap.densities[0, 0] == pytest.approx(64 * 84 / 100 ** 2)
+
+
+def test_overlapping_shapes_count_once():
+    shapes = layerShapes(rectPoints(0, 0, 60, 100), rectPoints(40, 0, 100, 100))
+    layerMap = dens.layerDensity(shapes, 0, (0, 0, 100, 100), 100)
+    assert layerMap.densities[0, 0] == pytest.approx(1.0)
+
+
+def test_polygon_density_is_sampled():
+    triangle = np.array([(0, 0), (100, 0), (0, 100)])
+    layerMap = dens.layerDensity(layerShapes(triangle), 0, (0, 0, 100, 100), 100,
+                                 pixelsPerStep=64)
+    assert layerMap.densities[0, 0] == pytest.approx(0.5, abs=0.02)
+
+
+def test_sliding_windows():
+    # one filled step in the top left corner of a 3 by 2 step region
+    shapes = layerShapes(rectPoints(0, 0, 50, 50))
+    layerMap = dens.layerDensity(shapes, "M1", (0, 0, 150, 100), 100, 50, pixelsPerStep=4)
+    assert layerMap.densities.shape == (1, 2)
+    assert layerMap.densities == pytest.approx(np.array([[0.25, 0.0]]))
+    assert layerMap.windowBBox(0, 1) == (50, 0, 150, 100)
+
+
+def test_check_density_and_pdk_rules():
+    m1 = object()
+    fabproc = types.SimpleNamespace(dbu=1000, densityRules=[
+        types.SimpleNamespace(layer=m1, window=0.1, step=0.05, minDensity=0.2,
+                              maxDensity=0.8)])
+    rules = dens.pdkDensityRules(fabproc, {id(m1): 0})
+    assert rules == [dens.densityRule(0, 100, 50, 0.2, 0.8)]
+    assert dens.pdkDensityRules(types.SimpleNamespace(dbu=1000), {}) == []
+    index = sidx.layoutIndex()
+    index.bulkLoad([(0, rectPoints(0, 0, 100, 100), None),
+                    (0, rectPoints(190, 0, 200, 100), None)])
+    assert dens.indexExtent(index) == (0, 0, 200, 100)
+    maps, markers = dens.runDensityChecks(index, rules)
+    assert maps[0].densities == pytest.approx(np.array([[1.0, 0.5, 0.1]]))
+    assert [(marker.bbox, marker.value) for marker in markers] == [
+        ((0, 0, 100, 100), 1.0), ((100, 0, 200, 100), pytest.approx(0.1))]
+
+
+def test_empty_layer():
+    layerMap = dens.layerDensity(sidx.layerShapes(), 0, (0, 0, 300, 300), 100)
+    assert layerMap.densities.tolist() == [[0.0] * 3] * 3
+    assert dens.indexExtent(sidx.layoutIndex()) == (0, 0, 0, 0)
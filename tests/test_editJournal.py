@@ -0,0 +1,134 @@
+import json
+import time
+
+from PySide6.QtCore import QPoint
+
+import revedaEditor.backend.editJournal as ejr
+import revedaEditor.backend.undoStack as us
+import revedaEditor.common.layoutShapes as lshp
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule("layoutLayers")
+
+
+def rectDict(x0, y0, x1, y1) -> dict:
+    return {"type": "Rect", "tl": [x0, y0], "br": [x1, y1], "ln": 0, "ang": 0, "fl": [1, 1]}
+
+
+def writeLayout(file, items) -> None:
+    file.parent.mkdir(parents=True, exist_ok=True)
+    file.write_text(json.dumps([{"viewType": "layout"}, {"snapGrid": [1, 1]}] + items))
+
+
+def writeJournal(file, records) -> None:
+    with ejr.journalPath(file).open("w") as f:
+        for op, key, item in records:
+            f.write(ejr._recordLine(op, key, None if item is None else json.dumps(item)))
+
+
+def waitFor(condition, timeout: float = 5.0) -> None:
+    # the journal is written on a background thread
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "journal was not written in time"
+        time.sleep(0.01)
+
+
+def test_replay_edits_over_saved_file(tmp_path):
+    file = tmp_path / "layout.json"
+    writeLayout(file, [rectDict(0, 0, 10, 10), rectDict(20, 0, 30, 10),
+                       rectDict(40, 0, 50, 10)])
+    writeJournal(file, [
+        ("base", 0, rectDict(0, 0, 10, 10)),
+        ("put", 0, rectDict(0, 0, 15, 15)),  # edited
+        ("base", 1, rectDict(20, 0, 30, 10)),
+        ("drop", 1, None),  # deleted
+        ("put", 2, rectDict(60, 0, 70, 10)),  # added
+        ("put", 3, rectDict(80, 0, 90, 10)),
+        ("drop", 3, None),  # added and deleted again
+    ])
+    recovered = ejr.replayJournal(file)
+    assert recovered[:2] == [{"viewType": "layout"}, {"snapGrid": [1, 1]}]
+    assert recovered[2:] == [rectDict(40, 0, 50, 10), rectDict(0, 0, 15, 15),
+                             rectDict(60, 0, 70, 10)]
+
+
+def test_replay_matches_float_coordinates(tmp_path):
+    file = tmp_path / "layout.json"
+    writeLayout(file, [rectDict(0, 0, 10, 10)])
+    writeJournal(file, [("base", 0, rectDict(0.0, 0.0, 10.0, 10.0)), ("drop", 0, None)])
+    assert ejr.replayJournal(file)[2:] == []
+
+
+def test_replay_ignores_cut_last_line(tmp_path):
+    file = tmp_path / "layout.json"
+    writeLayout(file, [])
+    writeJournal(file, [("put", 0, rectDict(0, 0, 10, 10))])
+    with ejr.journalPath(file).open("a") as f:
+        f.write('{"op":"put","key":1,"item":{"type":"Re')
+    assert ejr.replayJournal(file)[2:] == [rectDict(0, 0, 10, 10)]
+
+
+def test_nothing_to_replay(tmp_path):
+    file = tmp_path / "layout.json"
+    writeLayout(file, [rectDict(0, 0, 10, 10)])
+    assert ejr.replayJournal(file) is None
+    writeJournal(file, [("base", 0, rectDict(0, 0, 10, 10))])
+    assert ejr.replayJournal(file) is None
+
+
+def test_compacted_journal_replays_the_same(tmp_path):
+    file = tmp_path / "layout.json"
+    writeLayout(file, [rectDict(0, 0, 10, 10), rectDict(20, 0, 30, 10)])
+    writer = ejr.journalWriter(ejr.journalPath(file))
+    writer.compactRecords = 10
+    writer.put("base", 0, json.dumps(rectDict(0, 0, 10, 10)))
+    writer.put("base", 1, json.dumps(rectDict(20, 0, 30, 10)))
+    writer.put("drop", 1)
+    for width in range(1, 40):
+        writer.put("put", 0, json.dumps(rectDict(0, 0, width, 10)))
+    writer.put("put", 5, json.dumps(rectDict(100, 0, 110, 10)))
+    writer.put("drop", 5)
+    writer.put("put", 6, json.dumps(rectDict(200, 0, 210, 10)))
+    # queued before the start, the writer takes all of them as one batch
+    writer.start()
+
+    def lines():
+        path = ejr.journalPath(file)
+        return path.read_text().splitlines() if path.exists() else []
+
+    # base records, the latest version of each edited item and the deleted
+    # item of the saved file, the item added and deleted again is gone
+    waitFor(lambda: len(lines()) == 5)
+    assert sorted((json.loads(line)["op"], json.loads(line)["key"]) for line in lines()) == [
+        ("base", 0), ("base", 1), ("drop", 1), ("put", 0), ("put", 6)]
+    assert ejr.replayJournal(file)[2:] == [rectDict(0, 0, 39, 10),
+                                           rectDict(200, 0, 210, 10)]
+    writer.put("close")
+    writer.join(5)
+    assert not ejr.journalPath(file).exists()
+
+
+def test_reload_resets_the_journal(layoutScene):
+    file = layoutScene.editorWindow.file
+    writeLayout(file, [rectDict(0, 0, 100, 100), rectDict(200, 0, 300, 100)])
+    layoutScene.loadDesign(file)
+    layoutScene.startJournal()
+    try:
+        layoutScene.undoStack.push(us.addShapeUndo(
+            layoutScene, lshp.layoutRect(QPoint(500, 0), QPoint(600, 100),
+                                         laylyr.pdkAllLayers[0])))
+        layoutScene.reloadScene()
+        assert len(layoutScene.topLevelShapes()) == 2
+        layoutScene.undoStack.push(us.addShapeUndo(
+            layoutScene, lshp.layoutRect(QPoint(0, 500), QPoint(100, 600),
+                                         laylyr.pdkAllLayers[0])))
+        path = ejr.journalPath(file)
+        waitFor(lambda: path.exists() and '"tl":[0.0,500.0]' in path.read_text().replace(
+            " ", ""))
+        # neither the reloaded items nor the edit dropped by the reload
+        recovered = ejr.replayJournal(file)
+        assert [(item["tl"], item["br"]) for item in recovered[2:]] == [
+            ([0, 0], [100, 100]), ([200, 0], [300, 100]), ([0.0, 500.0], [100.0, 600.0])]
+    finally:
+        layoutScene.stopJournal()
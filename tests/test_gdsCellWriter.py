@@ -0,0 +1,191 @@
+import json
+import logging
+import math
+import pathlib
+import types
+
+import gdstk
+import numpy as np
+import pytest
+from PySide6.QtWidgets import QLabel
+
+import revedaEditor.common.arrays as arr
+import revedaEditor.common.layoutGeometry as lgeo
+import revedaEditor.fileio.gdsCellWriter as gcw
+import revedaEditor.fileio.loadJSON as lj
+import revedaEditor.scenes.layoutScene as lscn
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule("layoutLayers")
+
+
+def layoutScene(libraryPath: pathlib.Path) -> lscn.layoutScene:
+    editor = types.SimpleNamespace(
+        majorGrid=10, snapGrid=1, snapTuple=(1, 1),
+        file=libraryPath / "top" / "layout.json", libraryDict={"lib": libraryPath},
+        appMainW=types.SimpleNamespace(logger=logging.getLogger("test")),
+        messageLine=QLabel(), statusLine=QLabel())
+    return lscn.layoutScene(types.SimpleNamespace(parent=editor))
+
+
+def gdsLibrary() -> gdstk.Library:
+    layer = laylyr.pdkAllLayers[0]
+    library = gdstk.Library(unit=1e-6, precision=1e-9)
+    leaf = library.new_cell("leaf")
+    leaf.add(gdstk.rectangle((100, 0), (300, 100), layer=layer.gdsLayer,
+                             datatype=layer.datatype))
+    leaf.add(gdstk.rectangle((0, 200), (50, 500), layer=layer.gdsLayer,
+                             datatype=layer.datatype))
+    top = library.new_cell("top")
+    top.add(gdstk.Reference(leaf, (1000, 2000), rotation=math.pi / 2, x_reflection=True))
+    top.add(gdstk.Reference(leaf, (0, 5000), x_reflection=True))
+    top.add(gdstk.Reference(leaf, (4000, 0), x_reflection=True, columns=3, rows=2,
+                            spacing=(500, 700)))
+    top.add(gdstk.Reference(leaf, (-4000, 0), rotation=math.pi / 2, x_reflection=True,
+                            columns=2, rows=2, spacing=(600, 800)))
+    top.add(gdstk.Reference(leaf, (8000, 0), rotation=math.pi / 2))
+    return library
+
+
+def bboxes(polygons) -> list:
+    return sorted(tuple(np.round(np.concatenate((np.min(points, axis=0),
+                                                 np.max(points, axis=0)))).astype(int))
+                  for points in polygons)
+
+
+def importedLayout(library: gdstk.Library, libraryPath: pathlib.Path):
+    """Layout items loader and the instances of the top cell."""
+    layerMap = gcw.gdsLayerMap(laylyr.pdkAllLayers)
+    for cell in library.cells:
+        viewPath = libraryPath / cell.name / "layout.json"
+        viewPath.parent.mkdir(parents=True)
+        gcw.writeCellView(cell, viewPath, "lib", layerMap)
+    scene = layoutScene(libraryPath)
+    items = lj.layoutItems(scene)
+    return items, [items.create(shapeDict) for shapeDict in
+                   gcw.cellShapeDicts(library["top"], "lib", layerMap)]
+
+
+def test_reflected_references_round_trip(tmp_path):
+    library = gdsLibrary()
+    gdsPath = tmp_path / "test.gds"
+    gcw.writeLayoutLibrary(library, gdsPath)
+    library = gcw.readLayoutLibrary(gdsPath)
+
+    _, instances = importedLayout(library, tmp_path / "lib")
+    imported = bboxes(points for _, points, _ in lgeo.flattenShapes(instances))
+    expected = bboxes(polygon.points for polygon in
+                      library["top"].copy("flat").flatten().polygons)
+    assert imported == expected
+
+
+def test_reflected_reference_rect(tmp_path):
+    library = gdsLibrary()
+    items, instances = importedLayout(library, tmp_path / "lib")
+    layerMap = gcw.gdsLayerMap(laylyr.pdkAllLayers)
+    for instance, shapeDict in zip(instances, gcw.cellShapeDicts(library["top"], "lib",
+                                                                  layerMap)):
+        # the rect of unopened instances, see layoutItems.layoutFileRect
+        shapesRect = instance.mapRectToScene(
+            arr.arrayRect(instance.childrenBoundingRect(), instance.arrayTuple))
+        assert items._shapeDictRect(shapeDict).toRect() == shapesRect.toRect()
+
+
+def test_reflected_reference_dict():
+    library = gdsLibrary()
+    layerMap = gcw.gdsLayerMap(laylyr.pdkAllLayers)
+    instDicts = [shapeDict for shapeDict in gcw.cellShapeDicts(library["top"], "lib", layerMap)
+                 if shapeDict["type"] == "Inst"]
+    assert [instDict["fl"] for instDict in instDicts] == [(1, -1)] * 4 + [(1, 1)]
+    assert [instDict.get("flo") for instDict in instDicts] == [1] * 4 + [None]
+    assert [instDict["ang"] for instDict in instDicts] == [-90, 0, 0, -90, 90]
+    # gdstk maps the spacing through the reflection, pitches are unmapped
+    assert instDicts[2]["arr"] == [3, 2, 500, 700]
+    assert instDicts[3]["arr"] == [2, 2, 600, 800]
+
+
+def test_gds_layer_map_first_layer_wins():
+    layers = [types.SimpleNamespace(gdsLayer=1, datatype=0),
+              types.SimpleNamespace(gdsLayer=1, datatype=2),
+              types.SimpleNamespace(gdsLayer=1, datatype=0)]
+    assert gcw.gdsLayerMap(layers) == {(1, 0): 0, (1, 2): 1}
+
+
+def test_convert_layout_file(tmp_path):
+    gdsPath, oasPath = tmp_path / "test.gds", tmp_path / "test.OAS"
+    gcw.writeLayoutLibrary(gdsLibrary(), gdsPath)
+    gcw.convertLayoutFile(gdsPath, oasPath)
+    assert gcw.isOASISFile(oasPath) and not gcw.isOASISFile(gdsPath)
+    library = gcw.readLayoutLibrary(oasPath)
+    assert sorted(cell.name for cell in library.cells) == ["leaf", "top"]
+    assert len(library["top"].references) == 5
+
+
+def test_shape_dicts_of_other_repetitions_and_shapes():
+    layer = laylyr.pdkAllLayers[0]
+    library = gdstk.Library(unit=1e-6, precision=1e-9)
+    leaf = library.new_cell("leaf")
+    cell = library.new_cell("cell")
+    # a diagonal repetition is not an array instance
+    cell.add(gdstk.Reference(leaf, (0, 0)))
+    cell.references[0].repetition = gdstk.Repetition(columns=2, rows=1, v1=(100, 100),
+                                                     v2=(0, 500))
+    cell.add(gdstk.rectangle((0, 0), (10, 20), layer=layer.gdsLayer,
+                             datatype=layer.datatype))
+    cell.add(gdstk.rectangle((0, 0), (10, 20), layer=99))
+    cell.add(gdstk.FlexPath([(0, 0), (100, 0)], 10, layer=layer.gdsLayer,
+                            datatype=layer.datatype))
+    cell.add(gdstk.Label("vdd", (5, 6), layer=layer.gdsLayer))
+    shapeDicts = list(gcw.cellShapeDicts(cell, "lib", gcw.gdsLayerMap(laylyr.pdkAllLayers)))
+    assert [shapeDict["type"] for shapeDict in shapeDicts] == ["Inst", "Inst", "Polygon",
+                                                               "Polygon", "Label"]
+    assert [shapeDict["loc"] for shapeDict in shapeDicts[:2]] == [(0, 0), (100, 100)]
+    assert [shapeDict["nam"] for shapeDict in shapeDicts[:2]] == ["I1", "I2"]
+    assert "arr" not in shapeDicts[0]
+    assert sorted(shapeDicts[3]["ps"]) == [(0, -5), (0, 5), (100, -5), (100, 5)]
+    assert (shapeDicts[4]["lt"], shapeDicts[4]["st"]) == ("vdd", (5, 6))
+
+
+def test_lazy_import_index(tmp_path):
+    library = gdsLibrary()
+    gdsPath = tmp_path / "test.gds"
+    gcw.writeLayoutLibrary(library, gdsPath)
+    libraryPath = tmp_path / "lib"
+    libraryPath.mkdir()
+    assert gcw.readGDSIndex(libraryPath) is None
+    layerMap = gcw.gdsLayerMap(laylyr.pdkAllLayers)
+    gdsIndex = gcw.writeGDSIndex(libraryPath, gdsPath,
+                                 gcw.readLayoutLibrary(gdsPath).cells)
+    assert gdsIndex["pending"] == ["leaf", "top"]
+    assert gdsIndex["cells"]["top"]["refs"] == ["leaf"]
+    assert gdsIndex["cells"]["leaf"]["bbox"] == [(0, 0), (300, 500)]
+    # the index replaces the cached None of the library
+    assert gcw.readGDSIndex(libraryPath) is gdsIndex
+
+    viewPath = libraryPath / "leaf" / "layout.json"
+    viewPath.parent.mkdir()
+    assert gcw.pendingCellBBox(viewPath) == [(0, 0), (300, 500)]
+    assert gcw.materializeCellView(viewPath, layerMap)
+    assert not gcw.materializeCellView(viewPath, layerMap)
+    assert gcw.pendingCellBBox(viewPath) is None
+    with viewPath.open() as file:
+        assert [item["type"] for item in json.load(file)[2:]] == ["Polygon", "Polygon"]
+    # the pending list is saved with the index
+    gcw._gdsIndexCache.pop(str(libraryPath))
+    assert gcw.readGDSIndex(libraryPath)["pending"] == ["top"]
+
+    gcw.removeGDSIndex(libraryPath)
+    assert not (libraryPath / gcw.gdsIndexName).exists()
+    assert gcw.readGDSIndex(libraryPath) is None
+
+
+def test_convert_cell(tmp_path):
+    gdsPath = tmp_path / "test.gds"
+    gcw.writeLayoutLibrary(gdsLibrary(), gdsPath)
+    layerMap = gcw.gdsLayerMap(laylyr.pdkAllLayers)
+    viewPath = tmp_path / "top.json"
+    assert gcw.convertCell(str(gdsPath), "top", str(viewPath), "lib", layerMap) == "top"
+    with viewPath.open() as file:
+        assert len(json.load(file)) == 2 + 5
+    with pytest.raises(KeyError):
+        gcw.convertCell(str(gdsPath), "missing", str(viewPath), "lib", layerMap)
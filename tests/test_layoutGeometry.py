@@ -0,0 +1,52 @@
+import numpy as np
+from PySide6.QtCore import QPoint, QPointF, QRectF
+from PySide6.QtGui import QPolygonF
+
+import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.common.arrays as arr
+import revedaEditor.common.layoutGeometry as lgeo
+import revedaEditor.common.layoutShapes as lshp
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule("layoutLayers")
+
+
+def bbox(points):
+    points = np.asarray(points)
+    return tuple(points.min(axis=0)) + tuple(points.max(axis=0))
+
+
+def nestedArray():
+    layer = laylyr.pdkAllLayers[0]
+    rect = lshp.layoutRect(QPoint(0, 0), QPoint(100, 200), layer)
+    inner = lshp.layoutInstance([rect])
+    inner.setPos(QPointF(500, 500))
+    inner.angle = 90
+    outer = lshp.layoutInstance([inner])
+    outer.setPos(QPointF(10000, 13000))
+    outer.arrayTuple = ddef.instanceArrayTuple(2, 2, 1000, 2000)
+    return outer, inner, rect
+
+
+def test_flatten_nested_instance_in_array():
+    outer, inner, rect = nestedArray()
+    flattened = [bbox(points) for _, points, item in lgeo.flattenShapes([outer])
+                 if item is rect]
+    assert len(flattened) == 4
+    expected = []
+    for _, _, offset in arr.arrayOffsets(outer.arrayTuple):
+        transform = (rect.itemTransform(inner)[0] * inner.itemTransform(outer)[0]
+                     * arr.shiftTransform(offset) * outer.sceneTransform())
+        polygon = transform.map(QPolygonF(QRectF(rect.rect)))
+        expected.append(bbox([point.toTuple() for point in polygon]))
+    assert sorted(flattened) == sorted(expected)
+    # the rotated rectangle of the first element, offset by the inner instance
+    assert (10300, 13500, 10500, 13600) in flattened
+
+
+def test_flatten_plain_nested_instance():
+    outer, inner, rect = nestedArray()
+    outer.arrayTuple = ddef.instanceArrayTuple()
+    [(_, points, _)] = lgeo.flattenShapes([outer])
+    expected = [p.toTuple() for p in rect.sceneTransform().map(QPolygonF(QRectF(rect.rect)))]
+    assert bbox(points) == bbox(expected)
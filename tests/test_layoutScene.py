@@ -0,0 +1,66 @@
+import json
+import types
+
+from PySide6.QtCore import QPoint, QRectF, Qt
+from PySide6.QtGui import QImage, QPainter
+
+import revedaEditor.common.layoutShapes as lshp
+import revedaEditor.scenes.layoutScene as lscn
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule("layoutLayers")
+
+
+def savedTypes(scene) -> list:
+    scene.saveLayoutCell(scene.editorWindow.file)
+    with scene.editorWindow.file.open() as file:
+        return [item["type"] for item in json.load(file)[2:]]
+
+
+def test_save_after_check_errors(layoutScene, monkeypatch):
+    layer = laylyr.pdkAllLayers[0]
+    monkeypatch.setattr(lscn.fabproc, "layerRules",
+                        [types.SimpleNamespace(layer=layer, minWidth=0, minSpacing=0.1)],
+                        raising=False)
+    layoutScene.addItem(lshp.layoutRect(QPoint(0, 0), QPoint(100, 100), layer))
+    layoutScene.addItem(lshp.layoutRect(QPoint(150, 0), QPoint(250, 100), layer))
+    layoutScene.checkErrors()
+    assert len(layoutScene.drcMarkerSet) == 1
+    # markers are neither saved nor checked again
+    assert savedTypes(layoutScene) == ["Rect", "Rect"]
+    assert len(layoutScene.topLevelShapes()) == 2
+    layoutScene.checkErrors()
+    assert len(layoutScene.drcMarkerSet) == 1
+
+
+def test_save_with_highlighted_net(layoutScene):
+    layer = laylyr.pdkAllLayers[0]
+    first = lshp.layoutRect(QPoint(0, 0), QPoint(100, 100), layer)
+    layoutScene.addItem(first)
+    layoutScene.addItem(lshp.layoutRect(QPoint(50, 50), QPoint(200, 100), layer))
+    layoutScene.addItem(lshp.layoutRect(QPoint(500, 0), QPoint(600, 100), layer))
+    first.setSelected(True)
+    layoutScene.highlightNet()
+    assert len(layoutScene.netHighlightSet) == 2
+    assert savedTypes(layoutScene) == ["Rect", "Rect", "Rect"]
+    # the highlight outlines are not shapes of the net
+    layoutScene.highlightNet()
+    assert len(layoutScene.netHighlightSet) == 2
+
+
+def test_render_without_view(layoutScene):
+    # printing and image export paint the scene with no view attached
+    layer = laylyr.pdkAllLayers[0]
+    layoutScene.addItem(lshp.layoutRect(QPoint(0, 0), QPoint(1000, 1000), layer))
+    rotated = lshp.layoutRect(QPoint(2000, 0), QPoint(3000, 1000), layer)
+    rotated.angle = 90
+    layoutScene.addItem(rotated)
+    layoutScene.addItem(lshp.layoutPolygon([QPoint(0, 2000), QPoint(1000, 2000),
+                                            QPoint(0, 3000)], layer))
+    image = QImage(400, 400, QImage.Format_ARGB32)
+    image.fill(Qt.transparent)
+    painter = QPainter(image)
+    layoutScene.render(painter, QRectF(image.rect()), layoutScene.itemsBoundingRect())
+    painter.end()
+    assert any(image.pixelColor(x, y).alpha() > 0 for x in range(0, 400, 4)
+               for y in range(0, 400, 4))
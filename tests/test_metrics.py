@@ -0,0 +1,114 @@
+import csv
+import json
+
+import pytest
+
+import revedaEditor.backend.metrics as metrics
+
+
+def test_disabled_registry_records_nothing():
+    registry = metrics.metricsRegistry()
+    with registry.span("load") as span:
+        pass
+    assert span is registry.span("other")
+    registry.count("shapes")
+    registry.observe("size", 3)
+    assert registry.traced("call")(lambda value: value * 2)(21) == 42
+    assert registry.rows() == [] and registry.spans() == []
+
+
+def test_spans_fill_histograms():
+    registry = metrics.metricsRegistry(enabled=True)
+    for _ in range(3):
+        with registry.span("load", cell="top"):
+            pass
+    with registry.span("save"):
+        pass
+    assert registry.histograms["load"].count == 3
+    assert [name for name, _, _ in registry.spans()] == ["load"] * 3 + ["save"]
+    assert len(registry.spans("save")) == 1
+    _, start, duration = registry.spans("save")[0]
+    assert start >= 0 and duration >= 0
+
+
+def test_span_ends_on_exception():
+    registry = metrics.metricsRegistry(enabled=True)
+    with pytest.raises(ValueError):
+        with registry.span("fails"):
+            raise ValueError
+    assert registry.histograms["fails"].count == 1
+
+
+def test_traced_decorator():
+    registry = metrics.metricsRegistry(enabled=True)
+
+    @registry.traced("double")
+    def double(value):
+        """Double the value."""
+        return value * 2
+
+    assert double(4) == 8 and double.__doc__ == "Double the value."
+    assert registry.histograms["double"].count == 1
+
+
+def test_counters_and_clear():
+    registry = metrics.metricsRegistry(enabled=True)
+    registry.count("shapes")
+    registry.count("shapes", 4)
+    assert registry.counters == {"shapes": 5}
+    assert registry.rows() == [dict(kind="counter", name="shapes", count=5, total=5)]
+    registry.clear()
+    assert registry.counters == {} and registry.chromeTrace()["traceEvents"] == []
+
+
+def test_histogram_quantiles():
+    values = metrics.histogram()
+    assert values.quantile(0.5) == 0.0 and values.mean == 0.0
+    for value in (0, 0.3, 1, 3, 5, 100):
+        values.add(value)
+    assert (values.count, values.minimum, values.maximum) == (6, 0, 100)
+    assert values.mean == pytest.approx(109.3 / 6)
+    # upper bound of the power of two bucket, capped at the maximum
+    assert values.quantile(0.5) == 2.0
+    assert values.quantile(0.6) == 4.0
+    assert values.quantile(1.0) == 100
+
+
+def test_chrome_trace_and_csv(tmp_path):
+    registry = metrics.metricsRegistry(enabled=True)
+    with registry.span("load", cell="top"):
+        pass
+    registry.count("shapes", 2)
+    registry.observe("size", 8)
+    registry.exportChromeTrace(tmp_path / "trace.json")
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert [(event["name"], event["ph"]) for event in events] == [("load", "X"),
+                                                                  ("shapes", "C")]
+    assert events[0]["args"] == {"cell": "top"} and events[0]["dur"] >= 0
+    assert events[1]["args"] == {"shapes": 2}
+    registry.exportCsv(tmp_path / "metrics.csv")
+    with open(tmp_path / "metrics.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["kind"], row["name"]) for row in rows] == [
+        ("histogram", "load"), ("histogram", "size"), ("counter", "shapes")]
+    assert rows[1]["max"] == "8"
+    assert registry.report().splitlines()[0].split() == ["name", "count", "total", "mean",
+                                                         "p90", "max"]
+
+
+def test_event_buffer_is_bounded(monkeypatch):
+    monkeypatch.setattr(metrics.metricsRegistry, "maxEvents", 5)
+    registry = metrics.metricsRegistry(enabled=True)
+    for _ in range(8):
+        with registry.span("step"):
+            pass
+    assert len(registry.spans()) == 5
+    assert registry.histograms["step"].count == 8
+
+
+def test_module_functions_use_the_shared_registry(monkeypatch):
+    monkeypatch.setattr(metrics.registry, "enabled", False)
+    metrics.enable()
+    assert metrics.registry.enabled
+    metrics.enable(False)
+    assert metrics.span("anything") is metrics.registry.span("other")
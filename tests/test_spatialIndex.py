@@ -0,0 +1,87 @@
+import math
+
+import numpy as np
+
+import revedaEditor.backend.spatialIndex as sidx
+
+
+def randomBoxes(count: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    corners = rng.integers(-5000, 5000, size=(count, 2))
+    sizes = rng.integers(0, 400, size=(count, 2))
+    return np.column_stack((corners, corners + sizes))
+
+
+def bruteForce(boxes: np.ndarray, region) -> list:
+    x0, y0, x1, y1 = region
+    return sorted(int(index) for index, box in enumerate(boxes)
+                  if box[0] <= x1 and box[2] >= x0 and box[1] <= y1 and box[3] >= y0)
+
+
+def rectPoints(x0, y0, x1, y1) -> np.ndarray:
+    return np.array([(x0, y0), (x1, y0), (x1, y1), (x0, y1)])
+
+
+def test_str_tree_matches_brute_force():
+    boxes = randomBoxes(3000)
+    tree = sidx.strTree(boxes)
+    assert len(tree) == len(boxes)
+    rng = np.random.default_rng(2)
+    for _ in range(50):
+        x, y = rng.integers(-6000, 6000, size=2)
+        width, height = rng.integers(0, 2000, size=2)
+        region = (x, y, x + width, y + height)
+        assert sorted(tree.query(*region).tolist()) == bruteForce(boxes, region)
+
+
+def test_str_tree_small_and_empty():
+    boxes = randomBoxes(5)
+    tree = sidx.strTree(boxes)
+    assert sorted(tree.query(-10000, -10000, 10000, 10000).tolist()) == list(range(5))
+    assert len(sidx.strTree(np.zeros((0, 4))).query(0, 0, 10, 10)) == 0
+
+
+def test_str_tree_touching_boxes():
+    tree = sidx.strTree(np.array([(0, 0, 10, 10), (20, 0, 30, 10)]))
+    assert tree.query(10, 10, 15, 15).tolist() == [0]
+    assert tree.query(11, 0, 19, 10).tolist() == []
+
+
+def test_layer_shapes_bboxes_after_adding():
+    shapes = sidx.layerShapes()
+    shapes.add(rectPoints(0, 0, 10, 20), "a")
+    assert shapes.bboxes.tolist() == [[0, 0, 10, 20]]
+    shapes.add(np.array([(5, 5), (40, -3), (12, 30)]), "b")
+    assert shapes.bboxes.tolist() == [[0, 0, 10, 20], [5, -3, 40, 30]]
+    assert shapes.tree.query(30, 25, 35, 28).tolist() == [1]
+
+
+def test_layout_index_query_by_layer():
+    index = sidx.layoutIndex()
+    index.bulkLoad([
+        (0, rectPoints(0, 0, 100, 100), "m1"),
+        (1, rectPoints(50, 50, 150, 150), "m2"),
+        (1, rectPoints(1000, 1000, 1100, 1100), "far"),
+    ])
+    assert len(index) == 3
+    assert index.layers == [0, 1]
+    assert sorted(index.query((60, 60, 70, 70))) == [(0, "m1"), (1, "m2")]
+    assert index.query((60, 60, 70, 70), layers=[1]) == [(1, "m2")]
+    assert index.query((60, 60, 70, 70), layers=[2]) == []
+    assert index.queryIndices(1, (1050, 1050, 1060, 1060)).tolist() == [1]
+    assert len(index.queryIndices(5, (0, 0, 10, 10))) == 0
+    index.insert(0, rectPoints(2000, 2000, 2100, 2100), "added")
+    assert index.query((2050, 2050, 2050, 2050)) == [(0, "added")]
+
+
+def test_nearest_edge():
+    index = sidx.layoutIndex()
+    index.insert(0, rectPoints(0, 0, 100, 100), "near")
+    index.insert(1, rectPoints(130, 0, 200, 100), "far")
+    distance, point, layer, payload = index.nearestEdge(110, 50, 50)
+    assert (distance, point, layer, payload) == (10.0, (100.0, 50.0), 0, "near")
+    distance, point, _, payload = index.nearestEdge(110, 50, 50, layers=[1])
+    assert (distance, point, payload) == (20.0, (130.0, 50.0), "far")
+    distance, point, _, _ = index.nearestEdge(103, 104, 10)
+    assert math.isclose(distance, 5.0) and point == (100.0, 100.0)
+    assert index.nearestEdge(500, 500, 50) is None
@@ -0,0 +1,122 @@
+import gc
+import json
+
+from PySide6.QtCore import QPoint
+
+import revedaEditor.backend.undoStack as us
+import revedaEditor.common.layoutShapes as lshp
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule("layoutLayers")
+
+
+def layoutRect(x0, y0, x1, y1) -> lshp.layoutRect:
+    return lshp.layoutRect(QPoint(x0, y0), QPoint(x1, y1), laylyr.pdkAllLayers[0])
+
+
+def sceneRects(scene) -> list:
+    return sorted(item.sceneBoundingRect().getCoords() for item in scene.topLevelShapes())
+
+
+def pushFillers(scene, count: int) -> None:
+    # enough commands on top to push the earlier ones out of the live steps
+    for index in range(count):
+        scene.undoStack.push(us.addShapeUndo(scene, layoutRect(0, 1000 * (index + 1), 10,
+                                                               1000 * (index + 1) + 10)))
+
+
+def test_undo_delete_of_collected_item(layoutScene):
+    stack = layoutScene.undoStack
+    rect = layoutRect(0, 0, 100, 100)
+    expected = rect.sceneBoundingRect()
+    stack.push(us.addShapeUndo(layoutScene, rect))
+    deleteCommand = us.deleteShapeUndo(layoutScene, rect)
+    stack.push(deleteCommand)
+    pushFillers(layoutScene, stack.liveSteps)
+    assert deleteCommand.compacted
+    key = deleteCommand._oldShapes[0]
+    del rect
+    gc.collect()
+    assert stack.itemStore.liveItem(key) is None
+    for _ in range(stack.liveSteps + 1):
+        stack.undo()
+    # recreated from its record
+    items = layoutScene.topLevelShapes()
+    assert len(items) == 1 and isinstance(items[0], lshp.layoutRect)
+    assert items[0].sceneBoundingRect() == expected
+    stack.undo()
+    assert layoutScene.topLevelShapes() == []
+    for _ in range(stack.liveSteps + 2):
+        stack.redo()
+    assert len(layoutScene.topLevelShapes()) == stack.liveSteps
+
+
+def test_undo_compacted_move(layoutScene):
+    stack = layoutScene.undoStack
+    rect = layoutRect(0, 0, 100, 100)
+    expected = rect.sceneBoundingRect()
+    stack.push(us.addShapeUndo(layoutScene, rect))
+    moveCommand = us.undoMoveShapesCommand([rect], QPoint(0, 0), QPoint(200, 50))
+    stack.push(moveCommand)
+    moved = rect.sceneBoundingRect()
+    assert moved == expected.translated(200, 50)
+    stack.push(us.deleteShapeUndo(layoutScene, rect))
+    pushFillers(layoutScene, stack.liveSteps)
+    assert moveCommand.compacted
+    del rect
+    gc.collect()
+    stack.undo()
+    for _ in range(stack.liveSteps):
+        stack.undo()
+    [rect] = layoutScene.topLevelShapes()
+    assert rect.sceneBoundingRect() == moved
+    # the recreated item is moved back by the offset of the move
+    stack.undo()
+    [rect] = layoutScene.topLevelShapes()
+    assert rect.sceneBoundingRect() == expected
+    stack.redo()
+    assert rect.sceneBoundingRect() == moved
+
+
+def test_eviction_keeps_scene_consistent(layoutScene):
+    stack = layoutScene.undoStack
+    for index in range(15):
+        stack.push(us.addShapeUndo(layoutScene, layoutRect(200 * index, 0, 200 * index + 100,
+                                                           100)))
+    added = sceneRects(layoutScene)
+    stack.setMemoryCap(4 * stack.liveItemBytes)
+    assert stack.memoryUse() <= stack.memoryCap
+    commands = [stack.command(index) for index in range(stack.count())]
+    evicted = sum(command.evicted for command in commands)
+    # the oldest commands go first
+    assert 0 < evicted < 15
+    assert [command.evicted for command in commands] == [True] * evicted + [False] * (
+            15 - evicted)
+    while stack.canUndo():
+        stack.undo()
+    # undoing an evicted command does nothing
+    assert sceneRects(layoutScene) == added[:evicted]
+    while stack.canRedo():
+        stack.redo()
+    assert sceneRects(layoutScene) == added
+    assert stack.memoryReport()[0].endswith(f"{evicted} evicted")
+
+
+def test_loaded_items_are_not_kept(layoutScene):
+    file = layoutScene.editorWindow.file
+    file.parent.mkdir(parents=True)
+    file.write_text(json.dumps([{"viewType": "layout"}, {"snapGrid": [1, 1]}] + [
+        {"type": "Rect", "tl": [200 * index, 0], "br": [200 * index + 100, 100], "ln": 0,
+         "ang": 0, "fl": [1, 1]} for index in range(3)]))
+    layoutScene.loadDesign(file)
+    loaded = sceneRects(layoutScene)
+    stack = layoutScene.undoStack
+    loadCommand = stack.command(0)
+    assert isinstance(loadCommand, us.loadShapesUndo)
+    assert loadCommand._newShapes == [] and stack.commandItems(loadCommand) == []
+    pushFillers(layoutScene, stack.liveSteps)
+    assert loadCommand.compacted and loadCommand.keys() == []
+    assert stack.itemStore._records == {} and stack.itemStore._pinned == {}
+    while stack.canUndo():
+        stack.undo()
+    assert len(loaded) == 3 and sceneRects(layoutScene) == loaded